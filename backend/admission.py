@@ -0,0 +1,278 @@
+# admission.py — Dynamo AI (ADMISSION CONTROL + RATE LIMITING)
+# Per-route concurrency caps, per-user token buckets, deadline shedding
+
+import time
+import asyncio
+
+from fastapi import Request
+from starlette.requests import HTTPConnection
+from fastapi.responses import JSONResponse
+from starlette.background import BackgroundTask
+
+import config
+import telemetry
+import cache
+import auth
+
+# --------------------------------------------------
+# LIMITS
+# --------------------------------------------------
+# prefix -> concurrency, queue depth, max queue wait (s),
+#           token refill rate (req/s per user), burst
+
+ROUTE_LIMITS = {
+    "/chat": {"concurrency": 64, "queue": 128, "max_wait": 5.0, "rate": 1.0, "burst": 10},
+    "/generate-radio": {"concurrency": 4, "queue": 8, "max_wait": 10.0, "rate": 0.1, "burst": 3},
+    "/export-audio": {"concurrency": 8, "queue": 16, "max_wait": 10.0, "rate": 0.3, "burst": 5},
+    "/analyze-data": {"concurrency": 4, "queue": 16, "max_wait": 15.0, "rate": 0.2, "burst": 5},
+    "/analyze-batch": {"concurrency": 2, "queue": 4, "max_wait": 15.0, "rate": 0.05, "burst": 2},
+    "/generate-ppt-smart": {"concurrency": 4, "queue": 8, "max_wait": 10.0, "rate": 0.2, "burst": 3},
+    "/export/": {"concurrency": 8, "queue": 16, "max_wait": 10.0, "rate": 0.5, "burst": 5},
+    # WebSocket sessions: gated on connect (no queue), and each
+    # message is then admitted against its HTTP twin above
+    "/ws": {"concurrency": 256, "queue": 0, "max_wait": 0.0, "rate": 0.5, "burst": 10}
+}
+
+# --------------------------------------------------
+# TOKEN BUCKETS (PER USER, PER ROUTE)
+# --------------------------------------------------
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self):
+        """
+        Returns 0 when a token was taken, else seconds until one is free.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+
+        return (1 - self.tokens) / self.rate
+
+
+_buckets = cache.shared(maxsize=50000, ttl=15 * 60, name="rate_buckets")
+
+
+async def user_key(request: HTTPConnection):
+    """
+    The verified Firebase UID (auth.identify), else the client
+    address. Client-supplied ids are never trusted: anyone could
+    rotate them to dodge the limits.
+    """
+    uid = await auth.identify(request)
+    if uid:
+        return "u:" + uid
+
+    client = request.client
+    return "ip:" + (client.host if client else "unknown")
+
+
+def check_rate(user, prefix, limits):
+    # Atomic across workers when the buckets live in the shared cache
+    return _buckets.update(
+        (user, prefix),
+        TokenBucket.take,
+        lambda: TokenBucket(limits["rate"], limits["burst"])
+    )
+
+# --------------------------------------------------
+# CONCURRENCY GATES (BOUNDED QUEUE + DEADLINE)
+# --------------------------------------------------
+
+class RouteGate:
+    def __init__(self, concurrency, queue, max_wait):
+        self.concurrency = concurrency
+        self.queue = queue
+        self.max_wait = max_wait
+        self.waiting = 0
+        self.in_flight = 0
+        self._sem = None
+
+    def _semaphore(self):
+        # Created lazily so it binds to the serving event loop
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        return self._sem
+
+    async def acquire(self):
+        """
+        Returns None when admitted, else the shed reason.
+        """
+        sem = self._semaphore()
+
+        if not sem.locked():
+            await sem.acquire()
+            self.in_flight += 1
+            return None
+
+        if self.waiting >= self.queue:
+            return "queue_full"
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(sem.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            return "deadline"
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        return None
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore().release()
+
+
+class _Slot:
+    """
+    One admitted request's gate slot. release() is idempotent, so
+    every path that may end the response can call it.
+    """
+    __slots__ = ("gate", "held")
+
+    def __init__(self, gate):
+        self.gate = gate
+        self.held = True
+
+    def release(self):
+        if self.held:
+            self.held = False
+            self.gate.release()
+
+
+def _per_worker(limit):
+    # Concurrency caps are per node; each worker holds its share
+    return max(1, -(-limit // max(1, config.WORKERS)))
+
+
+_gates = {
+    prefix: RouteGate(_per_worker(l["concurrency"]), l["queue"], l["max_wait"])
+    for prefix, l in ROUTE_LIMITS.items()
+}
+
+
+def _match(path):
+    for prefix in ROUTE_LIMITS:
+        nested = prefix if prefix.endswith("/") else prefix + "/"
+        if path == prefix or path.startswith(nested):
+            return prefix
+    return None
+
+async def admit(user, prefix):
+    """
+    Rate limit + concurrency gate outside the HTTP middleware.
+    Returns None when admitted (call release(prefix) afterwards),
+    else (status, reason, retry_after).
+    """
+    if not config.ADMISSION:
+        return None
+
+    limits = ROUTE_LIMITS[prefix]
+
+    if config.STATE_DB:
+        # Shared buckets are a SQLite transaction; keep it off the loop
+        wait = await asyncio.to_thread(check_rate, user, prefix, limits)
+    else:
+        wait = check_rate(user, prefix, limits)
+    if wait:
+        telemetry.record_event("admission", "rate_limited")
+        return 429, "rate_limited", wait
+
+    gate = _gates[prefix]
+    shed = await gate.acquire()
+    if shed:
+        telemetry.record_event("admission", shed)
+        return 503, shed, gate.max_wait
+
+    telemetry.record_event("admission", "admitted")
+    return None
+
+
+def release(prefix):
+    if config.ADMISSION:
+        _gates[prefix].release()
+
+# --------------------------------------------------
+# MIDDLEWARE
+# --------------------------------------------------
+
+def _reject(status, reason, retry_after):
+    message = "Rate limit exceeded" if status == 429 else "Server busy, please retry"
+    return JSONResponse(
+        status_code=status,
+        content={"error": message, "reason": reason},
+        headers={"Retry-After": str(max(1, int(retry_after + 0.999)))}
+    )
+
+
+async def _then_release(background, slot):
+    try:
+        if background is not None:
+            await background()
+    finally:
+        slot.release()
+
+
+async def _releasing(body, slot):
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        slot.release()
+
+
+# Only POSTs under ROUTE_LIMITS prefixes are gated; health, metrics
+# and history reads always pass straight through.
+
+async def middleware(request: Request, call_next):
+    prefix = _match(request.url.path) if request.method == "POST" else None
+    if prefix is None or not config.ADMISSION:
+        return await call_next(request)
+
+    # Per-user rate limit, then per-route concurrency with a
+    # bounded, deadline-limited queue
+    denied = await admit(await user_key(request), prefix)
+    if denied:
+        return _reject(*denied)
+
+    slot = _Slot(_gates[prefix])
+
+    try:
+        response = await call_next(request)
+    except BaseException:
+        slot.release()
+        raise
+
+    if getattr(response, "body_iterator", None) is None:
+        slot.release()
+        return response
+
+    # Held until a streamed body has been sent: the background task
+    # runs after the last chunk (chained after any existing one); the
+    # body wrapper covers a client that disconnects mid-stream, when
+    # Starlette skips background tasks
+    response.background = BackgroundTask(_then_release, response.background, slot)
+    response.body_iterator = _releasing(response.body_iterator, slot)
+    return response
+
+
+def stats():
+    return {
+        prefix: {
+            "waiting": gate.waiting,
+            "in_flight": gate.in_flight
+        }
+        for prefix, gate in _gates.items()
+    }
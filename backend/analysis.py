@@ -1,9 +1,10 @@
 # analysis.py — Dynamo AI (FINAL, SAFE, STRUCTURED, UI-FRIENDLY)
 
 import io
+import uuid
 import base64
-import mimetypes
 
+import numpy as np
 import pandas as pd
 import matplotlib
 matplotlib.use("Agg")  # REQUIRED for server environments
@@ -11,15 +12,70 @@ import matplotlib.pyplot as plt
 
 from pypdf import PdfReader
 from docx import Document
-import google.generativeai as genai
 import config
+import providers
+import telemetry
+import imaging
+import spreadsheet
+import cache
+
+
+# --------------------------------------------------
+# UPLOAD SESSION STORE
+# --------------------------------------------------
+
+# Parsed uploads kept briefly so /generate-ppt-smart can build
+# charts from the in-memory columns without a second upload.
+UPLOAD_TTL_SECONDS = 15 * 60
+UPLOADS = cache.shared(maxsize=32, ttl=UPLOAD_TTL_SECONDS, name="uploads")
+
+
+def store_upload(entry: dict):
+    upload_id = uuid.uuid4().hex
+    UPLOADS.set(upload_id, entry)
+    return upload_id
+
+
+def get_upload(upload_id):
+    if not isinstance(upload_id, str):
+        return None
+    return UPLOADS.get(upload_id)
+
+
+def summarize_numeric(numeric_df):
+    """
+    Compact per-column stats for prompts and overview slides.
+    """
+
+    summary = {}
+
+    for col in numeric_df.columns:
+        values = numeric_df[col].to_numpy(dtype=float)
+        valid = values[~np.isnan(values)]
+
+        if not len(valid):
+            continue
+
+        summary[str(col)] = {
+            "count": int(len(valid)),
+            "mean": float(valid.mean()),
+            "min": float(valid.min()),
+            "max": float(valid.max())
+        }
+
+    return summary
 
 
 # --------------------------------------------------
 # UNIVERSAL FILE ANALYSIS ENGINE
 # --------------------------------------------------
 
-def process_file_universally(file_bytes: bytes, filename: str):
+@telemetry.traced("analysis")
+def process_file_universally(file_bytes: bytes, filename: str, store=True,
+                             sheet=None, columns=None):
+    """
+    sheet / columns narrow an Excel read before any rows are parsed.
+    """
     fn = filename.lower()
 
     try:
@@ -28,32 +84,53 @@ def process_file_universally(file_bytes: bytes, filename: str):
         # ==================================================
         if fn.endswith((".csv", ".xlsx", ".xls")):
 
+            workbook = None
+
             try:
                 if fn.endswith(".csv"):
                     df = pd.read_csv(
                         io.BytesIO(file_bytes),
                         encoding="utf-8",
-                        errors="ignore"
+                        encoding_errors="ignore"
                     )
                 else:
-                    df = pd.read_excel(io.BytesIO(file_bytes))
+                    # Streams one sheet and stops at SAMPLE_ROWS
+                    df, workbook = spreadsheet.read_excel(
+                        file_bytes, fn, sheet=sheet, columns=columns
+                    )
             except Exception:
                 return {
                     "type": "text",
                     "content": "Unable to read tabular data.",
+                    "failed": True,
                     "insight": "File format not supported or corrupted."
                 }
 
-            # 🔒 Clean & normalize dataframe
-            df = df.fillna("").astype(str)
-
-            columns = list(df.columns)
-            rows = df.head(10).values.tolist()
+            # 🔒 Clean & normalize preview only (not the whole frame)
+            columns = [str(c) for c in df.columns]
+            rows = df.head(10).fillna("").astype(str).values.tolist()
 
-            # Detect numeric columns (for chart)
-            numeric_df = df.apply(pd.to_numeric, errors="coerce")
+            # Detect numeric columns (for chart); dates / flags are not series
+            numeric_df = df.select_dtypes(
+                exclude=["datetime", "datetimetz", "timedelta", "bool"]
+            ).apply(pd.to_numeric, errors="coerce")
             numeric_df = numeric_df.dropna(axis=1, how="all")
 
+            upload_id = None
+            if store:
+                upload_id = store_upload({
+                    "kind": "table",
+                    "filename": filename,
+                    "df": df,
+                    "numeric": numeric_df,
+                    "summary": {
+                        "rows": int(len(df)),
+                        "columns": columns,
+                        "numeric": summarize_numeric(numeric_df),
+                        "workbook": workbook
+                    }
+                })
+
             # -------------------------------
             # 📊 Chart + Table
             # -------------------------------
@@ -75,6 +152,8 @@ def process_file_universally(file_bytes: bytes, filename: str):
                     "image": "data:image/png;base64," + img_b64,
                     "columns": columns,
                     "rows": rows,
+                    "upload_id": upload_id,
+                    "workbook": workbook,
                     "insight": f"Extracted numeric trends from {filename}. Showing first 10 rows."
                 }
 
@@ -85,6 +164,8 @@ def process_file_universally(file_bytes: bytes, filename: str):
                 "type": "table",
                 "columns": columns,
                 "rows": rows,
+                "upload_id": upload_id,
+                "workbook": workbook,
                 "insight": f"Preview of first 10 rows from {filename}. No numeric columns detected."
             }
 
@@ -110,9 +191,19 @@ def process_file_universally(file_bytes: bytes, filename: str):
             else:  # TXT
                 text = file_bytes.decode("utf-8", errors="ignore")
 
+            upload_id = None
+            if store:
+                upload_id = store_upload({
+                    "kind": "text",
+                    "filename": filename,
+                    "text": text,
+                    "summary": {"chars": len(text)}
+                })
+
             return {
                 "type": "text",
                 "content": text[:30000],  # token safety
+                "upload_id": upload_id,
                 "insight": f"Read {filename} successfully."
             }
 
@@ -121,47 +212,268 @@ def process_file_universally(file_bytes: bytes, filename: str):
         # ==================================================
         elif fn.endswith((".png", ".jpg", ".jpeg", ".webp")):
 
-            if not config.GEMINI_KEY:
-                return {
-                    "type": "text",
-                    "content": "Vision analysis is not configured."
-                }
+            return analyze_images([(filename, file_bytes)], store=store)
 
-            mime_type = mimetypes.guess_type(filename)[0] or "image/png"
-            img_b64 = base64.b64encode(file_bytes).decode()
+    except Exception as e:
+        return {
+            "type": "text",
+            "content": "Analysis failed.",
+            "failed": True,
+            "error": str(e)
+        }
 
-            image_part = {
-                "inline_data": {
-                    "mime_type": mime_type,
-                    "data": img_b64
-                }
-            }
+    # --------------------------------------------------
+    # Unsupported file
+    # --------------------------------------------------
+    return {
+        "type": "text",
+        "content": "Unsupported file format.",
+        "failed": True
+    }
 
-            genai.configure(api_key=config.GEMINI_KEY)
-            model = genai.GenerativeModel("gemini-2.0-flash")
 
-            response = model.generate_content(
-                ["Describe this image for research purposes.", image_part]
-            )
+# --------------------------------------------------
+# VISION (DOWNSCALED, BATCHED)
+# --------------------------------------------------
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+# Gemini tiles images at 768px; 2x2 tiles keeps document detail
+# while a 12 MP photo shrinks ~10x before upload.
+VISION_MAX_SIDE = 1536
+VISION_QUALITY = 85
+VISION_MAX_IMAGES = 16
+VISION_THUMB_SIDE = 320
 
-            return {
-                "type": "vision",
-                "content": response.text,
-                "image": f"data:{mime_type};base64,{img_b64}",
-                "insight": "Visual analysis complete."
-            }
 
+def _vision_prompt(count):
+    if count == 1:
+        return "Describe this image for research purposes."
+    return (
+        f"Describe these {count} images for research purposes. "
+        "Use a '### Image N' heading per image, then note any "
+        "relationships or differences between them."
+    )
+
+
+def analyze_images(images, store=True):
+    """
+    images: [(filename, bytes)]. Every image is downscaled and
+    re-encoded before upload and all of them go in ONE model call.
+    The response carries thumbnails, never the original bytes.
+    """
+
+    if not config.GEMINI_KEY:
+        return {
+            "type": "text",
+            "content": "Vision analysis is not configured.",
+            "failed": True
+        }
+
+    images = images[:VISION_MAX_IMAGES]
+
+    try:
+        return _describe_images(images, store)
     except Exception as e:
         return {
             "type": "text",
             "content": "Analysis failed.",
+            "failed": True,
             "error": str(e)
         }
 
-    # --------------------------------------------------
-    # Unsupported file
-    # --------------------------------------------------
+
+def _describe_images(images, store):
+    parts = [_vision_prompt(len(images))]
+    thumbs = []
+    meta = []
+
+    for filename, data in images:
+        img = imaging.load(data)
+        original = img.size
+
+        model_img = imaging.resized(img, VISION_MAX_SIDE)
+        parts.append({
+            "mime_type": "image/jpeg",
+            "data": imaging.encode(model_img, "JPEG", VISION_QUALITY)
+        })
+
+        thumb = imaging.resized(model_img, VISION_THUMB_SIDE)
+        fmt = imaging.output_format()
+        thumbs.append((imaging.encode(thumb, fmt, imaging.THUMB_QUALITY), fmt))
+
+        meta.append({
+            "filename": filename,
+            "width": original[0],
+            "height": original[1]
+        })
+
+    model = providers.gemini_model("gemini-2.0-flash")
+    with telemetry.span("vision_model"):
+        response = model.generate_content(parts)
+
+    upload_id = None
+    if store:
+        upload_id = store_upload({
+            "kind": "images",
+            "filename": images[0][0],
+            "thumbnails": thumbs,
+            "summary": {"images": meta}
+        })
+
+    for i, m in enumerate(meta):
+        if upload_id:
+            m["thumbnail_url"] = f"/uploads/{upload_id}/thumbnails/{i}"
+
+    thumb_bytes, thumb_fmt = thumbs[0]
+
     return {
-        "type": "text",
-        "content": "Unsupported file format."
+        "type": "vision",
+        "content": response.text,
+        # Small preview for the chat bubble; originals are never echoed
+        "image": imaging.data_uri(thumb_bytes, thumb_fmt),
+        "images": meta,
+        "upload_id": upload_id,
+        "insight": "Visual analysis complete."
     }
+
+
+def get_thumbnail(upload_id, index):
+    upload = get_upload(upload_id)
+    if not upload or upload.get("kind") != "images":
+        return None
+
+    thumbs = upload["thumbnails"]
+    if not 0 <= index < len(thumbs):
+        return None
+
+    data, fmt = thumbs[index]
+    return data, imaging.MIME[fmt]
+
+
+# --------------------------------------------------
+# UPLOAD → DECK PIPELINE
+# --------------------------------------------------
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def _resolve_chart(chart: dict, upload: dict):
+    """
+    Replaces column references with the stored columns:
+      {"columns": ["Revenue", "Cost"], "label_column": "Month"}
+      {"kind": "scatter", "x_column": "Age", "columns": ["Income"]}
+    Series are handed over as numpy arrays.
+    """
+
+    df = upload["df"]
+    numeric = upload["numeric"]
+
+    # The summary (and so the model) only ever sees str(col); headers
+    # read as numbers or dates are matched back to their real labels
+    numeric_by_name = {str(c): c for c in numeric.columns}
+    df_by_name = {str(c): c for c in df.columns}
+
+    columns = [
+        numeric_by_name[str(c)]
+        for c in _as_list(chart.get("columns"))
+        if str(c) in numeric_by_name
+    ]
+    if not columns:
+        return chart
+
+    resolved = dict(chart)
+    resolved["series"] = [
+        {"name": str(c), "values": numeric[c].to_numpy(dtype=float)}
+        for c in columns
+    ]
+
+    x_col = chart.get("x_column")
+    if x_col is not None and str(x_col) in numeric_by_name:
+        resolved["x"] = numeric[numeric_by_name[str(x_col)]].to_numpy(dtype=float)
+
+    label_col = chart.get("label_column")
+    if label_col is not None and str(label_col) in df_by_name:
+        resolved["labels"] = df[df_by_name[str(label_col)]].fillna("").astype(str).tolist()
+    else:
+        resolved["labels"] = [str(i + 1) for i in range(len(df))]
+
+    return resolved
+
+
+def _overview_slides(upload: dict):
+    summary = upload["summary"]
+
+    if upload["kind"] == "images":
+        return [{
+            "type": "content",
+            "heading": "Images Analyzed",
+            "bullets": [
+                f"{m['filename']} ({m['width']}×{m['height']})"
+                for m in summary["images"]
+            ]
+        }]
+
+    if upload["kind"] == "text":
+        text = upload.get("text", "")
+        paragraphs = [p.strip() for p in text.split("\n") if p.strip()]
+        return [{
+            "type": "content",
+            "heading": "Document Overview",
+            "bullets": [p[:160] for p in paragraphs[:6]]
+        }]
+
+    bullets = [
+        f"{summary['rows']} rows × {len(summary['columns'])} columns",
+    ]
+    for col, stats in list(summary["numeric"].items())[:5]:
+        bullets.append(
+            f"{col}: mean {stats['mean']:.2f} (min {stats['min']:.2f}, max {stats['max']:.2f})"
+        )
+
+    slides = [{
+        "type": "content",
+        "heading": "Dataset Overview",
+        "bullets": bullets
+    }]
+
+    numeric_cols = list(summary["numeric"].keys())[:3]
+    if numeric_cols:
+        slides.append({
+            "type": "chart",
+            "heading": "Numeric Trends",
+            "chart": {
+                "kind": "line" if summary["rows"] > 20 else "bar",
+                "columns": numeric_cols
+            }
+        })
+
+    return slides
+
+
+def deck_from_upload(upload: dict, payload: dict):
+    """
+    Builds a /generate-ppt-smart payload from a stored upload.
+    Explicit slides are kept (chart column refs resolved); with
+    no slides an overview deck is generated.
+    """
+
+    deck = dict(payload)
+    deck.setdefault("title", f"Dynamo Analysis: {upload['filename']}")
+
+    slides = payload.get("slides") or _overview_slides(upload)
+
+    resolved = []
+    for s in slides:
+        if s.get("type") == "chart" and upload["kind"] == "table":
+            s = dict(s)
+            s["chart"] = _resolve_chart(s.get("chart", {}), upload)
+        resolved.append(s)
+
+    deck["slides"] = resolved
+    return deck
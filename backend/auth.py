@@ -0,0 +1,156 @@
+# auth.py — Dynamo AI (FIREBASE ID TOKENS)
+# Verified caller identity for per-user data and per-user limits
+
+import time
+import asyncio
+import hashlib
+
+from fastapi import HTTPException
+from starlette.requests import HTTPConnection
+
+import config
+import cache
+import telemetry
+import supabase_client
+
+# --------------------------------------------------
+# SETTINGS
+# --------------------------------------------------
+
+BEARER = "bearer "
+TOKEN_PARAM = "token"          # browsers cannot set headers on a WebSocket
+TOKEN_CACHE_TTL = 5 * 60       # re-verify at least this often (tokens live 1h)
+REJECTED_TOKEN_TTL = 60        # a bad token is not re-checked on every request
+USER_CACHE_TTL = 60 * 60
+
+# sha256(token) -> firebase uid ("" when rejected); keeps signature
+# checks off the hot path
+_tokens = cache.TTLCache(maxsize=10000, ttl=TOKEN_CACHE_TTL, name="auth_tokens")
+# firebase uid -> users.id
+_users = cache.TTLCache(maxsize=10000, ttl=USER_CACHE_TTL, name="auth_users")
+
+# --------------------------------------------------
+# FIREBASE ADMIN (LAZY)
+# --------------------------------------------------
+
+_app = None
+_initialized = False
+
+
+def _firebase():
+    """
+    Initializes firebase_admin on first use. Credentials come from
+    FIREBASE_CREDENTIALS (service-account JSON path) or the
+    environment's default credentials.
+    """
+    global _app, _initialized
+
+    if _initialized:
+        return _app
+
+    _initialized = True
+
+    try:
+        import firebase_admin
+        from firebase_admin import credentials
+
+        cred = None
+        if config.FIREBASE_CREDENTIALS:
+            cred = credentials.Certificate(config.FIREBASE_CREDENTIALS)
+
+        options = None
+        if config.FIREBASE_PROJECT_ID:
+            options = {"projectId": config.FIREBASE_PROJECT_ID}
+
+        _app = firebase_admin.initialize_app(cred, options, name="dynamo")
+    except Exception as e:
+        print("Firebase Init Error:", e)
+        _app = None
+
+    return _app
+
+
+def verify_token(token):
+    """
+    Blocking: checks the ID token's signature and expiry. Returns
+    (uid, seconds until expiry) or None for any invalid token.
+    """
+    app = _firebase()
+    if app is None:
+        return None
+
+    from firebase_admin import auth
+
+    try:
+        claims = auth.verify_id_token(token, app=app)
+    except Exception:
+        telemetry.record_event("auth_token", "rejected")
+        return None
+
+    return claims["uid"], claims.get("exp", 0) - time.time()
+
+# --------------------------------------------------
+# REQUEST IDENTITY
+# --------------------------------------------------
+
+def token_from(conn: HTTPConnection):
+    header = conn.headers.get("authorization", "")
+    if header[:len(BEARER)].lower() == BEARER:
+        return header[len(BEARER):].strip() or None
+
+    return conn.query_params.get(TOKEN_PARAM) or None
+
+
+async def identify(conn: HTTPConnection):
+    """
+    The verified Firebase UID of the caller, or None. Verified once
+    per connection; cache misses are checked in a worker thread.
+    """
+    if "dynamo.uid" in conn.scope:
+        return conn.scope["dynamo.uid"]
+
+    uid = None
+    token = token_from(conn)
+
+    if token:
+        key = hashlib.sha256(token.encode()).hexdigest()
+        uid = _tokens.get(key)
+
+        if uid is None:
+            verified = await asyncio.to_thread(verify_token, token)
+            if verified:
+                uid, lifetime = verified
+                _tokens.set(key, uid, ttl=max(1, min(TOKEN_CACHE_TTL, lifetime)))
+            else:
+                _tokens.set(key, "", ttl=REJECTED_TOKEN_TTL)
+
+        uid = uid or None
+
+    conn.scope["dynamo.uid"] = uid
+    return uid
+
+
+async def current_user(conn: HTTPConnection):
+    """
+    users.id for the verified caller. 401 without a valid token,
+    503 when the user store cannot be reached.
+    """
+    uid = await identify(conn)
+    if uid is None:
+        raise HTTPException(status_code=401, detail="Sign-in required")
+
+    user_id = _users.get(uid)
+    if user_id is None:
+        user = await asyncio.to_thread(supabase_client.get_or_create_user, uid)
+        if not user:
+            raise HTTPException(status_code=503, detail="User store unavailable")
+
+        user_id = user["id"]
+        _users.set(uid, user_id)
+
+    return user_id
+
+
+async def owns_chat(user_id, chat_id):
+    owner = await asyncio.to_thread(supabase_client.chat_owner, chat_id)
+    return owner is not None and str(owner) == str(user_id)
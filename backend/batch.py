@@ -0,0 +1,205 @@
+# batch.py — Dynamo AI (BATCH FILE ANALYSIS)
+# Many files / a ZIP → process-pool fan-out → NDJSON stream
+
+import io
+import os
+import json
+import time
+import asyncio
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# --------------------------------------------------
+# LIMITS
+# --------------------------------------------------
+
+MAX_FILES = 200
+MAX_ZIP_MEMBERS = 500
+MAX_UNZIPPED_BYTES = 500 * 1024 * 1024   # zip-bomb guard
+FILE_TIMEOUT = float(os.getenv("DYNAMO_BATCH_FILE_TIMEOUT", "60"))
+WORKERS = int(os.getenv("DYNAMO_BATCH_WORKERS", "0")) or (os.cpu_count() or 2)
+
+SUPPORTED = (
+    ".csv", ".xlsx", ".xls", ".pdf", ".docx", ".txt",
+    ".png", ".jpg", ".jpeg", ".webp"
+)
+
+# --------------------------------------------------
+# PROCESS POOL
+# --------------------------------------------------
+
+_pool = None
+
+
+def get_pool():
+    """
+    Spawned (not forked) workers: the parent has live threads
+    (writer, HTTP pools) that must not be cloned mid-operation.
+    Each worker imports analysis once and is reused.
+    """
+    global _pool
+
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown():
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _analyze(filename, data):
+    # Runs in a worker process
+    import analysis
+    return analysis.process_file_universally(data, filename, store=False)
+
+# --------------------------------------------------
+# INPUT EXPANSION
+# --------------------------------------------------
+
+def expand(files):
+    """
+    [(filename, bytes)] → flat list with ZIP archives unpacked.
+    Unsupported members are reported, not analyzed.
+    """
+
+    out = []
+    skipped = []
+
+    for name, data in files:
+        if name.lower().endswith(".zip"):
+            try:
+                with zipfile.ZipFile(io.BytesIO(data)) as zf:
+                    members = [
+                        m for m in zf.infolist()
+                        if not m.is_dir() and not m.filename.startswith("__MACOSX/")
+                    ][:MAX_ZIP_MEMBERS]
+
+                    total = sum(m.file_size for m in members)
+                    if total > MAX_UNZIPPED_BYTES:
+                        skipped.append({"filename": name, "reason": "archive too large"})
+                        continue
+
+                    for m in members:
+                        out.append((os.path.basename(m.filename), zf.read(m)))
+            except zipfile.BadZipFile:
+                skipped.append({"filename": name, "reason": "corrupt archive"})
+        else:
+            out.append((name, data))
+
+    kept = []
+    for name, data in out:
+        if not name.lower().endswith(SUPPORTED):
+            skipped.append({"filename": name, "reason": "unsupported format"})
+        elif len(kept) >= MAX_FILES:
+            skipped.append({"filename": name, "reason": "file limit reached"})
+        else:
+            kept.append((name, data))
+
+    return kept, skipped
+
+# --------------------------------------------------
+# NDJSON STREAM
+# --------------------------------------------------
+
+def _line(obj):
+    return (json.dumps(obj, default=str) + "\n").encode()
+
+
+def _status(result):
+    # process_file_universally flags files it could not analyze
+    return "failed" if result.get("failed") else "ok"
+
+
+async def stream(files):
+    """
+    Yields one NDJSON line per file as it completes, then a summary.
+    At most one file per pool worker is submitted at a time, so each
+    FILE_TIMEOUT covers the analysis, not time queued in the pool.
+    A timed-out file is reported; its worker finishes in the background
+    and keeps its slot until it does.
+    """
+
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    slots = asyncio.Semaphore(WORKERS)
+
+    items, skipped = expand(files)
+
+    for s in skipped:
+        yield _line({"type": "skipped", **s})
+
+    def finished(future):
+        # The slot tracks the pool worker, not the wait on it
+        slots.release()
+        if not future.cancelled():
+            future.exception()
+
+    async def run(index, name, data):
+        await slots.acquire()
+        t0 = time.perf_counter()
+        try:
+            future = loop.run_in_executor(pool, _analyze, name, data)
+        except Exception as e:
+            slots.release()
+            result, status = {"error": str(e)}, "failed"
+        else:
+            future.add_done_callback(finished)
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), timeout=FILE_TIMEOUT)
+                status = _status(result)
+            except asyncio.TimeoutError:
+                result, status = {"error": f"timed out after {FILE_TIMEOUT:.0f}s"}, "timeout"
+            except Exception as e:
+                result, status = {"error": str(e)}, "failed"
+
+        return {
+            "type": "result",
+            "index": index,
+            "filename": name,
+            "status": status,
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
+            "result": result
+        }
+
+    tasks = [asyncio.ensure_future(run(i, n, d)) for i, (n, d) in enumerate(items)]
+
+    counts = {"ok": 0, "failed": 0, "timeout": 0}
+    by_type = {}
+    insights = []
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            row = await next_done
+            counts[row["status"]] += 1
+
+            kind = row["result"].get("type", "error")
+            by_type[kind] = by_type.get(kind, 0) + 1
+
+            if row["result"].get("insight"):
+                insights.append(f"{row['filename']}: {row['result']['insight']}")
+
+            yield _line(row)
+    finally:
+        # Client went away: stop anything not yet started
+        for t in tasks:
+            t.cancel()
+
+    yield _line({
+        "type": "summary",
+        "files": len(items),
+        "skipped": len(skipped),
+        **counts,
+        "by_type": by_type,
+        "insights": insights,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    })
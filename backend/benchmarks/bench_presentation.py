@@ -0,0 +1,80 @@
+# bench_presentation.py — Dynamo AI (BENCHMARK)
+# Per-deck build time for /generate-ppt-smart payloads
+#
+# Usage (from backend/):
+#   python benchmarks/bench_presentation.py [--repeat 5] [--theme executive]
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# --------------------------------------------------
+# SYNTHETIC DECKS
+# --------------------------------------------------
+
+def make_payload(n_slides, theme="executive"):
+    slides = []
+
+    for i in range(n_slides):
+        if i % 4 == 3:
+            slides.append({
+                "type": "chart",
+                "heading": f"Metric {i}",
+                "chart": {
+                    "kind": "bar",
+                    "labels": [f"Q{q}" for q in range(1, 13)],
+                    "values": [float((i * q) % 97) for q in range(1, 13)]
+                }
+            })
+        else:
+            slides.append({
+                "type": "content",
+                "heading": f"Section {i}",
+                "bullets": [f"Insight {i}.{b} about the topic" for b in range(5)]
+            })
+
+    return {
+        "title": f"Benchmark Deck ({n_slides} slides)",
+        "theme": theme,
+        "slides": slides
+    }
+
+# --------------------------------------------------
+# RUNNER
+# --------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--theme", default="executive")
+    parser.add_argument("--sizes", default="10,50,200")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    import presentation_engine
+    print(f"template load + import: {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        payload = make_payload(size, args.theme)
+        timings = []
+        deck_bytes = 0
+
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            deck_bytes = len(presentation_engine.render_presentation(payload))
+            timings.append((time.perf_counter() - t0) * 1000)
+
+        print(
+            f"{size:>4} slides: "
+            f"median {statistics.median(timings):8.1f} ms  "
+            f"min {min(timings):8.1f} ms  "
+            f"size {deck_bytes / 1024:8.1f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# bench_server.py — Dynamo AI (BENCHMARK)
+# Runs the real app with every upstream pointed at fake_upstreams
+#
+#   BENCH_FAKES_URL=http://127.0.0.1:8765 python benchmarks/bench_server.py --port 8900
+
+import os
+import sys
+import argparse
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+os.chdir(BACKEND)
+
+FAKES = os.environ.get("BENCH_FAKES_URL", "http://127.0.0.1:8765")
+
+# Image URLs are read at import time
+os.environ["POLLINATIONS_URL"] = FAKES + "/pollinations/prompt/"
+os.environ["HF_API_URL"] = FAKES + "/hf"
+os.environ.setdefault("HF_API_TOKEN", "bench")
+os.environ.setdefault("DYNAMO_PREWARM", "false")
+# One client drives every request; per-user rate limits would turn
+# most of them into 429s and measure the limiter, not the app
+os.environ.setdefault("DYNAMO_ADMISSION", "false")
+
+import requests
+import uvicorn
+
+# --------------------------------------------------
+# FAKE CLIENTS (THROUGH THE APP'S OWN SEAMS)
+# --------------------------------------------------
+
+_http = requests.Session()
+
+
+def fake_complete(model, system, prompt, timeout):
+    r = _http.post(
+        FAKES + "/gemini",
+        json={"model": model, "system": system, "prompt": prompt},
+        timeout=timeout
+    )
+    r.raise_for_status()
+    return r.json()["text"]
+
+
+class FakeTavily:
+    def search(self, query, **kwargs):
+        r = _http.post(FAKES + "/tavily/search", json={"query": query, **kwargs}, timeout=30)
+        r.raise_for_status()
+        return r.json()
+
+
+async def fake_synthesize(text, filename, voice=None):
+    import aiohttp
+
+    async with aiohttp.ClientSession() as session:
+        async with session.post(FAKES + "/tts", json={"text": text}) as resp:
+            data = await resp.read()
+
+    with open(filename, "wb") as f:
+        f.write(data)
+
+
+def install():
+    import providers
+    import search
+    import voice
+
+    for name in ("gemini", "groq", "deepseek"):
+        providers.register_provider(name, fake_complete, enabled=False)
+    providers.register_provider("gemini", fake_complete)
+
+    search.tavily_client = FakeTavily()
+    search._initialized = True
+
+    voice.synthesize = fake_synthesize
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8900)
+    args = parser.parse_args()
+
+    install()
+
+    from main import app
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# fake_upstreams.py — Dynamo AI (BENCHMARK)
+# Local stand-ins for Gemini, Tavily, Pollinations / HF and Edge TTS
+#
+# Standalone:
+#   python benchmarks/fake_upstreams.py --port 8765 --latency gemini=0.8,tavily=0.3
+
+import os
+import zlib
+import struct
+import random
+import asyncio
+import argparse
+import threading
+
+from aiohttp import web
+
+DEFAULT_LATENCY = {
+    "gemini": 0.6,
+    "tavily": 0.3,
+    "pollinations": 1.5,
+    "huggingface": 2.0,
+    "tts": 0.8
+}
+
+# --------------------------------------------------
+# CANNED PAYLOADS
+# --------------------------------------------------
+
+def _png(width=1024, height=1024):
+    """
+    Valid RGB PNG without needing Pillow (noise rows so it does
+    not compress to nothing).
+    """
+
+    rng = random.Random(42)
+    row = bytes(rng.getrandbits(8) for _ in range(width * 3))
+    raw = b"".join(b"\x00" + row for _ in range(height))
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+IMAGE_BYTES = _png()
+MP3_BYTES = b"ID3" + os.urandom(48 * 1024)   # ~3 s of audio at 128 kbps
+
+ANSWER = (
+    "## Executive Summary\n"
+    + "Dynamo benchmark answer with enough text to resemble a real reply. " * 20
+)
+
+
+def _results(query, n=5):
+    return [
+        {
+            "title": f"Result {i} for {query[:40]}",
+            "url": f"https://example{i}.com/article/{abs(hash(query)) % 10000}",
+            "content": f"{query} — synthetic snippet {i}. " * 10,
+            "raw_content": f"{query} — synthetic full text {i}. " * 200
+        }
+        for i in range(n)
+    ]
+
+# --------------------------------------------------
+# SERVER
+# --------------------------------------------------
+
+def build_app(latency):
+    async def delay(name):
+        await asyncio.sleep(latency.get(name, 0))
+
+    async def gemini(request):
+        await delay("gemini")
+        return web.json_response({"text": ANSWER})
+
+    async def tavily(request):
+        body = await request.json()
+        await delay("tavily")
+        return web.json_response({"results": _results(body.get("query", ""))})
+
+    async def pollinations(request):
+        await delay("pollinations")
+        return web.Response(body=IMAGE_BYTES, content_type="image/png")
+
+    async def huggingface(request):
+        await delay("huggingface")
+        return web.Response(body=IMAGE_BYTES, content_type="image/png")
+
+    async def tts(request):
+        await delay("tts")
+        return web.Response(body=MP3_BYTES, content_type="audio/mpeg")
+
+    app = web.Application()
+    app.router.add_post("/gemini", gemini)
+    app.router.add_post("/tavily/search", tavily)
+    app.router.add_get("/pollinations/prompt/{prompt:.*}", pollinations)
+    app.router.add_post("/hf", huggingface)
+    app.router.add_post("/tts", tts)
+    return app
+
+
+def parse_latency(spec):
+    latency = dict(DEFAULT_LATENCY)
+    for part in filter(None, (spec or "").split(",")):
+        name, value = part.split("=")
+        latency[name.strip()] = float(value)
+    return latency
+
+
+def start_in_thread(port, latency):
+    """
+    Runs the fake upstreams on their own event loop in a daemon
+    thread. Returns the base URL once the server is listening.
+    """
+
+    ready = threading.Event()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        runner = web.AppRunner(build_app(latency), access_log=None)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="fake-upstreams", daemon=True).start()
+    ready.wait(10)
+
+    return f"http://127.0.0.1:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="")
+    args = parser.parse_args()
+
+    web.run_app(build_app(parse_latency(args.latency)), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
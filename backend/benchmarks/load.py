@@ -0,0 +1,320 @@
+# load.py — Dynamo AI (BENCHMARK)
+# Load scenarios against the real app with stubbed upstreams
+#
+# Usage (from backend/):
+#   python benchmarks/load.py                       # all scenarios
+#   python benchmarks/load.py chat analyze_csv_large --concurrency 32 --requests 400
+#   python benchmarks/load.py --latency gemini=1.2,tavily=0.5 --json bench_output.json
+#
+# Reports RPS, p50 / p99 latency, error count and the server's peak RSS.
+
+import io
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+import fake_upstreams
+from bench_presentation import make_payload
+
+# --------------------------------------------------
+# SYNTHETIC CORPORA
+# --------------------------------------------------
+
+def make_csv(rows):
+    out = io.StringIO()
+    out.write("date,region,revenue,cost,units,notes\n")
+    for i in range(rows):
+        out.write(
+            f"2024-{(i % 12) + 1:02d}-{(i % 28) + 1:02d},"
+            f"R{i % 7},{(i * 37) % 10000 / 3:.2f},{(i * 17) % 8000 / 3:.2f},"
+            f"{i % 500},row {i} note\n"
+        )
+    return out.getvalue().encode()
+
+
+def make_pdf(pages):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=letter)
+    line = "Dynamo benchmark paragraph with realistic sentence length and words. "
+
+    for p in range(pages):
+        y = 740
+        for i in range(45):
+            c.drawString(40, y, f"{p}.{i} {line}")
+            y -= 16
+        c.showPage()
+
+    c.save()
+    return buf.getvalue()
+
+
+def make_history(n):
+    return [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"Message {i}: " + "research content sentence. " * (8 if i % 2 == 0 else 60)
+        }
+        for i in range(n)
+    ]
+
+# --------------------------------------------------
+# SCENARIOS
+# --------------------------------------------------
+# name -> (method, path, body factory, expected "type").
+# Body is JSON or ("file", name, bytes); expected None = binary download.
+
+def scenarios():
+    corpora = {}
+
+    def cached(key, factory):
+        if key not in corpora:
+            corpora[key] = factory()
+        return corpora[key]
+
+    chat_history = make_history(20)
+
+    return {
+        "chat": ("POST", "/chat", lambda: {
+            "message": "What is the latest news on solar energy prices in 2024?",
+            "history": chat_history,
+            "use_search": True
+        }, "text"),
+        "chat_no_search": ("POST", "/chat", lambda: {
+            "message": "Rewrite this paragraph to sound more formal.",
+            "history": chat_history,
+            "use_search": True
+        }, "text"),
+        "chat_deep": ("POST", "/chat", lambda: {
+            "message": "Compare lithium and sodium battery costs and also their outlook",
+            "history": chat_history,
+            "deep_dive": True
+        }, "text"),
+        "image": ("POST", "/chat", lambda: {
+            "message": "Create an image of a mountain lake at sunrise"
+        }, "image_v2"),
+        "analyze_csv_small": ("POST", "/analyze-data", lambda: (
+            "file", "small.csv", cached("csv_s", lambda: make_csv(1_000))
+        ), "chart"),
+        "analyze_csv_medium": ("POST", "/analyze-data", lambda: (
+            "file", "medium.csv", cached("csv_m", lambda: make_csv(50_000))
+        ), "chart"),
+        "analyze_csv_large": ("POST", "/analyze-data", lambda: (
+            "file", "large.csv", cached("csv_l", lambda: make_csv(300_000))
+        ), "chart"),
+        "analyze_pdf_small": ("POST", "/analyze-data", lambda: (
+            "file", "small.pdf", cached("pdf_s", lambda: make_pdf(5))
+        ), "text"),
+        "analyze_pdf_large": ("POST", "/analyze-data", lambda: (
+            "file", "large.pdf", cached("pdf_l", lambda: make_pdf(60))
+        ), "text"),
+        "export_pdf": ("POST", "/export/pdf", lambda: {"messages": cached("hist", lambda: make_history(300))}, None),
+        "export_word": ("POST", "/export/word", lambda: {"messages": cached("hist", lambda: make_history(300))}, None),
+        "export_ppt": ("POST", "/export/ppt", lambda: {"messages": cached("hist", lambda: make_history(300))}, None),
+        "ppt_smart_200": ("POST", "/generate-ppt-smart", lambda: cached("deck", lambda: make_payload(200)), None),
+        "export_audio": ("POST", "/export-audio", lambda: {
+            "message": "Read this answer aloud. " * 40
+        }, None)
+    }
+
+# --------------------------------------------------
+# SERVER PROCESS
+# --------------------------------------------------
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def peak_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def start_server(fakes_url):
+    port = free_port()
+    env = dict(os.environ, BENCH_FAKES_URL=fakes_url)
+
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "bench_server.py"), "--port", str(port)],
+        cwd=BACKEND,
+        env=env
+    )
+
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return proc, base
+        except OSError:
+            if proc.poll() is not None:
+                raise RuntimeError("bench server exited during startup")
+            time.sleep(0.2)
+
+    proc.kill()
+    raise RuntimeError("bench server did not start")
+
+# --------------------------------------------------
+# DRIVER
+# --------------------------------------------------
+
+def _succeeded(status, data, expected):
+    """
+    A 200 is not enough: analysis failures, the image placeholder and
+    the model outage fallback all come back as 200 JSON.
+    """
+    if status >= 400:
+        return False
+    if expected is None:
+        return True
+
+    try:
+        body = json.loads(data)
+    except ValueError:
+        return False
+
+    if not isinstance(body, dict) or body.get("type") != expected or "error" in body:
+        return False
+
+    # /chat answers from the outage fallback carry no provider
+    usage = body.get("prompt_tokens")
+    return not isinstance(usage, dict) or "provider" in usage
+
+
+async def _send(session, base, method, path, body, expected):
+    if isinstance(body, tuple) and body[0] == "file":
+        form = aiohttp.FormData()
+        form.add_field("file", body[2], filename=body[1])
+        kwargs = {"data": form}
+    else:
+        kwargs = {"json": body}
+
+    started = time.perf_counter()
+    async with session.request(method, base + path, **kwargs) as resp:
+        data = await resp.read()
+        ok = _succeeded(resp.status, data, expected)
+    return time.perf_counter() - started, ok
+
+
+async def drive(base, spec, total, concurrency, warmup):
+    method, path, factory, expected = spec
+    timeout = aiohttp.ClientTimeout(total=300)
+
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        for _ in range(warmup):
+            await _send(session, base, method, path, factory(), expected)
+
+        latencies = []
+        errors = 0
+        remaining = total
+
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                try:
+                    elapsed, ok = await _send(session, base, method, path, factory(), expected)
+                    latencies.append(elapsed)
+                    errors += 0 if ok else 1
+                except Exception:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+
+    def pct(p):
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / wall, 2) if wall else None,
+        "p50_ms": round(pct(0.50), 1) if latencies else None,
+        "p99_ms": round(pct(0.99), 1) if latencies else None
+    }
+
+
+def main():
+    all_scenarios = scenarios()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("names", nargs="*", help=f"subset of: {', '.join(all_scenarios)}")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--latency", default="", help="e.g. gemini=0.8,tavily=0.3,tts=0.5")
+    parser.add_argument("--fakes-port", type=int, default=0)
+    parser.add_argument("--json", default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    names = args.names or list(all_scenarios)
+    fakes_url = fake_upstreams.start_in_thread(
+        args.fakes_port or free_port(),
+        fake_upstreams.parse_latency(args.latency)
+    )
+
+    results = {}
+    header = f"{'scenario':<22}{'rps':>9}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'peak RSS MB':>13}"
+    print(header)
+    print("-" * len(header))
+
+    for name in names:
+        # Fresh server per scenario so peak RSS is attributable
+        proc, base = start_server(fakes_url)
+
+        try:
+            r = asyncio.run(drive(base, all_scenarios[name], args.requests, args.concurrency, args.warmup))
+            r["peak_rss_mb"] = peak_rss_mb(proc.pid)
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+        results[name] = r
+        rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] else "n/a"
+        print(
+            f"{name:<22}{r['rps'] or 0:>9.2f}{r['p50_ms'] or 0:>10.1f}"
+            f"{r['p99_ms'] or 0:>10.1f}{r['errors']:>8}{rss:>13}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
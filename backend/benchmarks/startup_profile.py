@@ -0,0 +1,80 @@
+# startup_profile.py — Dynamo AI (BENCHMARK)
+# Import time per module for a cold `import main`
+#
+# Usage (from backend/):
+#   python benchmarks/startup_profile.py [--top 25] [--target main]
+#   python benchmarks/startup_profile.py --target analysis   # one subsystem
+
+import os
+import sys
+import argparse
+import subprocess
+from collections import defaultdict
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# --------------------------------------------------
+# -X importtime PARSER
+# --------------------------------------------------
+
+def profile(target):
+    """
+    Runs a fresh interpreter and returns (total_us, [(module, self_us, cumulative_us)]).
+    """
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=BACKEND,
+        capture_output=True,
+        text=True
+    )
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+
+        self_us = int(parts[0].strip())
+        cumulative_us = int(parts[1].strip())
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), self_us, cumulative_us, depth))
+
+    if proc.returncode != 0:
+        print(proc.stderr.splitlines()[-1] if proc.stderr else "import failed")
+
+    total = sum(r[1] for r in rows)
+    return total, rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", default="main")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    total, rows = profile(args.target)
+
+    # Self time rolled up by top-level package
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"import {args.target}: {total / 1000:.1f} ms total\n")
+
+    print("Top packages (self time):")
+    for pkg, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {us / 1000:9.1f} ms  {pkg}")
+
+    print("\nDirect imports of the target (cumulative):")
+    direct = [r for r in rows if r[3] == 1]
+    for name, _, cumulative_us, _ in sorted(direct, key=lambda r: -r[2])[:args.top]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
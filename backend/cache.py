@@ -0,0 +1,290 @@
+# cache.py — Dynamo AI (IN-PROCESS TTL / LRU CACHE + SHARED SQLITE CACHE)
+
+import os
+import time
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import config
+import telemetry
+
+# --------------------------------------------------
+# TTL + LRU CACHE
+# --------------------------------------------------
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache with optional per-entry TTL.
+    ttl=None means entries only leave through LRU eviction.
+    """
+
+    def __init__(self, maxsize=256, ttl=None, name="cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expired(self, expires_at):
+        return expires_at is not None and expires_at <= time.monotonic()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+
+            if item is None:
+                value = _MISSING
+            else:
+                value, expires_at = item
+                if self._expired(expires_at):
+                    del self._data[key]
+                    value = _MISSING
+                else:
+                    self._data.move_to_end(key)
+
+        telemetry.record_cache(self.name, value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+
+        if item is None or self._expired(item[1]):
+            return default
+        return item[0]
+
+    def update(self, key, fn, factory):
+        """
+        Atomic read-modify-write: fn(value) may mutate value (made by
+        factory() when missing); the value is stored back and fn's
+        result returned.
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+
+        with self._lock:
+            item = self._data.get(key)
+
+            if item is None or self._expired(item[1]):
+                value = factory()
+            else:
+                value = item[0]
+
+            result = fn(value)
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+        return result
+
+    def delete_where(self, predicate):
+        """
+        Drops every key for which predicate(key) is true.
+        """
+
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+# --------------------------------------------------
+# SHARED CACHE (SQLITE, ACROSS WORKER PROCESSES)
+# --------------------------------------------------
+# Same interface as TTLCache, over one SQLite file that every worker
+# on the node opens. Values are pickled, so get() returns a copy:
+# mutate and set() it back, or use update(). Expiry uses wall-clock
+# time; eviction past maxsize drops the least recently written rows.
+
+PRUNE_EVERY = 64    # writes between expiry / size sweeps
+
+_SCHEMA = """
+create table if not exists entries (
+    name text not null,
+    key text not null,
+    key_obj blob not null,
+    value blob not null,
+    expires real,
+    written real not null,
+    primary key (name, key)
+)
+"""
+
+_local = threading.local()
+
+
+def _connect(path):
+    # One connection per thread, reopened after fork
+    conns = getattr(_local, "conns", None)
+    if conns is None or _local.pid != os.getpid():
+        conns = _local.conns = {}
+        _local.pid = os.getpid()
+
+    conn = conns.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+        conn.execute("pragma journal_mode=wal")
+        conn.execute("pragma synchronous=normal")
+        conn.execute(_SCHEMA)
+        conns[path] = conn
+
+    return conn
+
+
+class SharedCache:
+    def __init__(self, path, maxsize=256, ttl=None, name="cache"):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._writes = 0
+
+    def _expiry(self, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        return time.time() + ttl if ttl else None
+
+    def _live(self, row):
+        return row is not None and (row[1] is None or row[1] > time.time())
+
+    def _store(self, conn, key, value, expires_at):
+        conn.execute(
+            "insert or replace into entries values (?, ?, ?, ?, ?, ?)",
+            (
+                self.name, repr(key),
+                pickle.dumps(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                expires_at, time.time()
+            )
+        )
+
+    def _prune(self, conn):
+        self._writes += 1
+        if self._writes % PRUNE_EVERY:
+            return
+
+        conn.execute(
+            "delete from entries where name = ? and expires <= ?",
+            (self.name, time.time())
+        )
+        conn.execute(
+            "delete from entries where name = ? and key in ("
+            " select key from entries where name = ?"
+            " order by written desc limit -1 offset ?)",
+            (self.name, self.name, self.maxsize)
+        )
+
+    def get(self, key, default=None):
+        row = _connect(self.path).execute(
+            "select value, expires from entries where name = ? and key = ?",
+            (self.name, repr(key))
+        ).fetchone()
+
+        hit = self._live(row)
+        telemetry.record_cache(self.name, hit)
+        return pickle.loads(row[0]) if hit else default
+
+    def set(self, key, value, ttl=None):
+        conn = _connect(self.path)
+        self._store(conn, key, value, self._expiry(ttl))
+        self._prune(conn)
+
+    def pop(self, key, default=None):
+        conn = _connect(self.path)
+        conn.execute("begin immediate")
+
+        try:
+            row = conn.execute(
+                "select value, expires from entries where name = ? and key = ?",
+                (self.name, repr(key))
+            ).fetchone()
+            conn.execute(
+                "delete from entries where name = ? and key = ?",
+                (self.name, repr(key))
+            )
+            conn.execute("commit")
+        except BaseException:
+            conn.execute("rollback")
+            raise
+
+        return pickle.loads(row[0]) if self._live(row) else default
+
+    def update(self, key, fn, factory):
+        conn = _connect(self.path)
+        conn.execute("begin immediate")
+
+        try:
+            row = conn.execute(
+                "select value, expires from entries where name = ? and key = ?",
+                (self.name, repr(key))
+            ).fetchone()
+
+            value = pickle.loads(row[0]) if self._live(row) else factory()
+            result = fn(value)
+            self._store(conn, key, value, self._expiry())
+            conn.execute("commit")
+        except BaseException:
+            conn.execute("rollback")
+            raise
+
+        self._prune(conn)
+        return result
+
+    def delete_where(self, predicate):
+        conn = _connect(self.path)
+        rows = conn.execute(
+            "select key, key_obj from entries where name = ?", (self.name,)
+        ).fetchall()
+
+        doomed = [(self.name, k) for k, obj in rows if predicate(pickle.loads(obj))]
+        if doomed:
+            conn.executemany(
+                "delete from entries where name = ? and key = ?", doomed
+            )
+
+    def clear(self):
+        _connect(self.path).execute(
+            "delete from entries where name = ?", (self.name,)
+        )
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        return _connect(self.path).execute(
+            "select count(*) from entries where name = ?", (self.name,)
+        ).fetchone()[0]
+
+
+def shared(maxsize=256, ttl=None, name="cache"):
+    """
+    A cache every worker sees when the launcher configured a state
+    file (DYNAMO_STATE_DB), else a plain in-process TTLCache.
+    """
+    if config.STATE_DB:
+        return SharedCache(config.STATE_DB, maxsize=maxsize, ttl=ttl, name=name)
+    return TTLCache(maxsize=maxsize, ttl=ttl, name=name)
+
+
+_MISSING = object()
@@ -10,6 +10,41 @@ GROQ_KEY = os.getenv("GROQ_API_KEY")
 TAVILY_KEY = os.getenv("TAVILY_API_KEY")
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 
+# Model router: race a slow provider against the next healthy one
+HEDGE_REQUESTS = os.getenv("DYNAMO_HEDGE", "true").lower() == "true"
+
+# Admission control (rate limits + concurrency gates); benchmarks
+# turn it off to measure the app itself
+ADMISSION = os.getenv("DYNAMO_ADMISSION", "true").lower() == "true"
+
+# Startup: heavy modules load lazily, then pre-warm in the background
+PREWARM = os.getenv("DYNAMO_PREWARM", "true").lower() == "true"
+PREWARM_DELAY = float(os.getenv("DYNAMO_PREWARM_DELAY", "2"))
+
+# Read-aloud: synthesize each chat answer's first segment in the
+# background so /export-audio can answer immediately (costs TTS calls)
+SPECULATIVE_TTS = os.getenv("DYNAMO_SPECULATIVE_TTS", "false").lower() == "true"
+
+# Observability: export OpenTelemetry traces (needs opentelemetry-sdk)
+OTEL_ENABLED = os.getenv("DYNAMO_OTEL", "false").lower() == "true"
+
+# Serving: worker processes (0 = one per core) and the SQLite file
+# they share caches / rate limits / uploads through (set by serve.py)
+WORKERS = int(os.getenv("DYNAMO_WORKERS", "1") or 1)
+STATE_DB = os.getenv("DYNAMO_STATE_DB")
+DRAIN_TIMEOUT = float(os.getenv("DYNAMO_DRAIN_TIMEOUT", "30"))
+
+# Client address behind a reverse proxy: X-Forwarded-For is honoured
+# only from these peers. On Render every request arrives through its
+# proxy, so all peers are trusted there; elsewhere only localhost
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS") or (
+    "*" if os.getenv("RENDER") else "127.0.0.1"
+)
+
+# Firebase Auth: ID tokens are verified against this project
+FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID")
+FIREBASE_CREDENTIALS = os.getenv("FIREBASE_CREDENTIALS")   # service-account JSON path
+
 # Supabase Config
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
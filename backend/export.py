@@ -8,6 +8,7 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.pagesizes import letter
 from fastapi.responses import StreamingResponse
+import telemetry
 
 # --------------------------------------------------
 # HISTORY NORMALIZER
@@ -38,6 +39,7 @@ def normalize_history(history):
 # WORD EXPORT
 # --------------------------------------------------
 
+@telemetry.traced("export_word")
 def word(history):
     history = normalize_history(history)
 
@@ -63,6 +65,7 @@ def word(history):
 # POWERPOINT EXPORT
 # --------------------------------------------------
 
+@telemetry.traced("export_ppt")
 def ppt(history):
     history = normalize_history(history)
 
@@ -88,6 +91,7 @@ def ppt(history):
 # PDF EXPORT
 # --------------------------------------------------
 
+@telemetry.traced("export_pdf")
 def pdf(history):
     history = normalize_history(history)
 
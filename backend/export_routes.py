@@ -1,8 +1,13 @@
 # export_routes.py — Dynamo AI (FINAL, STABLE)
 
+import asyncio
+
 from fastapi import APIRouter, Body, HTTPException
 from fastapi.responses import StreamingResponse
-from export import pdf, word, ppt
+import lazy
+
+# docx / pptx / reportlab load on the first export
+export = lazy.module("export")
 
 router = APIRouter(
     prefix="/export",
@@ -27,20 +32,21 @@ def extract_history(payload: dict):
 # --------------------------------------------------
 # ROUTES
 # --------------------------------------------------
+# Documents are built in a worker thread, off the event loop
 
 @router.post("/pdf")
 async def export_pdf(payload: dict = Body(...)):
     history = extract_history(payload)
-    return pdf(history)
+    return await asyncio.to_thread(export.pdf, history)
 
 
 @router.post("/word")
 async def export_word(payload: dict = Body(...)):
     history = extract_history(payload)
-    return word(history)
+    return await asyncio.to_thread(export.word, history)
 
 
 @router.post("/ppt")
 async def export_ppt(payload: dict = Body(...)):
     history = extract_history(payload)
-    return ppt(history)
+    return await asyncio.to_thread(export.ppt, history)
@@ -1,47 +1,119 @@
 import aiohttp
-import base64
 import uuid
 import os
-
-HF_API_URL = "https://api-inference.huggingface.co/models/stabilityai/sdxl-turbo"
+import cache
+import resilience
+import telemetry
+import imaging
+
+HF_API_URL = os.getenv(
+    "HF_API_URL",
+    "https://api-inference.huggingface.co/models/stabilityai/sdxl-turbo"
+)
+POLLINATIONS_URL = os.getenv(
+    "POLLINATIONS_URL",
+    "https://image.pollinations.ai/prompt/"
+)
 HF_API_TOKEN = os.getenv("HF_API_TOKEN")
 
+# Per-call caps; the request deadline may shorten them further
+POLLINATIONS_TIMEOUT = 30
+HF_TIMEOUT = 60
+
+# Generated images are served from GET /images/{id}; only the small
+# thumbnail travels inline in the chat response
+IMAGE_TTL_SECONDS = 15 * 60
+IMAGES = cache.shared(maxsize=64, ttl=IMAGE_TTL_SECONDS, name="images")
+
+
+def store_image(data, mime):
+    image_id = uuid.uuid4().hex
+    IMAGES.set(image_id, (data, mime))
+    return image_id
+
+
+def get_image(image_id):
+    """(bytes, mime) of a generated image, or None once expired."""
+    return IMAGES.get(image_id)
+
+
+async def _image_response(img_bytes, raw_mime, prompt, source):
+    """
+    Transcoded full image (by URL) + inline chat-bubble thumbnail,
+    metadata stripped. Falls back to the raw upstream bytes if
+    Pillow can't decode them.
+    """
+    try:
+        out = await imaging.process_async(img_bytes)
+    except Exception as e:
+        print("Image post-processing failed:", e)
+
+        image_id = store_image(img_bytes, raw_mime)
+        return {
+            "type": "image_v2",
+            "content": f"/images/{image_id}",
+            "prompt": prompt,
+            "source": source
+        }
+
+    image_id = store_image(out["full"], imaging.MIME[out["format"]])
+    return {
+        "type": "image_v2",
+        "content": f"/images/{image_id}",
+        "thumbnail": imaging.data_uri(out["thumb"], out["format"]),
+        "width": out["width"],
+        "height": out["height"],
+        "prompt": prompt,
+        "source": source
+    }
+
+
+@telemetry.traced("image")
 async def generate_image_base64(prompt: str):
     """
     Generates an image using:
     1) Pollinations (primary, free)
     2) Hugging Face SDXL Turbo (fallback)
-    Returns Base64 image for frontend rendering
+    Returns the image URL plus an inline Base64 thumbnail
     """
 
     clean_prompt = prompt.strip().replace(" ", "%20")
 
     pollinations_url = (
-        "https://image.pollinations.ai/prompt/"
+        POLLINATIONS_URL
         + clean_prompt
         + "?nologo=true&width=1024&height=1024&seed="
         + str(uuid.uuid4())
     )
 
+    img_bytes = None
+
     async with aiohttp.ClientSession() as session:
 
         # ===============================
         # 1️⃣ TRY POLLINATIONS (PRIMARY)
         # ===============================
         try:
-            async with session.get(pollinations_url, timeout=30) as resp:
-                if resp.status == 200:
+            with resilience.guard("pollinations"):
+                async with session.get(
+                    pollinations_url,
+                    timeout=aiohttp.ClientTimeout(
+                        total=resilience.timeout_for(POLLINATIONS_TIMEOUT)
+                    )
+                ) as resp:
+                    resp.raise_for_status()
                     img_bytes = await resp.read()
-                    img_b64 = base64.b64encode(img_bytes).decode("utf-8")
-
-                    return {
-                        "type": "image_v2",
-                        "content": f"data:image/jpeg;base64,{img_b64}",
-                        "prompt": prompt,
-                        "source": "pollinations"
-                    }
+        except resilience.CircuitOpen:
+            img_bytes = None
+        except resilience.DeadlineExceeded:
+            return _unavailable()
         except Exception as e:
+            img_bytes = None
             print("Pollinations failed:", str(e))
+            telemetry.record_upstream_error("pollinations")
+
+        if img_bytes:
+            return await _image_response(img_bytes, "image/jpeg", prompt, "pollinations")
 
         # ===============================
         # 2️⃣ FALLBACK – HUGGING FACE
@@ -63,34 +135,38 @@ async def generate_image_base64(prompt: str):
         }
 
         try:
-            async with session.post(
-                HF_API_URL,
-                headers=headers,
-                json=payload,
-                timeout=60
-            ) as resp:
-
-                if resp.status == 200:
-                    img_bytes = await resp.read()
-                    img_b64 = base64.b64encode(img_bytes).decode("utf-8")
-
-                    return {
-                        "type": "image_v2",
-                        "content": f"data:image/png;base64,{img_b64}",
-                        "prompt": prompt,
-                        "source": "huggingface"
-                    }
+            with resilience.guard("huggingface"):
+                async with session.post(
+                    HF_API_URL,
+                    headers=headers,
+                    json=payload,
+                    timeout=aiohttp.ClientTimeout(
+                        total=resilience.timeout_for(HF_TIMEOUT)
+                    )
+                ) as resp:
+
+                    if resp.status != 200:
+                        print("HF Error:", await resp.text())
+                        resp.raise_for_status()
 
-                else:
-                    error_text = await resp.text()
-                    print("HF Error:", error_text)
+                    img_bytes = await resp.read()
 
+        except (resilience.CircuitOpen, resilience.DeadlineExceeded):
+            pass
         except Exception as e:
             print("HuggingFace failed:", str(e))
+            telemetry.record_upstream_error("huggingface")
+
+        if img_bytes:
+            return await _image_response(img_bytes, "image/png", prompt, "huggingface")
 
     # ===============================
     # FINAL FAILSAFE
     # ===============================
+    return _unavailable()
+
+
+def _unavailable():
     return {
         "type": "text",
         "content": "Image generation is currently busy. Please try again."
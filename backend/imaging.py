@@ -0,0 +1,121 @@
+# imaging.py — Dynamo AI (PILLOW POST-PROCESSING)
+# Transcode, resize, thumbnail, strip metadata — off the event loop
+
+import io
+import os
+import base64
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps, features
+
+import telemetry
+
+# --------------------------------------------------
+# SETTINGS
+# --------------------------------------------------
+
+# "avif" needs a Pillow build with libavif; falls back to webp
+PREFERRED_FORMAT = os.getenv("DYNAMO_IMAGE_FORMAT", "webp").lower()
+FULL_QUALITY = 82
+THUMB_QUALITY = 70
+THUMB_SIZE = 256
+
+MIME = {
+    "WEBP": "image/webp",
+    "AVIF": "image/avif",
+    "JPEG": "image/jpeg",
+    "PNG": "image/png"
+}
+
+# Pillow releases the GIL while encoding, so threads scale here
+_pool = ThreadPoolExecutor(
+    max_workers=min(8, os.cpu_count() or 2),
+    thread_name_prefix="imaging"
+)
+
+
+def output_format():
+    if PREFERRED_FORMAT == "avif" and features.check("avif"):
+        return "AVIF"
+    if PREFERRED_FORMAT in ("jpeg", "jpg"):
+        return "JPEG"
+    return "WEBP"
+
+# --------------------------------------------------
+# CORE OPS (SYNC)
+# --------------------------------------------------
+
+def load(data):
+    """
+    Decodes bytes, applies EXIF orientation and normalizes mode.
+    The returned image carries no EXIF / ICC / XMP metadata.
+    """
+
+    img = Image.open(io.BytesIO(data))
+    img = ImageOps.exif_transpose(img)
+
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    img = img.convert("RGBA" if has_alpha else "RGB")
+    img.info = {}
+
+    return img
+
+
+def encode(img, fmt, quality):
+    if fmt == "JPEG" and img.mode == "RGBA":
+        img = img.convert("RGB")
+
+    buf = io.BytesIO()
+    params = {"quality": quality}
+    if fmt == "WEBP":
+        params["method"] = 4
+    elif fmt == "JPEG":
+        params["optimize"] = True
+        params["progressive"] = True
+
+    img.save(buf, format=fmt, **params)
+    return buf.getvalue()
+
+
+def resized(img, max_side):
+    if max(img.size) <= max_side:
+        return img
+
+    out = img.copy()
+    out.thumbnail((max_side, max_side), Image.LANCZOS)
+    return out
+
+
+def data_uri(data, fmt):
+    return f"data:{MIME[fmt]};base64," + base64.b64encode(data).decode("utf-8")
+
+
+def process(data, max_side=1024, thumb_side=THUMB_SIZE):
+    """
+    → {"full": bytes, "thumb": bytes, "format", "width", "height"}
+    """
+
+    fmt = output_format()
+    img = load(data)
+
+    full = resized(img, max_side)
+    thumb = resized(full, thumb_side)
+
+    return {
+        "full": encode(full, fmt, FULL_QUALITY),
+        "thumb": encode(thumb, fmt, THUMB_QUALITY),
+        "format": fmt,
+        "width": full.width,
+        "height": full.height
+    }
+
+# --------------------------------------------------
+# ASYNC WRAPPER
+# --------------------------------------------------
+
+async def process_async(data, max_side=1024, thumb_side=THUMB_SIZE):
+    loop = asyncio.get_running_loop()
+
+    with telemetry.span("image_postprocess"):
+        return await loop.run_in_executor(_pool, process, data, max_side, thumb_side)
@@ -0,0 +1,124 @@
+# intent.py — Dynamo AI (FAST-PATH INTENT ROUTER)
+# Word-boundary patterns with weights; runs before any I/O
+
+import re
+
+# --------------------------------------------------
+# PATTERNS (weight > 0 supports, < 0 vetoes)
+# --------------------------------------------------
+
+_IMAGE_NOUNS = (
+    r"(image|picture|pic|photo|illustration|drawing|painting|sketch|logo|"
+    r"poster|wallpaper|artwork|portrait|avatar|icon|render)s?"
+)
+
+INTENT_PATTERNS = {
+    "image": [
+        (rf"\b(create|generate|make|draw|paint|render|design|produce)\b.{{0,40}}\b{_IMAGE_NOUNS}\b", 0.95),
+        (r"^\s*(please\s+)?(draw|paint|sketch|illustrate)\b", 0.85),
+        (rf"\b{_IMAGE_NOUNS} of\b", 0.6),
+        # "draw a conclusion", "visualize this data", "picture this"
+        (r"\bdraw (a |an |the )?(conclusion|comparison|parallel|line|distinction|inference)s?\b", -0.95),
+        (r"\b(chart|graph|plot|table|data|dataset|csv|excel|spreadsheet|dashboard|diagram of the data)\b", -0.6),
+        (r"\bpicture this\b", -0.8)
+    ],
+    "identity": [
+        (r"\bwho (are|r) (you|u)\b", 0.95),
+        (r"\bwhat(?:'s| is) your name\b", 0.95),
+        (r"\byour name\b", 0.8),
+        (r"\bwho (made|created|built|developed|trained) (you|u)\b", 0.95),
+        (r"\b(are you|r u) (chatgpt|gpt|gemini|claude|llama|an? ai)\b", 0.85)
+    ],
+    "search_needed": [
+        (r"\b(latest|today|tonight|yesterday|tomorrow|current(ly)?|right now|this (week|month|year))\b", 0.7),
+        (r"\b(news|headlines?|breaking|announced?|released?|launch(ed)?|update[sd]?)\b", 0.6),
+        (r"\b(price|stock|share price|market cap|weather|forecast|score|results?|election|rank(ing)?s?)\b", 0.6),
+        (r"\b20[2-3]\d\b", 0.5),
+        (r"\b(according to|sources?|cite|citations?|statistics|stats|study|studies|report)\b", 0.5),
+        (r"\b(who|what|when|where) (is|was|are|were|did)\b", 0.35),
+        (r"\bhow (much|many)\b", 0.3)
+    ],
+    "no_search": [
+        (r"^\s*(hi|hii+|hello|hey|yo|thanks|thank you|thx|ok|okay|cool|great|nice|bye|good (morning|afternoon|evening|night))\b[\s!.?]*$", 0.95),
+        (r"\b(write|rewrite|rephrase|translate|summari[sz]e|proofread|paraphrase)\b", 0.6),
+        (r"\b(poem|story|joke|essay|email|letter|caption|haiku|lyrics)\b", 0.5),
+        (r"\b(fix|debug|refactor|optimi[sz]e) (this|my|the) (code|function|query|script)\b", 0.7),
+        (r"\b(solve|calculate|compute|prove|derive|simplify)\b", 0.5),
+        (r"\b(explain|continue|elaborate|expand on) (this|that|it|above)\b", 0.6)
+    ]
+}
+
+THRESHOLDS = {
+    "image": 0.7,
+    "identity": 0.8,
+    "search_needed": 0.5,
+    "no_search": 0.5
+}
+
+_COMPILED = {
+    name: [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in patterns]
+    for name, patterns in INTENT_PATTERNS.items()
+}
+
+# --------------------------------------------------
+# CLASSIFIER
+# --------------------------------------------------
+
+def score(text):
+    """
+    Noisy-OR of matching positive weights, minus matching vetoes.
+    Returns {intent: confidence in [0, 1]}.
+    """
+
+    scores = {}
+
+    for name, patterns in _COMPILED.items():
+        miss = 1.0
+        veto = 0.0
+
+        for pattern, weight in patterns:
+            if pattern.search(text):
+                if weight > 0:
+                    miss *= 1.0 - weight
+                else:
+                    veto = max(veto, -weight)
+
+        scores[name] = round(max(0.0, (1.0 - miss) - veto), 3)
+
+    return scores
+
+
+def classify(message):
+    """
+    {
+      "intent": "identity" | "image" | "chat",
+      "search": True | False | None,   # None = no opinion
+      "scores": {...}
+    }
+    """
+
+    text = message if isinstance(message, str) else ""
+    scores = score(text)
+
+    if scores["identity"] >= THRESHOLDS["identity"]:
+        primary = "identity"
+    elif scores["image"] >= THRESHOLDS["image"]:
+        primary = "image"
+    else:
+        primary = "chat"
+
+    need = scores["search_needed"]
+    skip = scores["no_search"]
+
+    if need >= THRESHOLDS["search_needed"] and need >= skip:
+        search = True
+    elif skip >= THRESHOLDS["no_search"]:
+        search = False
+    else:
+        search = None
+
+    return {
+        "intent": primary,
+        "search": search,
+        "scores": scores
+    }
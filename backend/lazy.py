@@ -0,0 +1,96 @@
+# lazy.py — Dynamo AI (LAZY IMPORTS + STARTUP PROFILE)
+# Heavy subsystems load on first use of their route
+
+import sys
+import time
+import importlib
+import threading
+
+# --------------------------------------------------
+# IMPORT TIMINGS
+# --------------------------------------------------
+
+IMPORT_TIMES = {}        # module -> ms spent on its first import
+_lock = threading.Lock()
+
+
+def load(name):
+    """
+    Imports a module once and records how long it took
+    (including everything it pulls in).
+    """
+
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    with _lock:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        IMPORT_TIMES[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    return module
+
+
+class LazyModule:
+    """
+    Stand-in that imports the real module on first attribute access.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = load(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def module(name):
+    return LazyModule(name)
+
+# --------------------------------------------------
+# BACKGROUND PRE-WARM
+# --------------------------------------------------
+
+def prewarm(names, hooks=()):
+    """
+    Imports modules, then runs warm-up hooks. Blocking; meant to
+    run in a worker thread once the server is accepting traffic.
+    """
+
+    for name in names:
+        try:
+            load(name)
+        except Exception as e:
+            print("Pre-warm import failed:", name, e)
+
+    for hook in hooks:
+        try:
+            hook()
+        except Exception as e:
+            print("Pre-warm hook failed:", e)
+
+
+def startup_report(process_started=None):
+    report = {
+        "modules_ms": dict(sorted(IMPORT_TIMES.items(), key=lambda kv: -kv[1])),
+        "loaded": sorted(IMPORT_TIMES)
+    }
+
+    if process_started is not None:
+        report["uptime_s"] = round(time.time() - process_started, 1)
+
+    return report
@@ -1,28 +1,86 @@
 # app_main.py — Dynamo AI Central Router (FINAL, CLEAN)
 
-from fastapi import FastAPI, UploadFile, File
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, UploadFile, File, Form, HTTPException, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from pydantic import BaseModel
+from typing import Optional, List
+from fastapi.responses import StreamingResponse, Response
 import uvicorn
+import asyncio
+import time
 import os
 
+PROCESS_STARTED = time.time()
+
 import config
+import lazy
+import auth
+import admission
+import resilience
+import telemetry
+import intent
 import model
+import providers
 import search
-import image
-import voice
-import analysis
-import export
+import search_gate
 import supabase_client
+import memory
+import sessions
 
 from export_routes import router as export_router
-from presentation_engine import build_presentation
+
+# Heavy subsystems (pandas, matplotlib, pptx, reportlab, edge_tts, ...)
+# load on first use of their route, or in the background pre-warm.
+image = lazy.module("image")
+voice = lazy.module("voice")
+analysis = lazy.module("analysis")
+batch = lazy.module("batch")
+presentation_engine = lazy.module("presentation_engine")
+
+PREWARM_MODULES = (
+    "analysis",
+    "presentation_engine",
+    "export",
+    "voice",
+    "image"
+)
 
 # --------------------------------------------------
 # FASTAPI APP
 # --------------------------------------------------
 
-app = FastAPI(title="Dynamo AI Hub")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    supabase_client.start_writer()
+
+    # Accept traffic immediately; warm models + heavy imports behind it
+    prewarm_task = None
+    if config.PREWARM:
+        prewarm_task = asyncio.create_task(_prewarm())
+
+    yield
+
+    if prewarm_task and not prewarm_task.done():
+        prewarm_task.cancel()
+
+    if "batch" in lazy.IMPORT_TIMES:
+        batch.shutdown()
+    # Drain buffered message writes before the process exits
+    await asyncio.to_thread(supabase_client.shutdown)
+
+
+async def _prewarm():
+    await asyncio.sleep(config.PREWARM_DELAY)
+    await asyncio.to_thread(
+        lazy.prewarm,
+        PREWARM_MODULES,
+        (model.warm, supabase_client.get_client, search.get_client)
+    )
+
+
+app = FastAPI(title="Dynamo AI Hub", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,6 +89,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Admission first so telemetry (outermost) also sees shed requests;
+# the request deadline starts before any queueing
+app.middleware("http")(admission.middleware)
+app.middleware("http")(resilience.middleware)
+app.middleware("http")(telemetry.middleware)
+
+# Outermost: the real client address (per-IP limits for anonymous
+# callers) whichever way the app is launched
+app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=config.FORWARDED_ALLOW_IPS)
+
 app.include_router(export_router)
 
 # --------------------------------------------------
@@ -40,6 +108,7 @@ app.include_router(export_router)
 class ChatReq(BaseModel):
     message: str
     history: list = []
+    chat_id: Optional[str] = None   # server-side history when set
     use_search: bool = True
     deep_dive: bool = False
     model: str = "gemini-2.0-flash"
@@ -53,63 +122,223 @@ async def health():
     return {
         "status": "online",
         "identity": "Dynamo AI",
+        "providers": providers.health(),
+        "search_gate": search_gate.stats(),
+        "admission": admission.stats(),
+        "circuits": resilience.stats(),
         "audio": {
             "read_aloud": True,
             "radio_mode": True,
-            "export": True
+            "export": True,
+            "prefetch": voice.prefetch_stats() if config.SPECULATIVE_TTS else None
         }
     }
 
+@app.get("/metrics")
+async def metrics():
+    return telemetry.metrics_response()
+
+@app.get("/debug/startup")
+async def startup_profile():
+    """
+    Import time per lazily loaded subsystem.
+    """
+    return lazy.startup_report(PROCESS_STARTED)
+
 # --------------------------------------------------
 # CHAT
 # --------------------------------------------------
 
 @app.post("/chat")
-async def chat(req: ChatReq):
-    msg_lower = req.message.lower()
-
-    IMAGE_KEYWORDS = [
-        "create an image",
-        "generate an image",
-        "create image",
-        "generate image",
-        "draw",
-        "picture",
-        "illustration",
-        "visual"
-    ]
+async def chat(req: ChatReq, request: Request):
+    # 🧭 Intent (local, before any I/O)
+    routed = intent.classify(req.message)
+
+    if routed["intent"] == "identity":
+        return {
+            "type": "text",
+            "content": config.DYNAMO_IDENTITY
+        }
 
     # 🖼 Image
-    if any(k in msg_lower for k in IMAGE_KEYWORDS):
+    if routed["intent"] == "image":
         return await image.generate_image_base64(req.message)
 
-    # 🔍 Search
+    # 🔐 Server-side chat state belongs to the signed-in owner only;
+    # another user's chat is a 404, like the history routes
+    if req.chat_id:
+        user_id = await auth.current_user(request)
+        if not await auth.owns_chat(user_id, req.chat_id):
+            raise HTTPException(status_code=404, detail="Chat not found")
+
+    # 🔍 Search (gated: only when the message needs fresh / external facts)
     context = ""
     if req.use_search:
-        context = search.get_web_context(req.message, req.deep_dive)
+        context = await asyncio.to_thread(
+            search.gated_context, req.message, req.chat_id, routed, req.deep_dive
+        )
 
-    # 🧠 AI
-    response = model.get_ai_response(
+    # 🧠 Memory (server-side when chat_id is given)
+    history = req.history
+    summary = ""
+    chat_mem = None
+
+    if req.chat_id:
+        chat_mem = await asyncio.to_thread(memory.load, req.chat_id)
+        history = chat_mem.history()
+        summary = chat_mem.summary()
+
+    # 🧠 AI (blocking SDK calls; keep them off the event loop)
+    response, usage = await asyncio.to_thread(
+        model.generate_response,
         prompt=req.message,
-        history=req.history,
+        history=history,
         model_name=req.model,
         context=context,
-        deep_dive=req.deep_dive
+        deep_dive=req.deep_dive,
+        summary=summary
     )
 
+    # The outage fallback text is not a turn worth remembering
+    if chat_mem is not None and "provider" in usage:
+        await asyncio.to_thread(
+            memory.remember_turn, req.chat_id, req.message, response
+        )
+
+    # Speculative read-aloud (opt-in); skipped for the outage fallback
+    if config.SPECULATIVE_TTS and "provider" in usage:
+        voice.prefetch(response, owner=req.chat_id or await admission.user_key(request))
+
     return {
         "type": "text",
-        "content": response
+        "content": response,
+        "prompt_tokens": usage
     }
 
+# --------------------------------------------------
+# SESSION (WEBSOCKET)
+# --------------------------------------------------
+
+@app.websocket("/ws")
+async def session(websocket: WebSocket):
+    """
+    Persistent session: chat turns with token streaming, analysis
+    and TTS jobs with progress events, artifacts pushed when ready.
+    Protocol is documented in sessions.py.
+    """
+    await sessions.serve(websocket)
+
+# --------------------------------------------------
+# CHAT HISTORY (KEYSET PAGINATED)
+# --------------------------------------------------
+
+# Both routes act for the signed-in user only (Firebase ID token in
+# "Authorization: Bearer ..."); another user's chat is a 404.
+
+async def _page(fetch, *args):
+    try:
+        return await asyncio.to_thread(fetch, *args)
+    except supabase_client.InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@app.get("/chats")
+async def list_chats(request: Request, cursor: Optional[str] = None, limit: int = 30):
+    user_id = await auth.current_user(request)
+    return await _page(supabase_client.list_user_chats, user_id, limit, cursor)
+
+
+@app.get("/chats/{chat_id}/messages")
+async def list_messages(request: Request, chat_id: str,
+                        cursor: Optional[str] = None, limit: int = 50):
+    user_id = await auth.current_user(request)
+    if not await auth.owns_chat(user_id, chat_id):
+        raise HTTPException(status_code=404, detail="Chat not found")
+
+    return await _page(supabase_client.fetch_chat_messages, chat_id, limit, cursor)
+
 # --------------------------------------------------
 # FILE ANALYSIS
 # --------------------------------------------------
 
 @app.post("/analyze-data")
-async def analyze_data(file: UploadFile = File(...)):
-    contents = await file.read()
-    return analysis.process_file_universally(contents, file.filename)
+async def analyze_data(
+    file: Optional[UploadFile] = File(None),
+    files: Optional[List[UploadFile]] = File(None),
+    sheet: Optional[str] = Form(None),
+    columns: Optional[str] = Form(None)
+):
+    """
+    One file as before, or several images in "files" that are
+    described together in a single vision call. For workbooks,
+    "sheet" and comma-separated "columns" limit what is read.
+    """
+    uploads = ([file] if file else []) + (files or [])
+
+    if not uploads:
+        raise HTTPException(status_code=400, detail="No file provided")
+
+    if len(uploads) == 1:
+        contents = await uploads[0].read()
+        return await asyncio.to_thread(
+            analysis.process_file_universally,
+            contents,
+            uploads[0].filename,
+            sheet=sheet,
+            columns=columns.split(",") if columns else None
+        )
+
+    names = [(u.filename or "").lower() for u in uploads]
+    if not all(n.endswith(analysis.IMAGE_EXTENSIONS) for n in names):
+        raise HTTPException(
+            status_code=400,
+            detail="Multiple files are only supported for images; use /analyze-batch"
+        )
+
+    images = [(u.filename, await u.read()) for u in uploads]
+    return await asyncio.to_thread(analysis.analyze_images, images)
+
+
+@app.get("/uploads/{upload_id}/thumbnails/{index}")
+async def upload_thumbnail(upload_id: str, index: int):
+    found = analysis.get_thumbnail(upload_id, index)
+    if not found:
+        raise HTTPException(status_code=404, detail="Thumbnail expired or not found")
+
+    data, mime = found
+    return Response(
+        content=data,
+        media_type=mime,
+        headers={"Cache-Control": "private, max-age=900"}
+    )
+
+
+@app.get("/images/{image_id}")
+async def generated_image(image_id: str):
+    found = image.get_image(image_id)
+    if not found:
+        raise HTTPException(status_code=404, detail="Image expired or not found")
+
+    data, mime = found
+    return Response(
+        content=data,
+        media_type=mime,
+        headers={"Cache-Control": "private, max-age=900"}
+    )
+
+
+@app.post("/analyze-batch")
+async def analyze_batch(files: List[UploadFile] = File(...)):
+    """
+    Many files (or ZIPs) analyzed in parallel across a process pool.
+    Streams one NDJSON line per file as it finishes, then a summary.
+    """
+    uploads = [(f.filename or "upload", await f.read()) for f in files]
+
+    return StreamingResponse(
+        batch.stream(uploads),
+        media_type="application/x-ndjson"
+    )
 
 # --------------------------------------------------
 # PPT
@@ -117,7 +346,22 @@ async def analyze_data(file: UploadFile = File(...)):
 
 @app.post("/generate-ppt-smart")
 async def generate_ppt(payload: dict):
-    return build_presentation(payload)
+    """
+    Accepts a full slide schema, or an "upload_id" from /analyze-data
+    so charts are built from the already-parsed columns.
+    """
+    upload_id = payload.get("upload_id")
+
+    if upload_id:
+        upload = await asyncio.to_thread(analysis.get_upload, upload_id)
+        if not upload:
+            raise HTTPException(
+                status_code=404,
+                detail="Upload expired or not found"
+            )
+        payload = await asyncio.to_thread(analysis.deck_from_upload, upload, payload)
+
+    return await asyncio.to_thread(presentation_engine.build_presentation, payload)
 
 # --------------------------------------------------
 # 🔊 READ-ALOUD / STREAM
@@ -147,10 +391,13 @@ async def export_audio(req: ChatReq):
 # SERVER
 # --------------------------------------------------
 
+# Single process for local runs; production uses serve.py
+# (one preloaded worker per core, shared state, graceful drain).
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     uvicorn.run(
-        "app_main:app",
+        "main:app",
         host="0.0.0.0",
         port=port,
         reload=False
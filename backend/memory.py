@@ -0,0 +1,151 @@
+# memory.py — Dynamo AI (SERVER-SIDE CONVERSATION MEMORY)
+# Recent turns per chat_id + rolling summary of older turns
+
+import threading
+from collections import deque
+
+import supabase_client
+from prompt_builder import gist
+import cache
+
+# --------------------------------------------------
+# LIMITS
+# --------------------------------------------------
+
+RECENT_TURNS = 8            # verbatim turns sent with each prompt
+SUMMARY_MAX_CHARS = 1500    # rolling summary stays this size forever
+SUMMARY_LINE_CHARS = 160    # per folded turn
+HISTORY_LOAD_LIMIT = 50     # rows pulled from Supabase on a cache miss
+
+# --------------------------------------------------
+# CHAT MEMORY
+# --------------------------------------------------
+
+class ChatMemory:
+    """
+    Keeps the last RECENT_TURNS messages verbatim. Older turns are
+    folded one at a time into a bounded extractive summary, so
+    prompt size stays constant however long the chat gets.
+    """
+
+    def __init__(self):
+        self.recent = deque()
+        self.summary_lines = deque()
+        self.summary_chars = 0
+        self.lock = threading.Lock()
+
+    def add(self, role, content):
+        if role not in ("user", "assistant") or not isinstance(content, str):
+            return
+
+        with self.lock:
+            self.recent.append({"role": role, "content": content})
+
+            while len(self.recent) > RECENT_TURNS:
+                self._fold(self.recent.popleft())
+
+    def _fold(self, m):
+        first = gist(m["content"], SUMMARY_LINE_CHARS)
+
+        if not first:
+            return
+
+        line = f"- {m['role'].upper()}: {first}"
+        self.summary_lines.append(line)
+        self.summary_chars += len(line) + 1
+
+        while self.summary_chars > SUMMARY_MAX_CHARS and self.summary_lines:
+            self.summary_chars -= len(self.summary_lines.popleft()) + 1
+
+    def __getstate__(self):
+        # Picklable for the shared (multi-worker) cache
+        with self.lock:
+            state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def history(self):
+        with self.lock:
+            return list(self.recent)
+
+    def summary(self):
+        with self.lock:
+            return "\n".join(self.summary_lines)
+
+
+_CHATS = cache.shared(maxsize=1024, name="chat_memory")
+
+# --------------------------------------------------
+# LOAD / UPDATE
+# --------------------------------------------------
+
+def _hydrate(chat_id):
+    mem = ChatMemory()
+
+    page = supabase_client.fetch_chat_messages(chat_id, limit=HISTORY_LOAD_LIMIT)
+
+    for row in page["items"]:
+        if row.get("content_type", "text") == "text":
+            mem.add(row.get("role"), row.get("content"))
+
+    return mem
+
+
+def load(chat_id):
+    """
+    Returns the ChatMemory for a chat, hydrating it from
+    Supabase on a cache miss. Blocking; call off the event loop.
+    """
+
+    mem = _CHATS.get(chat_id)
+    if mem is not None:
+        return mem
+
+    mem = _hydrate(chat_id)
+    _CHATS.set(chat_id, mem)
+    return mem
+
+
+class _NotCached(Exception):
+    pass
+
+
+def _not_cached():
+    raise _NotCached
+
+
+def remember_turn(chat_id, user_message, answer, persist=True):
+    """
+    Appends a completed turn to memory and queues it for persistence.
+    Returns the updated ChatMemory.
+    """
+
+    def add_turn(mem):
+        mem.add("user", user_message)
+        mem.add("assistant", answer)
+        return mem
+
+    # One read-modify-write: concurrent turns (other sessions or
+    # workers) can no longer overwrite each other's additions.
+    # Hydrating is a Supabase call, so it never runs inside update
+    # (the SQLite write lock): on a miss, back out, hydrate, retry.
+    # A copy stored meanwhile by another turn wins over the seed.
+    try:
+        mem = _CHATS.update(chat_id, add_turn, _not_cached)
+    except _NotCached:
+        seed = _hydrate(chat_id)
+        mem = _CHATS.update(chat_id, add_turn, lambda: seed)
+
+    if persist:
+        supabase_client.queue_message(chat_id, "user", user_message)
+        supabase_client.queue_message(chat_id, "assistant", answer)
+
+    return mem
+
+
+def forget(chat_id):
+    _CHATS.pop(chat_id)
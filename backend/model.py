@@ -1,18 +1,48 @@
 # model.py — Dynamo AI (FINAL)
 # Gemini default for Fast + Research (DeepThink v3)
 
-import google.generativeai as genai
 import config
+import prompt_builder
+import providers
+import resilience
+import telemetry
 
 # --------------------------------------------------
-# CLIENT INIT
+# SYSTEM PROMPTS (SENT AS SYSTEM INSTRUCTIONS)
 # --------------------------------------------------
 
-try:
-    if config.GEMINI_KEY:
-        genai.configure(api_key=config.GEMINI_KEY)
-except Exception as e:
-    print("Gemini Init Error:", e)
+BASE_SYSTEM_PROMPT = (
+    "You are Dynamo AI, an advanced research and reasoning system. "
+    + config.DYNAMO_IDENTITY +
+    " Respond in clear Markdown. Be precise, factual, and structured."
+)
+
+# DeepThink v3 (adaptive)
+DEEP_DIVE_SYSTEM_PROMPT = BASE_SYSTEM_PROMPT + (
+    "\n\nDeepThink v3 is enabled.\n"
+    "Adapt your depth based on complexity.\n"
+    "Always respond in this structure:\n"
+    "## Executive Summary\n"
+    "## Core Concepts\n"
+    "## Deep Technical Analysis\n"
+    "## Real-world Applications\n"
+    "## Key Takeaways\n"
+    "\nWhen useful, think in terms of slide sections."
+)
+
+# Sent when every provider failed; usage then has no "provider"
+# (complete) or has "fallback": True (stream)
+FALLBACK_TEXT = "Dynamo AI engines are temporarily unavailable. Please try again shortly."
+
+
+def warm():
+    """
+    Pre-builds the model clients for both system prompts, opens
+    upstream connections and loads the tokenizer. Called from the
+    app lifespan.
+    """
+    prompt_builder.tokenizer_name()
+    providers.warm((BASE_SYSTEM_PROMPT, DEEP_DIVE_SYSTEM_PROMPT))
 
 # --------------------------------------------------
 # HISTORY NORMALIZER
@@ -39,66 +69,79 @@ def normalize_history(history):
 # CORE AI ROUTER
 # --------------------------------------------------
 
-def get_ai_response(prompt, history, model_name, context="", deep_dive=False):
-    msg_lower = prompt.lower()
+def get_ai_response(prompt, history, model_name, context="", deep_dive=False, summary=""):
+    text, _ = generate_response(prompt, history, model_name, context, deep_dive, summary)
+    return text
 
-    # -------------------------
-    # IDENTITY GUARD
-    # -------------------------
-    if any(q in msg_lower for q in (
-        "who are you",
-        "your name",
-        "what is your name",
-        "who made you"
-    )):
-        return config.DYNAMO_IDENTITY
 
+def _prompt(prompt, history, context, deep_dive, summary):
+    """
+    Returns (system prompt, token-budgeted prompt, usage report).
+    """
     history = normalize_history(history)
 
-    # -------------------------
-    # SYSTEM PROMPT (BASE)
-    # -------------------------
-    sys_prompt = (
-        "You are Dynamo AI, an advanced research and reasoning system. "
-        + config.DYNAMO_IDENTITY +
-        " Respond in clear Markdown. Be precise, factual, and structured."
-    )
-
-    # -------------------------
-    # DEEPTHINK v3 (ADAPTIVE)
-    # -------------------------
-    if deep_dive:
-        sys_prompt += (
-            "\n\nDeepThink v3 is enabled.\n"
-            "Adapt your depth based on complexity.\n"
-            "Always respond in this structure:\n"
-            "## Executive Summary\n"
-            "## Core Concepts\n"
-            "## Deep Technical Analysis\n"
-            "## Real-world Applications\n"
-            "## Key Takeaways\n"
-            "\nWhen useful, think in terms of slide sections."
+    sys_prompt = DEEP_DIVE_SYSTEM_PROMPT if deep_dive else BASE_SYSTEM_PROMPT
+
+    full_prompt, usage = prompt_builder.build_prompt(
+        system=sys_prompt,
+        user=prompt,
+        history=history,
+        context=context,
+        summary=summary,
+        include_system=False,
+        budget=(
+            prompt_builder.DEEP_DIVE_BUDGET if deep_dive
+            else prompt_builder.DEFAULT_BUDGET
         )
+    )
 
-    # -------------------------
-    # FULL PROMPT
-    # -------------------------
-    full_prompt = sys_prompt
-
-    if context:
-        full_prompt += "\n\nResearch Context:\n" + context
+    return sys_prompt, full_prompt, usage
 
-    for m in history:
-        full_prompt += f"\n\n{m['role'].upper()}: {m['content']}"
 
-    full_prompt += "\n\nUSER: " + prompt + "\nASSISTANT:"
+@telemetry.traced("model")
+def generate_response(prompt, history, model_name, context="", deep_dive=False, summary=""):
+    """
+    Same as get_ai_response but also returns the prompt token report.
+    """
+    sys_prompt, full_prompt, usage = _prompt(prompt, history, context, deep_dive, summary)
 
     # -------------------------
-    # GEMINI EXECUTION
+    # ROUTED EXECUTION (FAILOVER / HEDGING)
     # -------------------------
     try:
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        response = model.generate_content(full_prompt)
-        return response.text
+        text, provider, used_model = providers.complete(
+            model_name or "gemini-2.0-flash",
+            full_prompt,
+            system=sys_prompt,
+            # Deep dives are long by design; racing them only doubles cost
+            hedge=config.HEDGE_REQUESTS and not deep_dive
+        )
+        usage["provider"] = provider
+        usage["model"] = used_model
+        return text, usage
     except Exception as e:
-        return "Gemini Engine Error: " + str(e)
+        print("Model Router Error:", e)
+        return FALLBACK_TEXT, usage
+
+
+def stream_response(prompt, history, model_name, context="", deep_dive=False, summary=""):
+    """
+    Returns (chunks, usage): a blocking iterator of answer text plus
+    the prompt token report. No hedging; failover happens only
+    before the first chunk.
+    """
+    sys_prompt, full_prompt, usage = _prompt(prompt, history, context, deep_dive, summary)
+
+    def chunks():
+        try:
+            yield from providers.stream(
+                model_name or "gemini-2.0-flash",
+                full_prompt,
+                system=sys_prompt
+            )
+        except (providers.ProviderError, resilience.DeadlineExceeded) as e:
+            print("Model Router Error:", e)
+            usage["fallback"] = True
+            yield FALLBACK_TEXT
+
+    return chunks(), usage
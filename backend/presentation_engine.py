@@ -2,12 +2,19 @@
 # Builds real PPT from AI JSON schema
 
 import io
+import os
+import copy
+import numpy as np
 from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN
-from pptx.chart.data import ChartData
-from pptx.enum.chart import XL_CHART_TYPE
+from pptx.util import Inches
+from pptx.dml.color import RGBColor
+from pptx.chart.data import CategoryChartData, XyChartData
+from pptx.enum.chart import XL_CHART_TYPE, XL_LEGEND_POSITION
+from pptx.opc.packuri import PackURI
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls
 from fastapi.responses import StreamingResponse
+import telemetry
 
 # --------------------------------------------------
 # THEMES
@@ -15,69 +22,460 @@ from fastapi.responses import StreamingResponse
 
 THEMES = {
     "light": {
-        "bg": None,
+        "bg": "FFFFFF",
+        "title_color": "111827",
+        "body_color": "374151",
         "title_size": 40,
         "body_size": 20
     },
     "dark": {
-        "bg": None,
+        "bg": "111827",
+        "title_color": "F9FAFB",
+        "body_color": "D1D5DB",
         "title_size": 40,
         "body_size": 20
     },
     "executive": {
-        "bg": None,
+        "bg": "0F172A",
+        "title_color": "EAB308",
+        "body_color": "E2E8F0",
         "title_size": 44,
         "body_size": 22
     }
 }
 
+# Optional real masters: templates/<theme>.pptx overrides the generated one
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# Layout roles -> names used by the default python-pptx master
+LAYOUT_NAMES = {
+    "title": "Title Slide",
+    "content": "Title and Content",
+    "title_only": "Title Only"
+}
+
+# Fallback indices when a custom master renames its layouts
+LAYOUT_FALLBACK = {
+    "title": 0,
+    "content": 1,
+    "title_only": 5
+}
+
 # --------------------------------------------------
-# PRESENTATION BUILDER
+# TEMPLATE CACHE (BUILT ONCE AT STARTUP)
 # --------------------------------------------------
+# Theme masters are read / styled and their layouts resolved once.
+# Each request still opens its own copy from the serialized bytes:
+# python-pptx has no cheap way to clone a parsed Presentation. This
+# saves well under a millisecond per deck; large decks are dominated
+# by per-slide and per-chart work (see _track_partnames / _font).
 
-def build_presentation(payload: dict):
+_TEMPLATES = {}
+
+
+def _load_template(theme, style):
     """
-    Expected payload:
-    {
-      "title": "Topic",
-      "theme": "executive",
-      "slides": [
-        {
-          "type": "content",
-          "heading": "...",
-          "bullets": [...]
-        },
-        {
-          "type": "chart",
-          "heading": "...",
-          "chart": {
-            "kind": "bar",
-            "labels": [],
-            "values": []
-          }
-        }
-      ]
+    Returns (pptx_bytes, layout_index_map) for a theme.
+    Uses templates/<theme>.pptx when present, otherwise
+    bakes the theme background into the default master.
+    """
+
+    path = os.path.join(TEMPLATE_DIR, f"{theme}.pptx")
+
+    if os.path.exists(path):
+        prs = Presentation(path)
+    else:
+        prs = Presentation()
+
+        if style.get("bg"):
+            fill = prs.slide_master.background.fill
+            fill.solid()
+            fill.fore_color.rgb = RGBColor.from_string(style["bg"])
+
+    by_name = {
+        layout.name: i
+        for i, layout in enumerate(prs.slide_layouts)
     }
+    total = len(prs.slide_layouts)
+
+    layouts = {}
+    for role, name in LAYOUT_NAMES.items():
+        idx = by_name.get(name, LAYOUT_FALLBACK[role])
+        layouts[role] = idx if idx < total else 0
+
+    buf = io.BytesIO()
+    prs.save(buf)
+
+    return buf.getvalue(), layouts
+
+
+def _init_templates():
+    for theme, style in THEMES.items():
+        try:
+            _TEMPLATES[theme] = _load_template(theme, style)
+        except Exception as e:
+            print("Template Load Error:", theme, e)
+
+
+def _new_presentation(theme):
+    """
+    Opens a fresh copy of a theme's prepared master from memory
+    (no disk read, no restyling, no layout lookup).
+    """
+
+    cached = _TEMPLATES.get(theme) or _TEMPLATES.get("light")
+
+    if not cached:
+        return Presentation(), dict(LAYOUT_FALLBACK)
+
+    template_bytes, layouts = cached
+    return Presentation(io.BytesIO(template_bytes)), layouts
+
+
+def _track_partnames(prs):
+    """
+    python-pptx names every new chart part and embedded workbook by
+    walking all parts in the package, so chart-heavy decks build in
+    quadratic time. Walk once, then hand out names from a set.
+    """
+    package = prs.part.package
+    taken = {str(part.partname) for part in package.iter_parts()}
+
+    def next_partname(tmpl):
+        n = 1
+        while tmpl % n in taken:
+            n += 1
+        taken.add(tmpl % n)
+        return PackURI(tmpl % n)
+
+    package.next_partname = next_partname
+
+
+_init_templates()
+
+# --------------------------------------------------
+# STYLE HELPERS
+# --------------------------------------------------
+
+def _font(size=None, color=None):
+    """
+    A paragraph font (<a:defRPr>) built once per deck. Copying it
+    into each paragraph replaces python-pptx's font.size / font.color
+    setters and their per-paragraph XPath lookups.
+    """
+    size_attr = f' sz="{int(size * 100)}"' if size else ""
+    fill = f'<a:solidFill><a:srgbClr val="{color}"/></a:solidFill>' if color else ""
+    return parse_xml(f'<a:defRPr {nsdecls("a")}{size_attr}>{fill}</a:defRPr>')
+
+
+def _apply_font(paragraph, font):
+    pPr = paragraph._p.get_or_add_pPr()
+    pPr._remove_defRPr()
+    pPr._insert_defRPr(copy.deepcopy(font))
+
+
+def _style_title(slide, text, font):
+    title = slide.shapes.title
+    title.text = text
+    _apply_font(title.text_frame.paragraphs[0], font)
+
+# --------------------------------------------------
+# CHARTS
+# --------------------------------------------------
+
+# kind -> (single-series type, multi-series type, family)
+CHART_TYPES = {
+    "bar": (XL_CHART_TYPE.COLUMN_CLUSTERED, XL_CHART_TYPE.COLUMN_CLUSTERED, "category"),
+    "column": (XL_CHART_TYPE.COLUMN_CLUSTERED, XL_CHART_TYPE.COLUMN_CLUSTERED, "category"),
+    "hbar": (XL_CHART_TYPE.BAR_CLUSTERED, XL_CHART_TYPE.BAR_CLUSTERED, "category"),
+    "stacked": (XL_CHART_TYPE.COLUMN_STACKED, XL_CHART_TYPE.COLUMN_STACKED, "category"),
+    "line": (XL_CHART_TYPE.LINE_MARKERS, XL_CHART_TYPE.LINE_MARKERS, "category"),
+    "area": (XL_CHART_TYPE.AREA, XL_CHART_TYPE.AREA, "category"),
+    "pie": (XL_CHART_TYPE.PIE, XL_CHART_TYPE.PIE, "pie"),
+    "doughnut": (XL_CHART_TYPE.DOUGHNUT, XL_CHART_TYPE.DOUGHNUT, "pie"),
+    "scatter": (XL_CHART_TYPE.XY_SCATTER, XL_CHART_TYPE.XY_SCATTER, "xy")
+}
+
+# Point caps before aggregation / downsampling kicks in
+MAX_POINTS = {
+    "category": 60,
+    "line": 240,
+    "pie": 8,
+    "xy": 1000
+}
+
+# Past this many points markers just become noise
+LINE_MARKER_LIMIT = 40
+
+
+def _to_array(values):
+    """
+    Coerces a list (or ndarray) into a float ndarray.
+    Non-numeric entries become NaN.
+    """
+
+    try:
+        return np.asarray(values, dtype=float).ravel()
+    except (TypeError, ValueError):
+        out = np.empty(len(values), dtype=float)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except (TypeError, ValueError):
+                out[i] = np.nan
+        return out
+
+
+def _bucket_edges(n, max_points):
+    return np.linspace(0, n, max_points + 1).astype(int)
+
+
+def _aggregate(labels, series, max_points, agg="mean"):
+    """
+    Collapses long category axes into max_points buckets.
+    All series are reduced together with np.add.reduceat.
+    """
+
+    n = len(labels)
+    if n <= max_points:
+        return labels, series
+
+    edges = _bucket_edges(n, max_points)
+    starts = edges[:-1]
+    ends = edges[1:]
+
+    new_labels = [
+        str(labels[a]) if b - a == 1 else f"{labels[a]} – {labels[b - 1]}"
+        for a, b in zip(starts, ends)
+    ]
+
+    reduced = []
+    for name, arr in series:
+        valid = ~np.isnan(arr)
+        sums = np.add.reduceat(np.where(valid, arr, 0.0), starts)
+
+        if agg == "sum":
+            out = sums
+        elif agg == "max":
+            out = np.maximum.reduceat(np.where(valid, arr, -np.inf), starts)
+            out[np.isneginf(out)] = np.nan
+        else:
+            counts = np.add.reduceat(valid.astype(int), starts)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out = sums / counts
+
+        reduced.append((name, out))
+
+    return new_labels, reduced
+
+
+def _top_slices(labels, arr, max_slices):
+    """
+    Keeps the largest pie slices and folds the rest into "Other".
+    """
+
+    arr = np.nan_to_num(arr, nan=0.0)
+    if len(labels) <= max_slices:
+        return labels, arr
+
+    order = np.argsort(arr)[::-1]
+    keep = np.sort(order[:max_slices - 1])
+    rest = order[max_slices - 1:]
+
+    new_labels = [labels[i] for i in keep] + ["Other"]
+    new_values = np.append(arr[keep], arr[rest].sum())
+
+    return new_labels, new_values
+
+
+def _downsample_xy(x, y, max_points):
+    if len(x) <= max_points:
+        return x, y
+
+    idx = np.linspace(0, len(x) - 1, max_points).astype(int)
+    return x[idx], y[idx]
+
+
+def _py_values(arr):
+    # python-pptx writes values with str(); NaN must become an empty point
+    return np.where(np.isnan(arr), None, arr).tolist()
+
+
+def _collect_series(chart_info):
+    """
+    Accepts either a single "values" list or a "series" list of
+    {"name": ..., "values": [...]}. Returns [(name, ndarray), ...],
+    leaving out malformed and empty series (possibly all of them).
+    """
+
+    raw = chart_info.get("series")
+
+    if isinstance(raw, list) and raw:
+        candidates = [
+            (str(item.get("name") or f"Series {i + 1}"), item.get("values"))
+            for i, item in enumerate(raw)
+            if isinstance(item, dict)
+        ]
+    else:
+        candidates = [(str(chart_info.get("name") or "Series"), chart_info.get("values"))]
+
+    series = []
+    for name, values in candidates:
+        if isinstance(values, (list, tuple, np.ndarray)) and len(values):
+            series.append((name, _to_array(values)))
+    return series
+
+
+def build_chart_data(chart_info):
+    """
+    Turns a slide "chart" block into (XL_CHART_TYPE, chart_data, multi_series),
+    or None when it has no usable series. Long series are aggregated or
+    downsampled before they reach python-pptx.
+    """
+
+    kind = str(chart_info.get("kind", "bar")).lower()
+    single_type, multi_type, family = CHART_TYPES.get(kind, CHART_TYPES["bar"])
+
+    series = _collect_series(chart_info)
+    if not series:
+        return None
+    agg = chart_info.get("agg", "mean")
+
+    # -------------------------
+    # SCATTER (numeric X axis)
+    # -------------------------
+    if family == "xy":
+        x = chart_info.get("x")
+        x = _to_array(chart_info.get("labels", []) if x is None else x)
+        max_points = int(chart_info.get("max_points") or MAX_POINTS["xy"])
+
+        chart_data = XyChartData()
+        for name, y in series:
+            n = min(len(x), len(y))
+            xs, ys = _downsample_xy(x[:n], y[:n], max_points)
+            keep = ~(np.isnan(xs) | np.isnan(ys))
+
+            s = chart_data.add_series(name)
+            for xv, yv in zip(xs[keep].tolist(), ys[keep].tolist()):
+                s.add_data_point(xv, yv)
+
+        return single_type, chart_data, len(series) > 1
+
+    labels = list(chart_info.get("labels", []))
+    if len(labels) == 0:
+        longest = max((len(arr) for _, arr in series), default=0)
+        labels = [str(i + 1) for i in range(longest)]
+
+    n = len(labels)
+    series = [
+        (name, np.concatenate([arr[:n], np.full(max(0, n - len(arr)), np.nan)]))
+        for name, arr in series
+    ]
+
+    # -------------------------
+    # PIE / DOUGHNUT (one series)
+    # -------------------------
+    if family == "pie":
+        max_slices = int(chart_info.get("max_points") or MAX_POINTS["pie"])
+        name, arr = series[0]
+        labels, arr = _top_slices(labels, arr, max_slices)
+
+        chart_data = CategoryChartData()
+        chart_data.categories = [str(label) for label in labels]
+        chart_data.add_series(name, _py_values(arr))
+
+        return single_type, chart_data, False
+
+    # -------------------------
+    # CATEGORY (bar / line / area)
+    # -------------------------
+    default_cap = MAX_POINTS["line"] if kind in ("line", "area") else MAX_POINTS["category"]
+    max_points = int(chart_info.get("max_points") or default_cap)
+    labels, series = _aggregate(labels, series, max_points, agg)
+
+    chart_type = multi_type if len(series) > 1 else single_type
+    if chart_type == XL_CHART_TYPE.LINE_MARKERS and len(labels) > LINE_MARKER_LIMIT:
+        chart_type = XL_CHART_TYPE.LINE
+
+    chart_data = CategoryChartData()
+    chart_data.categories = [str(label) for label in labels]
+    for name, arr in series:
+        chart_data.add_series(name, _py_values(arr))
+
+    return chart_type, chart_data, len(series) > 1
+
+
+def add_chart(slide, chart_info):
+    built = build_chart_data(chart_info)
+
+    if built is None:
+        # Keep the slide (and the deck's numbering); say why it is blank
+        box = slide.shapes.add_textbox(Inches(1), Inches(3), Inches(8), Inches(1))
+        box.text_frame.text = "No chart data"
+        return None
+
+    chart_type, chart_data, multi_series = built
+
+    graphic = slide.shapes.add_chart(
+        chart_type,
+        Inches(1),
+        Inches(1.5),
+        Inches(8),
+        Inches(4),
+        chart_data
+    )
+
+    chart = graphic.chart
+    if multi_series or chart_type in (XL_CHART_TYPE.PIE, XL_CHART_TYPE.DOUGHNUT):
+        chart.has_legend = True
+        chart.legend.position = XL_LEGEND_POSITION.BOTTOM
+        chart.legend.include_in_layout = False
+
+    return chart
+
+# --------------------------------------------------
+# PRESENTATION BUILDER
+# --------------------------------------------------
+
+@telemetry.traced("presentation")
+def render_presentation(payload: dict):
+    """
+    Builds the deck and returns raw .pptx bytes.
     """
 
-    prs = Presentation()
     theme = payload.get("theme", "light")
-    style = THEMES.get(theme, THEMES["light"])
+    if theme not in THEMES:
+        theme = "light"
+
+    style = THEMES[theme]
+    title_font = _font(style["title_size"], style["title_color"])
+    body_font = _font(style["body_size"], style["body_color"])
+    subtitle_font = _font(color=style["body_color"])
+
+    prs, layout_idx = _new_presentation(theme)
+    _track_partnames(prs)
+    title_layout = prs.slide_layouts[layout_idx["title"]]
+    content_layout = prs.slide_layouts[layout_idx["content"]]
+    chart_layout = prs.slide_layouts[layout_idx["title_only"]]
 
     # -------------------------
     # TITLE SLIDE
     # -------------------------
-    slide = prs.slides.add_slide(prs.slide_layouts[0])
-    slide.shapes.title.text = payload.get("title", "Dynamo AI Presentation")
-    slide.placeholders[1].text = "Generated by Dynamo AI"
+    slide = prs.slides.add_slide(title_layout)
+    _style_title(slide, payload.get("title", "Dynamo AI Presentation"), title_font)
+
+    # Layout default is dark text; restyle for dark themes
+    subtitle = slide.placeholders[1]
+    subtitle.text = "Generated by Dynamo AI"
+    _apply_font(subtitle.text_frame.paragraphs[0], subtitle_font)
 
     # -------------------------
     # CONTENT SLIDES
     # -------------------------
     for s in payload.get("slides", []):
         if s.get("type") == "content":
-            slide = prs.slides.add_slide(prs.slide_layouts[1])
-            slide.shapes.title.text = s.get("heading", "")
+            slide = prs.slides.add_slide(content_layout)
+            _style_title(slide, s.get("heading", ""), title_font)
 
             body = slide.placeholders[1].text_frame
             body.clear()
@@ -85,36 +483,53 @@ def build_presentation(payload: dict):
             for bullet in s.get("bullets", []):
                 p = body.add_paragraph()
                 p.text = bullet
-                p.font.size = Pt(style["body_size"])
                 p.level = 1
+                _apply_font(p, body_font)
 
         elif s.get("type") == "chart":
-            slide = prs.slides.add_slide(prs.slide_layouts[5])
-            slide.shapes.title.text = s.get("heading", "")
-
-            chart_info = s.get("chart", {})
-            labels = chart_info.get("labels", [])
-            values = chart_info.get("values", [])
-
-            chart_data = ChartData()
-            chart_data.categories = labels
-            chart_data.add_series("Series", values)
-
-            slide.shapes.add_chart(
-                XL_CHART_TYPE.COLUMN_CLUSTERED,
-                Inches(1),
-                Inches(1.5),
-                Inches(8),
-                Inches(4),
-                chart_data
-            )
+            slide = prs.slides.add_slide(chart_layout)
+            _style_title(slide, s.get("heading", ""), title_font)
+
+            add_chart(slide, s.get("chart", {}))
+
+    buf = io.BytesIO()
+    prs.save(buf)
+    return buf.getvalue()
+
+
+def build_presentation(payload: dict):
+    """
+    Expected payload:
+    {
+      "title": "Topic",
+      "theme": "executive",
+      "slides": [
+        {
+          "type": "content",
+          "heading": "...",
+          "bullets": [...]
+        },
+        {
+          "type": "chart",
+          "heading": "...",
+          "chart": {
+            "kind": "bar | line | area | pie | doughnut | scatter | hbar | stacked",
+            "labels": [],
+            "values": [],
+            "series": [{"name": "...", "values": [...]}],  # optional, multi-series
+            "x": [],                                       # scatter only
+            "agg": "mean | sum | max",                      # optional
+            "max_points": 60                                # optional
+          }
+        }
+      ]
+    }
+    """
 
     # -------------------------
     # STREAM RESPONSE
     # -------------------------
-    buf = io.BytesIO()
-    prs.save(buf)
-    buf.seek(0)
+    buf = io.BytesIO(render_presentation(payload))
 
     return StreamingResponse(
         buf,
@@ -0,0 +1,255 @@
+# prompt_builder.py — Dynamo AI (TOKEN-BUDGETED PROMPT ASSEMBLY)
+# Fits system + context + history + user message into a fixed budget
+
+import os
+import re
+import threading
+
+# --------------------------------------------------
+# TOKENIZER (LOCAL)
+# --------------------------------------------------
+# tiktoken's cl100k_base is close enough to Gemini/Llama counts for
+# budgeting. Without it we fall back to a regex estimate.
+#
+# tiktoken downloads the BPE file on first use. It is read from the
+# vendored tiktoken_cache/ instead (fill it at build time with
+# `python prompt_builder.py`), and loaded by model.warm, not a request.
+
+TIKTOKEN_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tiktoken_cache")
+os.environ.setdefault("TIKTOKEN_CACHE_DIR", TIKTOKEN_CACHE_DIR)
+
+_ENCODING = None
+_ENCODING_LOADED = False
+_ENCODING_LOCK = threading.Lock()
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _encoding():
+    global _ENCODING, _ENCODING_LOADED
+
+    if not _ENCODING_LOADED:
+        with _ENCODING_LOCK:
+            if not _ENCODING_LOADED:
+                try:
+                    import tiktoken
+                    _ENCODING = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    print("Tokenizer fallback (approx):", e)
+                    _ENCODING = None
+                _ENCODING_LOADED = True
+
+    return _ENCODING
+
+
+def tokenizer_name():
+    return "tiktoken" if _encoding() else "approx"
+
+
+def count_tokens(text):
+    if not text:
+        return 0
+
+    enc = _encoding()
+    if enc:
+        return len(enc.encode(text, disallowed_special=()))
+
+    # ~4 chars per token for words, 1 per punctuation mark
+    total = 0
+    for m in _TOKEN_RE.finditer(text):
+        total += 1 + (len(m.group()) - 1) // 4
+    return total
+
+
+def truncate_tokens(text, max_tokens, keep_tail=0.0):
+    """
+    Cuts text to at most max_tokens. keep_tail is the share of the
+    budget kept from the end (useful for long pasted files whose
+    question is at the bottom).
+    """
+
+    if max_tokens <= 0:
+        return ""
+
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return text
+
+    marker = f"\n[... {total - max_tokens} tokens trimmed ...]\n"
+    budget = max(1, max_tokens - count_tokens(marker))
+
+    enc = _encoding()
+    if enc:
+        ids = enc.encode(text, disallowed_special=())
+        tail = int(budget * keep_tail)
+        head = budget - tail
+        return enc.decode(ids[:head]) + marker + (enc.decode(ids[-tail:]) if tail else "")
+
+    # Approximate: scale by chars-per-token, then tighten
+    ratio = len(text) / total
+    chars = int(budget * ratio)
+
+    for _ in range(4):
+        tail = int(chars * keep_tail)
+        head = chars - tail
+        out = text[:head] + marker + (text[-tail:] if tail else "")
+        if count_tokens(out) <= max_tokens:
+            return out
+        chars = int(chars * 0.9)
+
+    return out
+
+
+def gist(text, max_chars=160):
+    """
+    First sentence, whitespace-collapsed. Used to summarize turns
+    that no longer fit verbatim.
+    """
+
+    text = _WHITESPACE.sub(" ", text or "").strip()
+    return _SENTENCE_END.split(text, 1)[0][:max_chars]
+
+# --------------------------------------------------
+# BUDGETS
+# --------------------------------------------------
+
+DEFAULT_BUDGET = 12000      # input tokens per request
+DEEP_DIVE_BUDGET = 24000
+
+# Caps as a share of what is left after the system prompt
+USER_SHARE = 0.55
+CONTEXT_SHARE = 0.5
+SUMMARY_SHARE = 0.15
+HISTORY_TURN_CAP = 1200     # a single old turn never eats the history budget
+
+# --------------------------------------------------
+# ASSEMBLY
+# --------------------------------------------------
+
+def build_prompt(system, user, history=None, context="", summary="",
+                 budget=DEFAULT_BUDGET, include_system=True):
+    """
+    Returns (prompt_text, report).
+
+    Priority (highest first): system, user message, research context,
+    conversation summary, history. The system prompt is never trimmed;
+    history is dropped oldest-first and the dropped turns are folded
+    into the summary as one-line gists.
+    """
+
+    history = history or []
+    trimmed = []
+
+    system_t = count_tokens(system)
+    remaining = max(0, budget - system_t)
+
+    # -------------------------
+    # USER MESSAGE
+    # -------------------------
+    user_cap = int(remaining * USER_SHARE)
+    user_t = count_tokens(user)
+
+    if user_t > user_cap:
+        user = truncate_tokens(user, user_cap, keep_tail=0.25)
+        user_t = count_tokens(user)
+        trimmed.append("user")
+
+    remaining -= user_t
+
+    # -------------------------
+    # RESEARCH CONTEXT
+    # -------------------------
+    context_cap = int(remaining * CONTEXT_SHARE)
+    context_t = count_tokens(context)
+
+    if context_t > context_cap:
+        context = truncate_tokens(context, context_cap)
+        context_t = count_tokens(context)
+        trimmed.append("context")
+
+    remaining -= context_t
+
+    # -------------------------
+    # HISTORY (NEWEST FIRST)
+    # -------------------------
+    summary_reserve = int(remaining * SUMMARY_SHARE)
+    history_budget = remaining - summary_reserve
+
+    kept = []
+    history_t = 0
+    dropped = []
+
+    for i in range(len(history) - 1, -1, -1):
+        m = history[i]
+        line = f"{m['role'].upper()}: {m['content']}"
+        t = count_tokens(line)
+
+        if t > HISTORY_TURN_CAP:
+            line = truncate_tokens(line, HISTORY_TURN_CAP)
+            t = count_tokens(line)
+
+        if history_t + t > history_budget:
+            dropped = history[:i + 1]
+            break
+
+        kept.append(line)
+        history_t += t
+
+    kept.reverse()
+
+    if dropped:
+        trimmed.append("history")
+        folded = "\n".join(
+            f"- {m['role'].upper()}: {gist(m['content'])}" for m in dropped
+        )
+        summary = (summary + "\n" + folded).strip() if summary else folded
+
+    remaining -= history_t
+
+    # -------------------------
+    # SUMMARY
+    # -------------------------
+    summary_t = count_tokens(summary)
+
+    if summary_t > remaining:
+        # Newest summary lines matter most: keep the tail
+        summary = truncate_tokens(summary, remaining, keep_tail=1.0)
+        summary_t = count_tokens(summary)
+        trimmed.append("summary")
+
+    # -------------------------
+    # JOIN
+    # -------------------------
+    parts = [system] if include_system else []
+
+    if context:
+        parts.append("Research Context:\n" + context)
+
+    if summary:
+        parts.append("Conversation Summary (earlier turns):\n" + summary)
+
+    parts.extend(kept)
+    parts.append("USER: " + user + "\nASSISTANT:")
+
+    report = {
+        "tokenizer": tokenizer_name(),
+        "budget": budget,
+        "system": system_t,
+        "context": context_t,
+        "summary": summary_t,
+        "history": history_t,
+        "history_turns": len(kept),
+        "history_dropped": len(dropped),
+        "user": user_t,
+        "total": system_t + context_t + summary_t + history_t + user_t,
+        "trimmed": trimmed
+    }
+
+    return "\n\n".join(parts), report
+
+
+if __name__ == "__main__":
+    # Build step: vendors cl100k_base into tiktoken_cache/
+    print("Tokenizer:", tokenizer_name(), "->", os.environ["TIKTOKEN_CACHE_DIR"])
@@ -0,0 +1,593 @@
+# providers.py — Dynamo AI (MULTI-PROVIDER MODEL ROUTER)
+# Gemini / Groq / DeepSeek with EWMA health, failover and hedging
+
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import config
+import resilience
+import telemetry
+
+# --------------------------------------------------
+# MODEL → PROVIDER MAP
+# --------------------------------------------------
+
+MODEL_PROVIDERS = {
+    "gemini-2.0-flash": "gemini",
+    "gemini-1.5-flash": "gemini",
+    "gemini-1.5-pro": "gemini",
+    "llama-3.3-70b-versatile": "groq",
+    "llama-3.1-8b-instant": "groq",
+    "deepseek-chat": "deepseek",
+    "deepseek-reasoner": "deepseek"
+}
+
+PREFIX_PROVIDERS = (
+    ("gemini", "gemini"),
+    ("deepseek", "deepseek"),
+    ("llama", "groq"),
+    ("mixtral", "groq"),
+    ("gemma", "groq")
+)
+
+DEFAULT_MODELS = {
+    "gemini": "gemini-2.0-flash",
+    "groq": "llama-3.3-70b-versatile",
+    "deepseek": "deepseek-chat"
+}
+
+REQUEST_TIMEOUT = 60        # seconds per upstream call
+EWMA_ALPHA = 0.2
+ERROR_COOLDOWN = 30         # seconds an unhealthy provider sits out
+UNHEALTHY_ERROR_RATE = 0.5
+HEDGE_MIN_DELAY = 1.5       # never hedge sooner than this
+HEDGE_LATENCY_FACTOR = 2.0  # ...or 2x the primary's typical latency
+
+
+class ProviderError(Exception):
+    pass
+
+# --------------------------------------------------
+# PROVIDER HEALTH (EWMA)
+# --------------------------------------------------
+
+class ProviderStats:
+    def __init__(self):
+        self.latency = None      # EWMA seconds
+        self.error_rate = 0.0    # EWMA of 0/1 outcomes
+        self.last_error_at = 0.0
+        self.probe_started = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def record(self, ok, elapsed):
+        with self.lock:
+            self.calls += 1
+            self.probe_started = 0.0
+            self.error_rate = (1 - EWMA_ALPHA) * self.error_rate + EWMA_ALPHA * (0.0 if ok else 1.0)
+
+            if ok:
+                self.latency = elapsed if self.latency is None else (
+                    (1 - EWMA_ALPHA) * self.latency + EWMA_ALPHA * elapsed
+                )
+            else:
+                self.errors += 1
+                self.last_error_at = time.monotonic()
+
+    def healthy(self):
+        return self.error_rate < UNHEALTHY_ERROR_RATE
+
+    def _probe_open(self, now):
+        return (
+            now - self.last_error_at > ERROR_COOLDOWN
+            and now - self.probe_started >= REQUEST_TIMEOUT
+        )
+
+    def probe_open(self):
+        """True when probe() would hand out the slot right now."""
+        with self.lock:
+            return self._probe_open(time.monotonic())
+
+    def probe(self):
+        """
+        Half-open: once the cooldown has passed, one request at a
+        time may use an unhealthy provider; its outcome moves the
+        EWMA. True when the caller got the probe slot. Claim it only
+        right before the call; record() (or release_probe() when the
+        call is abandoned) frees it, and a slot never reported back
+        frees itself after REQUEST_TIMEOUT.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if not self._probe_open(now):
+                return False
+            self.probe_started = now
+            return True
+
+    def release_probe(self):
+        with self.lock:
+            self.probe_started = 0.0
+
+    def score(self):
+        latency = self.latency if self.latency is not None else 1.0
+        return latency * (1 + 4 * self.error_rate)
+
+    def snapshot(self):
+        return {
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "calls": self.calls,
+            "errors": self.errors,
+            "healthy": self.healthy()
+        }
+
+# --------------------------------------------------
+# PROVIDER IMPLEMENTATIONS
+# --------------------------------------------------
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _client(name, factory):
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = factory()
+        return _clients[name]
+
+
+# --------------------------------------------------
+# GEMINI MODEL REGISTRY
+# --------------------------------------------------
+# One GenerativeModel per (model, system instruction, generation config).
+# The system prompt travels as a reusable system_instruction instead of
+# being re-sent inside every prompt body.
+
+_gemini_models = {}
+_gemini_lock = threading.Lock()
+_gemini_configured = False
+
+
+def _configure_gemini():
+    global _gemini_configured
+
+    import google.generativeai as genai
+
+    if not _gemini_configured:
+        try:
+            if config.GEMINI_KEY:
+                genai.configure(api_key=config.GEMINI_KEY)
+        except Exception as e:
+            print("Gemini Init Error:", e)
+        _gemini_configured = True
+
+    return genai
+
+
+def gemini_model(model, system_instruction=None, generation_config=None):
+    key = (
+        model,
+        system_instruction or "",
+        json.dumps(generation_config, sort_keys=True) if generation_config else ""
+    )
+
+    with _gemini_lock:
+        client = _gemini_models.get(key)
+
+        if client is None:
+            genai = _configure_gemini()
+            client = genai.GenerativeModel(
+                model,
+                system_instruction=system_instruction or None,
+                generation_config=generation_config
+            )
+            _gemini_models[key] = client
+
+    return client
+
+
+def _gemini_complete(model, system, prompt, timeout):
+    client = gemini_model(model, system)
+    response = client.generate_content(
+        prompt,
+        request_options={"timeout": timeout}
+    )
+    return response.text
+
+
+def _gemini_stream(model, system, prompt, timeout):
+    client = gemini_model(model, system)
+    response = client.generate_content(
+        prompt,
+        stream=True,
+        request_options={"timeout": timeout}
+    )
+    for chunk in response:
+        text = getattr(chunk, "text", "")
+        if text:
+            yield text
+
+
+def _messages(system, prompt):
+    messages = []
+    if system:
+        messages.append({"role": "system", "content": system})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def _groq_client():
+    from groq import Groq
+    return _client("groq", lambda: Groq(api_key=config.GROQ_KEY))
+
+
+def _deepseek_client():
+    from openai import OpenAI
+    return _client("deepseek", lambda: OpenAI(
+        api_key=config.DEEPSEEK_API_KEY,
+        base_url="https://api.deepseek.com"
+    ))
+
+
+def _groq_complete(model, system, prompt, timeout):
+    client = _groq_client()
+    response = client.chat.completions.create(
+        model=model,
+        messages=_messages(system, prompt),
+        timeout=timeout
+    )
+    return response.choices[0].message.content
+
+
+def _deepseek_complete(model, system, prompt, timeout):
+    client = _deepseek_client()
+    response = client.chat.completions.create(
+        model=model,
+        messages=_messages(system, prompt),
+        timeout=timeout
+    )
+    return response.choices[0].message.content
+
+
+def _chat_stream(client_factory):
+    # Groq and DeepSeek share the OpenAI-style delta stream
+    def stream(model, system, prompt, timeout):
+        response = client_factory().chat.completions.create(
+            model=model,
+            messages=_messages(system, prompt),
+            timeout=timeout,
+            stream=True
+        )
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                yield text
+    return stream
+
+# --------------------------------------------------
+# REGISTRY
+# --------------------------------------------------
+
+PROVIDERS = {}
+STREAMERS = {}
+STATS = {}
+
+
+def register_provider(name, complete, default_model=None, enabled=True, stream=None):
+    """
+    complete(model, system, prompt, timeout) -> str
+    stream(model, system, prompt, timeout) -> iterator of text chunks
+    (optional; without it streaming falls back to one chunk).
+    Also the hook for local fake providers in tests/benchmarks.
+    """
+    if not enabled:
+        PROVIDERS.pop(name, None)
+        STREAMERS.pop(name, None)
+        return
+
+    PROVIDERS[name] = complete
+    STATS.setdefault(name, ProviderStats())
+
+    if stream:
+        STREAMERS[name] = stream
+    else:
+        STREAMERS.pop(name, None)
+
+    if default_model:
+        DEFAULT_MODELS[name] = default_model
+
+
+register_provider(
+    "gemini", _gemini_complete,
+    enabled=bool(config.GEMINI_KEY), stream=_gemini_stream
+)
+register_provider(
+    "groq", _groq_complete,
+    enabled=bool(config.GROQ_KEY), stream=_chat_stream(_groq_client)
+)
+register_provider(
+    "deepseek", _deepseek_complete,
+    enabled=bool(config.DEEPSEEK_API_KEY), stream=_chat_stream(_deepseek_client)
+)
+
+# --------------------------------------------------
+# ROUTING
+# --------------------------------------------------
+
+_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="provider")
+
+
+def provider_for(model_name):
+    if model_name in MODEL_PROVIDERS:
+        return MODEL_PROVIDERS[model_name]
+
+    lowered = (model_name or "").lower()
+    for prefix, provider in PREFIX_PROVIDERS:
+        if lowered.startswith(prefix):
+            return provider
+
+    return "gemini"
+
+
+def model_for(provider, model_name):
+    """
+    The model to send upstream. Names outside MODEL_PROVIDERS are
+    client input, so they become the provider's default model.
+    """
+    if MODEL_PROVIDERS.get(model_name) == provider:
+        return model_name
+    return DEFAULT_MODELS[provider]
+
+
+def plan(model_name):
+    """
+    Ordered [(provider, model)]: the requested provider first (if
+    healthy), then the other healthy providers by EWMA score.
+    An unhealthy provider whose probe slot is open ranks as healthy;
+    the rest are kept at the end as a last resort. Nothing is
+    claimed here: _next_candidate takes the probe slot when the
+    provider is actually called.
+    """
+
+    requested = provider_for(model_name)
+    order = []
+
+    if requested in PROVIDERS:
+        order.append((requested, model_for(requested, model_name)))
+
+    others = sorted(
+        (p for p in PROVIDERS if p != requested),
+        key=lambda p: STATS[p].score()
+    )
+    order.extend((p, DEFAULT_MODELS[p]) for p in others)
+
+    healthy, sick = [], []
+    for o in order:
+        stats = STATS[o[0]]
+        (healthy if stats.healthy() or stats.probe_open() else sick).append(o)
+
+    return healthy + sick
+
+
+def _next_candidate(queue, deferred):
+    """
+    Pops the next (provider, model, probing) to call. An unhealthy
+    provider is called with its probe slot; without the slot it
+    moves behind the rest once and is then tried as a last resort.
+    """
+
+    while True:
+        provider, model = queue.pop(0)
+        stats = STATS[provider]
+
+        if stats.healthy():
+            return provider, model, False
+        if stats.probe():
+            return provider, model, True
+        if not queue or provider in deferred:
+            return provider, model, False
+
+        deferred.add(provider)
+        queue.append((provider, model))
+
+
+def _call(provider, model, system, prompt, timeout):
+    started = time.monotonic()
+
+    try:
+        text = PROVIDERS[provider](model, system, prompt, timeout)
+        if not isinstance(text, str) or not text:
+            raise ProviderError(f"{provider} returned an empty response")
+    except Exception:
+        elapsed = time.monotonic() - started
+        STATS[provider].record(False, elapsed)
+        telemetry.observe_stage("provider:" + provider, elapsed, ok=False)
+        telemetry.record_upstream_error(provider)
+        raise
+
+    elapsed = time.monotonic() - started
+    STATS[provider].record(True, elapsed)
+    telemetry.observe_stage("provider:" + provider, elapsed)
+    return text
+
+
+def _hedge_delay(provider):
+    latency = STATS[provider].latency
+    if latency is None:
+        return None
+    return max(HEDGE_MIN_DELAY, HEDGE_LATENCY_FACTOR * latency)
+
+
+def complete(model_name, prompt, system=None, hedge=None, timeout=REQUEST_TIMEOUT):
+    """
+    Returns (text, provider, model). Fails over down the plan on
+    errors; with hedging, a slow primary races the next provider
+    and the first good answer wins. Raises ProviderError when every
+    provider failed.
+    """
+
+    if hedge is None:
+        hedge = config.HEDGE_REQUESTS
+
+    # Executor threads don't see the request deadline: fix one end
+    # time here and give every attempt only what is left of it
+    ends = time.monotonic() + resilience.timeout_for(timeout)
+
+    candidates = plan(model_name)
+    if not candidates:
+        raise ProviderError("No AI providers configured")
+
+    errors = []
+    in_flight = {}
+    queue = list(candidates)
+    deferred = set()
+
+    def launch():
+        # _call records the outcome, which also frees a probe slot
+        provider, model, _ = _next_candidate(queue, deferred)
+        left = max(resilience.MIN_UPSTREAM_TIMEOUT, ends - time.monotonic())
+        future = _pool.submit(_call, provider, model, system, prompt, left)
+        in_flight[future] = (provider, model)
+
+    launch()
+
+    while in_flight:
+        left = ends - time.monotonic()
+        if left <= 0:
+            errors.append("request deadline exceeded")
+            break
+
+        delay = None
+        if hedge and queue and len(in_flight) == 1:
+            (provider, _), = in_flight.values()
+            delay = _hedge_delay(provider)
+
+        wait_for = left if delay is None else min(delay, left)
+        done, _ = wait(list(in_flight), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+        if not done:
+            # Primary is slow: hedge with the next provider
+            if delay is not None and delay < left:
+                launch()
+            continue
+
+        for future in done:
+            provider, model = in_flight.pop(future)
+
+            try:
+                text = future.result()
+            except Exception as e:
+                print(f"Provider {provider} failed:", e)
+                errors.append(f"{provider}: {e}")
+                continue
+
+            # Losers keep running in the pool; their stats still count
+            return text, provider, model
+
+        if not in_flight and queue:
+            launch()
+
+    raise ProviderError("; ".join(errors) or "All providers failed")
+
+
+def stream(model_name, prompt, system=None, timeout=REQUEST_TIMEOUT):
+    """
+    Yields text chunks from the first provider in the plan that
+    produces any. Fails over only before the first chunk; once text
+    has been sent, a mid-stream error is raised to the caller.
+    Blocking iterator; drive it from a worker thread.
+    """
+
+    candidates = plan(model_name)
+    if not candidates:
+        raise ProviderError("No AI providers configured")
+
+    errors = []
+    queue = list(candidates)
+    deferred = set()
+
+    while queue:
+        provider, model, probing = _next_candidate(queue, deferred)
+        # Runs in the caller's thread, so the request deadline is visible
+        left = resilience.timeout_for(timeout)
+        streamer = STREAMERS.get(provider)
+        started = time.monotonic()
+        emitted = False
+
+        try:
+            if streamer is None:
+                # _call records its own stats
+                yield _call(provider, model, system, prompt, left)
+                return
+
+            for chunk in streamer(model, system, prompt, left):
+                emitted = True
+                yield chunk
+
+            if not emitted:
+                raise ProviderError(f"{provider} returned an empty response")
+
+        except GeneratorExit:
+            # Consumer went away mid-stream: no outcome to record
+            if probing:
+                STATS[provider].release_probe()
+            raise
+
+        except Exception as e:
+            if streamer is not None:
+                elapsed = time.monotonic() - started
+                STATS[provider].record(False, elapsed)
+                telemetry.observe_stage("provider:" + provider, elapsed, ok=False)
+                telemetry.record_upstream_error(provider)
+
+            if emitted:
+                raise
+
+            print(f"Provider {provider} stream failed:", e)
+            errors.append(f"{provider}: {e}")
+            continue
+
+        elapsed = time.monotonic() - started
+        STATS[provider].record(True, elapsed)
+        telemetry.observe_stage("provider:" + provider, elapsed)
+        return
+
+    raise ProviderError("; ".join(errors) or "All providers failed")
+
+# --------------------------------------------------
+# PRE-WARM
+# --------------------------------------------------
+
+def warm(system_prompts=()):
+    """
+    Builds the common model clients and opens upstream connections
+    so the first real request does not pay for TLS / channel setup.
+    Best effort; never raises.
+    """
+
+    if "gemini" in PROVIDERS:
+        try:
+            for system in system_prompts or (None,):
+                gemini_model(DEFAULT_MODELS["gemini"], system)
+            gemini_model(DEFAULT_MODELS["gemini"]).count_tokens("ping")
+        except Exception as e:
+            print("Gemini warm-up failed:", e)
+
+    for name, factory in (
+        ("groq", lambda: _groq_client()),
+        ("deepseek", lambda: _deepseek_client())
+    ):
+        if name in PROVIDERS:
+            try:
+                factory().models.list()
+            except Exception as e:
+                print(f"{name} warm-up failed:", e)
+
+
+def health():
+    return {name: STATS[name].snapshot() for name in PROVIDERS}
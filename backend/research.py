@@ -0,0 +1,270 @@
+# research.py — Dynamo AI (DEEP-DIVE RETRIEVAL)
+# Concurrent sub-queries → dedup → BM25 rerank → token-budgeted packing
+
+import re
+import math
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import resilience
+import telemetry
+from prompt_builder import count_tokens
+
+# --------------------------------------------------
+# LIMITS
+# --------------------------------------------------
+
+MAX_SUB_QUERIES = 4
+RESULTS_PER_QUERY = 5
+CONTEXT_TOKEN_BUDGET = 3000
+PASSAGE_WORDS = 120
+PASSAGES_PER_SOURCE = 3
+NEAR_DUPLICATE_JACCARD = 0.8
+SEARCH_TIMEOUT = 20
+
+STOPWORDS = frozenset("""
+a an and are as at be by can could do does for from has have how i in into is it
+its me my of on or our please should tell that the their them there these this to
+was we what when where which who why will with would you your about explain give
+also then than they
+""".split())
+
+_WORD = re.compile(r"[a-z0-9]+")
+_SPLIT_QUESTIONS = re.compile(r"\?\s+|\s+(?:and also|as well as|and then)\s+", re.IGNORECASE)
+
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="research")
+
+
+def _tokens(text):
+    return _WORD.findall(text.lower())
+
+
+def _keywords(text):
+    return [t for t in _tokens(text) if t not in STOPWORDS and len(t) > 1]
+
+# --------------------------------------------------
+# SUB-QUERIES
+# --------------------------------------------------
+
+def sub_queries(question):
+    """
+    Cheap local query expansion: the question itself, a keyword
+    form, each part of a multi-part question, and an "overview"
+    variant for broad coverage.
+    """
+
+    question = question.strip()[:350]
+    queries = [question]
+
+    keywords = " ".join(_keywords(question))
+    if keywords and keywords != question.lower():
+        queries.append(keywords)
+
+    for part in _SPLIT_QUESTIONS.split(question):
+        part = part.strip(" ?")
+        if part and len(part.split()) >= 3:
+            queries.append(part)
+
+    if keywords:
+        queries.append(keywords + " overview analysis")
+
+    seen = set()
+    unique = []
+    for q in queries:
+        key = q.lower()
+        if key not in seen:
+            seen.add(key)
+            unique.append(q[:350])
+
+    return unique[:MAX_SUB_QUERIES]
+
+# --------------------------------------------------
+# DEDUP
+# --------------------------------------------------
+
+def normalize_url(url):
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query)
+        if not k.lower().startswith(("utm_", "ref", "fbclid", "gclid"))
+    ))
+
+    path = parts.path.rstrip("/")
+    return f"{host}{path}" + (f"?{query}" if query else "")
+
+
+def _shingles(text, k=4):
+    words = _tokens(text)
+    return {
+        zlib.crc32(" ".join(words[i:i + k]).encode())
+        for i in range(max(1, len(words) - k + 1))
+    }
+
+
+def dedup(results):
+    """
+    Drops repeated URLs, then near-duplicate documents
+    (syndicated copies) by shingle Jaccard similarity.
+    """
+
+    by_url = {}
+    for r in results:
+        url = str(r.get("url", ""))
+        if not url:
+            continue
+
+        key = normalize_url(url)
+        best = by_url.get(key)
+        if best is None or len(_body(r)) > len(_body(best)):
+            by_url[key] = r
+
+    unique = []
+    fingerprints = []
+
+    for r in by_url.values():
+        sh = _shingles(_body(r))
+
+        duplicate = any(
+            len(sh & other) / max(1, len(sh | other)) >= NEAR_DUPLICATE_JACCARD
+            for other in fingerprints
+        )
+
+        if not duplicate:
+            unique.append(r)
+            fingerprints.append(sh)
+
+    return unique
+
+
+def _body(r):
+    return str(r.get("raw_content") or r.get("content") or "")
+
+# --------------------------------------------------
+# PASSAGES + BM25
+# --------------------------------------------------
+
+def passages(result):
+    words = _body(result).split()
+    title = str(result.get("title", ""))[:120]
+    url = str(result.get("url", ""))
+
+    step = PASSAGE_WORDS
+    for i in range(0, len(words), step):
+        chunk = " ".join(words[i:i + step])
+        if len(chunk) > 40:
+            yield {"title": title, "url": url, "text": chunk}
+
+
+def bm25_rank(question, items, k1=1.5, b=0.75):
+    """
+    Scores passages against the question terms. Returns items
+    sorted best first, each with a "score".
+    """
+
+    query = set(_keywords(question))
+    if not items or not query:
+        return items
+
+    docs = [Counter(_tokens(p["text"])) for p in items]
+    lengths = [sum(d.values()) for d in docs]
+    avg_len = sum(lengths) / len(lengths) or 1.0
+    n = len(docs)
+
+    idf = {}
+    for term in query:
+        df = sum(1 for d in docs if term in d)
+        idf[term] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    for p, d, length in zip(items, docs, lengths):
+        score = 0.0
+        for term in query:
+            tf = d.get(term, 0)
+            if tf:
+                score += idf[term] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_len))
+        p["score"] = score
+
+    return sorted(items, key=lambda p: p["score"], reverse=True)
+
+# --------------------------------------------------
+# PACKING
+# --------------------------------------------------
+
+def pack(ranked, budget=CONTEXT_TOKEN_BUDGET):
+    lines = ["[DYNAMO WEB CONTEXT]"]
+    used = count_tokens(lines[0])
+    per_source = Counter()
+
+    for p in ranked:
+        if p.get("score", 1) <= 0:
+            break
+        if per_source[p["url"]] >= PASSAGES_PER_SOURCE:
+            continue
+
+        line = f"- {p['title']}: {p['text']} (Source: {p['url']})"
+        cost = count_tokens(line)
+
+        if used + cost > budget:
+            continue
+
+        lines.append(line)
+        used += cost
+        per_source[p["url"]] += 1
+
+    return "\n".join(lines) if len(lines) > 1 else ""
+
+# --------------------------------------------------
+# PIPELINE
+# --------------------------------------------------
+
+@telemetry.traced("deep_research")
+def deep_context(client, question, budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Full deep-dive retrieval with a Tavily client. Fails silently
+    per sub-query; returns "" when nothing usable came back.
+    """
+
+    queries = sub_queries(question)
+
+    # Pool threads don't see the request deadline; fix the budget here
+    timeout = resilience.timeout_for(SEARCH_TIMEOUT)
+
+    def run(q):
+        try:
+            with resilience.guard("tavily"):
+                res = client.search(
+                    query=q,
+                    search_depth="advanced",
+                    max_results=RESULTS_PER_QUERY,
+                    include_raw_content=True,
+                    timeout=timeout
+                )
+            return res.get("results", [])
+        except resilience.CircuitOpen:
+            return []
+        except Exception as e:
+            print("Deep search sub-query failed:", e)
+            telemetry.record_upstream_error("tavily")
+            return []
+
+    futures = [_pool.submit(run, q) for q in queries]
+
+    # One shared wait: slow sub-queries are dropped, not waited on in turn
+    done, late = wait(futures, timeout=timeout)
+    if late:
+        print(f"Deep search: {len(late)} sub-queries missed the deadline")
+
+    results = []
+    for f in done:
+        results.extend(f.result())
+
+    docs = dedup(results)
+    items = [p for r in docs for p in passages(r)]
+    ranked = bm25_rank(question, items)
+
+    return pack(ranked, budget)
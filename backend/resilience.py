@@ -0,0 +1,278 @@
+# resilience.py — Dynamo AI (CIRCUIT BREAKERS + REQUEST DEADLINES)
+# Fail fast on dependencies known to be down; never spend more on an
+# upstream call than the request has left
+
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+import telemetry
+
+# --------------------------------------------------
+# LIMITS
+# --------------------------------------------------
+
+# Whole-request budgets (seconds) by path prefix
+ROUTE_DEADLINES = {
+    "/chat": 45.0,
+    "/generate-radio": 90.0,
+    "/export-audio": 45.0,
+    "/analyze-data": 60.0,
+    "/generate-ppt-smart": 60.0,
+    "/export/": 60.0
+}
+DEFAULT_DEADLINE = 30.0
+DEADLINE_HEADER = "x-request-timeout"   # client may ask for less (seconds)
+
+MIN_UPSTREAM_TIMEOUT = 0.5   # below this a call is not worth starting
+
+# dependency -> consecutive failures to open, seconds before a probe
+BREAKER_SETTINGS = {
+    "tavily": (3, 30.0),
+    "pollinations": (3, 60.0),
+    "huggingface": (3, 60.0),
+    "edge_tts": (3, 30.0),
+    "supabase": (5, 15.0)
+}
+DEFAULT_BREAKER = (5, 30.0)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class CircuitOpen(Exception):
+    pass
+
+# --------------------------------------------------
+# DEADLINES (CONTEXTVAR, SET PER REQUEST)
+# --------------------------------------------------
+# Copied into asyncio tasks and asyncio.to_thread calls. Plain
+# executor threads do not inherit it, so compute timeouts before
+# submitting work to a pool.
+
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+
+def start(seconds):
+    """
+    Sets the deadline for the current request / task. Returns a
+    token for _deadline.reset when the caller must restore it.
+    """
+    return _deadline.set(time.monotonic() + seconds)
+
+
+def remaining():
+    """
+    Seconds left for this request, or None outside any request.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def expired():
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def timeout_for(cap):
+    """
+    The timeout for one upstream call: its own cap, shortened to
+    what the request has left. Raises DeadlineExceeded when too
+    little is left to be useful.
+    """
+    left = remaining()
+    if left is None:
+        return cap
+    if left < MIN_UPSTREAM_TIMEOUT:
+        raise DeadlineExceeded("request deadline exceeded")
+    return min(cap, left)
+
+
+def deadline_for(path):
+    for prefix, seconds in ROUTE_DEADLINES.items():
+        nested = prefix if prefix.endswith("/") else prefix + "/"
+        if path == prefix or path.startswith(nested):
+            return seconds
+    return DEFAULT_DEADLINE
+
+# --------------------------------------------------
+# CIRCUIT BREAKERS
+# --------------------------------------------------
+
+class CircuitBreaker:
+    """
+    closed -> open after `threshold` consecutive failures;
+    open -> half_open after `recovery` seconds, letting one probe
+    through; the probe's outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name, threshold, recovery):
+        self.name = name
+        self.threshold = threshold
+        self.recovery = recovery
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def _transition(self, state):
+        self.state = state
+        telemetry.record_event("circuit_" + self.name, state)
+
+    def allow(self):
+        with self.lock:
+            if self.state == "closed":
+                return True
+
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.recovery:
+                    self.rejected += 1
+                    return False
+                self._transition("half_open")
+
+            if self.probing:
+                self.rejected += 1
+                return False
+
+            self.probing = True
+            return True
+
+    def is_open(self):
+        with self.lock:
+            return (
+                self.state == "open"
+                and time.monotonic() - self.opened_at < self.recovery
+            )
+
+    def success(self):
+        with self.lock:
+            self.probing = False
+            self.failures = 0
+            if self.state != "closed":
+                self._transition("closed")
+
+    def failure(self):
+        with self.lock:
+            self.probing = False
+            self.failures += 1
+
+            if self.state == "half_open" or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+                if self.state != "open":
+                    self._transition("open")
+
+    def release(self):
+        # Neutral outcome (cancelled / out of budget): frees the probe
+        with self.lock:
+            self.probing = False
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "rejected": self.rejected
+            }
+
+
+BREAKERS = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(name):
+    with _breakers_lock:
+        b = BREAKERS.get(name)
+        if b is None:
+            threshold, recovery = BREAKER_SETTINGS.get(name, DEFAULT_BREAKER)
+            b = BREAKERS[name] = CircuitBreaker(name, threshold, recovery)
+        return b
+
+
+def is_open(name):
+    return breaker(name).is_open()
+
+
+@contextmanager
+def guard(name):
+    """
+    Wraps one upstream call. Raises CircuitOpen without calling
+    when the dependency is known to be down, DeadlineExceeded when
+    the request has no budget left. Errors raised inside count as
+    failures unless they are the request's own deadline running out.
+    """
+    if expired():
+        raise DeadlineExceeded("request deadline exceeded")
+
+    b = breaker(name)
+    if not b.allow():
+        raise CircuitOpen(f"{name} circuit open")
+
+    try:
+        yield
+    except DeadlineExceeded:
+        b.release()
+        raise
+    except Exception:
+        if expired():
+            b.release()
+        else:
+            b.failure()
+        raise
+    except BaseException:
+        b.release()
+        raise
+    else:
+        b.success()
+
+
+def stats():
+    with _breakers_lock:
+        breakers = dict(BREAKERS)
+    return {name: b.snapshot() for name, b in breakers.items()}
+
+# --------------------------------------------------
+# MIDDLEWARE
+# --------------------------------------------------
+
+def _requested(request: Request):
+    try:
+        seconds = float(request.headers.get(DEADLINE_HEADER, ""))
+    except ValueError:
+        return None
+    return seconds if seconds > 0 else None
+
+
+async def middleware(request: Request, call_next):
+    budget = deadline_for(request.url.path)
+
+    asked = _requested(request)
+    if asked is not None:
+        budget = min(asked, budget)
+
+    token = start(budget)
+
+    try:
+        return await call_next(request)
+    except DeadlineExceeded:
+        telemetry.record_event("deadline", "exceeded")
+        return JSONResponse(
+            status_code=504,
+            content={"error": "Request deadline exceeded"}
+        )
+    except CircuitOpen as e:
+        return JSONResponse(
+            status_code=503,
+            content={"error": "Dependency unavailable", "reason": str(e)},
+            headers={"Retry-After": "5"}
+        )
+    finally:
+        _deadline.reset(token)
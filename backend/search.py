@@ -1,44 +1,79 @@
 # search.py — Dynamo AI (FINAL, SAFE, RENDER-STABLE)
 
-from tavily import TavilyClient
 import config
+import resilience
+import search_gate
+import telemetry
+
+SEARCH_TIMEOUT = 15
 
 # --------------------------------------------------
-# INITIALIZE CLIENT SAFELY
+# INITIALIZE CLIENT SAFELY (ON FIRST USE)
 # --------------------------------------------------
 
 tavily_client = None
+_initialized = False
 
-if config.TAVILY_KEY:
-    try:
-        tavily_client = TavilyClient(api_key=config.TAVILY_KEY)
-    except Exception as e:
-        print("Tavily Init Error:", e)
+
+def get_client():
+    global tavily_client, _initialized
+
+    if not _initialized:
+        _initialized = True
+
+        if config.TAVILY_KEY:
+            try:
+                from tavily import TavilyClient
+                tavily_client = TavilyClient(api_key=config.TAVILY_KEY)
+            except Exception as e:
+                print("Tavily Init Error:", e)
+
+    return tavily_client
 
 # --------------------------------------------------
 # WEB CONTEXT FETCHER (SAFE)
 # --------------------------------------------------
 
+@telemetry.traced("search")
 def get_web_context(query, deep_dive=False):
     """
     Fetches live web context for the AI.
     Always fails silently.
     """
 
-    if not tavily_client or not isinstance(query, str):
+    client = get_client()
+
+    if not client or not isinstance(query, str):
+        return ""
+
+    # Degrade to no context instead of waiting on a dead Tavily
+    if resilience.is_open("tavily"):
+        telemetry.record_event("search_skipped", "circuit_open")
         return ""
 
     # 🔒 HARD LIMIT to avoid Tavily 400-char error
     safe_query = query.strip()[:350]
 
+    # 🧠 DeepThink: multi-query, dedup, rerank, budgeted packing
+    if deep_dive:
+        try:
+            import research
+            context = research.deep_context(client, query)
+            if context:
+                return context
+        except Exception as e:
+            print("Deep Research Error:", e)
+
     try:
         search_depth = "advanced" if deep_dive else "basic"
 
-        results = tavily_client.search(
-            query=safe_query,
-            search_depth=search_depth,
-            max_results=5
-        )
+        with resilience.guard("tavily"):
+            results = client.search(
+                query=safe_query,
+                search_depth=search_depth,
+                max_results=5,
+                timeout=resilience.timeout_for(SEARCH_TIMEOUT)
+            )
 
         context_lines = ["[DYNAMO WEB CONTEXT]"]
 
@@ -54,6 +89,29 @@ def get_web_context(query, deep_dive=False):
 
         return "\n".join(context_lines)
 
+    except (resilience.CircuitOpen, resilience.DeadlineExceeded) as e:
+        telemetry.record_event("search_skipped", type(e).__name__)
+        return ""
+
     except Exception as e:
         print("Search Error:", e)
+        telemetry.record_upstream_error("tavily")
+        return ""
+
+
+def gated_context(message, chat_id=None, routed=None, deep_dive=False):
+    """
+    Web context only when the search gate asks for it; reuses the
+    previous turn's retrieval for follow-ups. Blocking.
+    """
+    gate = search_gate.decide(message, chat_id, routed, deep_dive)
+
+    if gate["reuse"] is not None:
+        return gate["reuse"]
+
+    if not gate["search"]:
         return ""
+
+    context = get_web_context(message, deep_dive)
+    search_gate.remember(chat_id, message, context)
+    return context
@@ -0,0 +1,206 @@
+# search_gate.py — Dynamo AI (ADAPTIVE SEARCH GATING)
+# Decides per message whether a Tavily round-trip is worth it
+
+import re
+import math
+import threading
+
+import intent
+import telemetry
+import cache
+
+# --------------------------------------------------
+# LOCAL RELEVANCE MODEL
+# --------------------------------------------------
+# Tiny logistic model over cheap lexical features. Weights are hand-set
+# starting points, not fitted; positive = needs fresh / external facts.
+# Tune them against the gate's logged decisions (stats() / metrics).
+
+FEATURE_WEIGHTS = {
+    "question": 0.6,          # ends with "?"
+    "wh_start": 0.5,          # starts with who/what/when/where/which
+    "proper_nouns": 0.45,     # per capitalised mid-sentence word (capped)
+    "numbers": 0.35,          # contains digits
+    "temporal": 1.4,          # latest / today / this year ...
+    "long": 0.3,              # > 12 words
+    "follow_up": -1.2,        # cue (it/that/so/and ...) + short or pronoun-only
+    "creative": -1.3,         # write / rewrite / poem / code ...
+    "reasoning": -0.8,        # why / how does / explain / compare
+    "short": -0.9             # <= 3 words
+}
+BIAS = -0.6
+DEEP_DIVE_BIAS = 1.0
+SEARCH_THRESHOLD = 0.5
+
+_WORD = re.compile(r"[A-Za-z0-9']+")
+_WH_START = re.compile(r"^\s*(who|what|when|where|which)\b", re.IGNORECASE)
+_TEMPORAL = re.compile(
+    r"\b(latest|today|tonight|yesterday|current|currently|now|recent|recently|"
+    r"this (week|month|year)|news|20[2-3]\d)\b",
+    re.IGNORECASE
+)
+_FOLLOW_UP = re.compile(
+    r"^\s*(it|its|it's|that|this|those|these|they|them|he|she|so|and|but|also|"
+    r"what about|how about|why)\b",
+    re.IGNORECASE
+)
+FOLLOW_UP_MAX_WORDS = 6
+_PRONOUN_ONLY = {
+    "it", "its", "it's", "that", "this", "those", "these", "they", "them",
+    "he", "she", "him", "her", "his", "their", "so", "and", "but", "also",
+    "what", "how", "about", "why", "is", "are", "was", "were", "do", "does",
+    "did", "the", "a", "an", "of", "then", "more", "one", "ones"
+}
+_CREATIVE = re.compile(
+    r"\b(write|rewrite|draft|poem|story|essay|code|function|script|translate|summari[sz]e)\b",
+    re.IGNORECASE
+)
+_REASONING = re.compile(
+    r"\b(why|how does|how do|explain|compare|difference between|pros and cons)\b",
+    re.IGNORECASE
+)
+
+
+def is_follow_up(message, words=None):
+    """
+    A continuation of the previous turn: opens with a follow-up cue
+    and is either short or made only of pronouns / function words.
+    A long message that happens to start with "so" or "and" is not.
+    """
+    if not _FOLLOW_UP.search(message):
+        return False
+
+    words = _WORD.findall(message) if words is None else words
+    return (
+        len(words) <= FOLLOW_UP_MAX_WORDS
+        or all(w.lower() in _PRONOUN_ONLY for w in words)
+    )
+
+
+def features(message):
+    words = _WORD.findall(message)
+    proper = sum(1 for w in words[1:] if w[:1].isupper() and not w.isupper())
+
+    return {
+        "question": 1.0 if message.rstrip().endswith("?") else 0.0,
+        "wh_start": 1.0 if _WH_START.search(message) else 0.0,
+        "proper_nouns": float(min(proper, 3)),
+        "numbers": 1.0 if any(c.isdigit() for c in message) else 0.0,
+        "temporal": 1.0 if _TEMPORAL.search(message) else 0.0,
+        "long": 1.0 if len(words) > 12 else 0.0,
+        "follow_up": 1.0 if is_follow_up(message, words) else 0.0,
+        "creative": 1.0 if _CREATIVE.search(message) else 0.0,
+        "reasoning": 1.0 if _REASONING.search(message) else 0.0,
+        "short": 1.0 if len(words) <= 3 else 0.0
+    }
+
+
+def relevance(message, deep_dive=False):
+    z = BIAS + (DEEP_DIVE_BIAS if deep_dive else 0.0)
+    for name, value in features(message).items():
+        z += FEATURE_WEIGHTS[name] * value
+    return 1.0 / (1.0 + math.exp(-z))
+
+# --------------------------------------------------
+# PREVIOUS-TURN CONTEXT REUSE
+# --------------------------------------------------
+
+REUSE_TTL = 10 * 60
+REUSE_OVERLAP = 0.4
+
+_last_context = cache.shared(maxsize=2048, ttl=REUSE_TTL, name="search_context")
+
+
+def _terms(message):
+    return {w.lower() for w in _WORD.findall(message) if len(w) > 3}
+
+
+def remember(chat_id, message, context):
+    if chat_id and context:
+        _last_context.set(chat_id, {"terms": _terms(message), "context": context})
+
+
+def _reusable(chat_id, message):
+    if not chat_id:
+        return None
+
+    last = _last_context.get(chat_id)
+    if not last:
+        return None
+
+    if is_follow_up(message):
+        return last["context"]
+
+    terms = _terms(message)
+    if terms and last["terms"]:
+        overlap = len(terms & last["terms"]) / len(terms | last["terms"])
+        if overlap >= REUSE_OVERLAP:
+            return last["context"]
+
+    return None
+
+# --------------------------------------------------
+# GATE
+# --------------------------------------------------
+
+DECISIONS = {}
+_decisions_lock = threading.Lock()
+
+
+def _count(reason):
+    with _decisions_lock:
+        DECISIONS[reason] = DECISIONS.get(reason, 0) + 1
+    telemetry.record_event("search_gate", reason)
+
+
+def decide(message, chat_id=None, routed=None, deep_dive=False):
+    """
+    {
+      "search": bool,          # call Tavily?
+      "reuse": str | None,     # previous turn's context to use instead
+      "reason": str,
+      "score": float | None
+    }
+    """
+
+    if not isinstance(message, str) or not message.strip():
+        _count("empty")
+        return {"search": False, "reuse": None, "reason": "empty", "score": None}
+
+    routed = routed or intent.classify(message)
+
+    # 1️⃣ Confident intent rules win
+    if routed["search"] is False:
+        _count("intent_skip")
+        return {"search": False, "reuse": None, "reason": "intent_skip", "score": None}
+
+    # 2️⃣ Follow-ups reuse the last retrieval for this chat
+    reuse = _reusable(chat_id, message)
+    if reuse is not None:
+        _count("reused")
+        return {"search": False, "reuse": reuse, "reason": "reused", "score": None}
+
+    if routed["search"] is True:
+        _count("intent_search")
+        return {"search": True, "reuse": None, "reason": "intent_search", "score": None}
+
+    # 3️⃣ Local model for everything in between
+    p = relevance(message, deep_dive)
+    reason = "model_search" if p >= SEARCH_THRESHOLD else "model_skip"
+    _count(reason)
+
+    return {"search": p >= SEARCH_THRESHOLD, "reuse": None, "reason": reason, "score": round(p, 3)}
+
+
+def stats():
+    with _decisions_lock:
+        counts = dict(DECISIONS)
+
+    total = sum(counts.values())
+    searched = counts.get("intent_search", 0) + counts.get("model_search", 0)
+
+    return {
+        "decisions": counts,
+        "total": total,
+        "search_rate": round(searched / total, 3) if total else None
+    }
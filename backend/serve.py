@@ -0,0 +1,149 @@
+# serve.py — Dynamo AI (PRODUCTION LAUNCHER)
+# Preforked workers, one per core, sharing state through SQLite
+#
+#   python serve.py                 # workers = usable cores
+#   DYNAMO_WORKERS=4 python serve.py
+#
+# Heavy modules are imported once in the master before forking, so
+# workers share those pages copy-on-write. Clients, threads and the
+# Supabase writer start in each worker's lifespan, after the fork.
+
+import os
+import atexit
+import shutil
+import tempfile
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --------------------------------------------------
+# SIZING
+# --------------------------------------------------
+
+def usable_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def worker_count():
+    configured = int(os.getenv("DYNAMO_WORKERS", "0") or 0)
+    return configured if configured > 0 else usable_cores()
+
+
+def _remove_state(path, owner):
+    # Forked workers inherit atexit handlers; only the master cleans up
+    if os.getpid() == owner:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def prepare_state(workers):
+    """
+    Points every worker at one SQLite state file and one Prometheus
+    multiprocess directory. Must run before config / telemetry are
+    imported, since both read the environment at import time.
+    """
+    os.environ["DYNAMO_WORKERS"] = str(workers)
+
+    if workers == 1:
+        return
+
+    state_dir = tempfile.mkdtemp(prefix="dynamo-")
+    atexit.register(_remove_state, state_dir, os.getpid())
+
+    os.environ.setdefault("DYNAMO_STATE_DB", os.path.join(state_dir, "state.db"))
+
+    metrics_dir = os.path.join(state_dir, "prometheus")
+    os.makedirs(metrics_dir)
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", metrics_dir)
+
+
+def preload():
+    """
+    Imports the app and every lazily loaded subsystem. No warm-up
+    hooks: network clients must not be created before the fork.
+    """
+    import lazy
+    import main
+
+    lazy.prewarm(main.PREWARM_MODULES)
+    return main.app
+
+# --------------------------------------------------
+# GUNICORN (PRELOAD + GRACEFUL DRAIN)
+# --------------------------------------------------
+
+def _child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        try:
+            from prometheus_client import multiprocess
+            multiprocess.mark_process_dead(worker.pid)
+        except Exception as e:
+            print("Prometheus cleanup failed:", e)
+
+
+def run_gunicorn(workers, port, drain):
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"0.0.0.0:{port}",
+                "workers": workers,
+                "worker_class": "uvicorn.workers.UvicornWorker",
+                "preload_app": True,
+                # SIGTERM: stop accepting, finish in-flight requests and
+                # run lifespan shutdown (flushes queued Supabase writes)
+                "graceful_timeout": drain,
+                "timeout": 120,
+                "keepalive": 5,
+                "child_exit": _child_exit
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return preload()
+
+    Application().run()
+
+
+def main():
+    workers = worker_count()
+    prepare_state(workers)
+
+    import uvicorn
+    import config
+
+    port = int(os.environ.get("PORT", 5000))
+    drain = int(config.DRAIN_TIMEOUT)
+
+    if workers == 1:
+        uvicorn.run(
+            preload(),
+            host="0.0.0.0",
+            port=port,
+            timeout_graceful_shutdown=drain
+        )
+        return
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        # No gunicorn (e.g. Windows): uvicorn's supervisor, no preload
+        print("gunicorn not installed; starting workers without preload")
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=port,
+            workers=workers,
+            timeout_graceful_shutdown=drain
+        )
+        return
+
+    run_gunicorn(workers, port, drain)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+# sessions.py — Dynamo AI (WEBSOCKET SESSIONS)
+# One connection multiplexes chat turns, token streams, job progress
+# and finished artifacts; conversation state stays server-side
+
+import json
+import uuid
+import base64
+import asyncio
+import threading
+
+from fastapi import WebSocket, WebSocketDisconnect, HTTPException
+
+import config
+import lazy
+import auth
+import admission
+import resilience
+import telemetry
+import intent
+import memory
+import model
+import search
+
+image = lazy.module("image")
+voice = lazy.module("voice")
+analysis = lazy.module("analysis")
+
+# --------------------------------------------------
+# LIMITS
+# --------------------------------------------------
+
+MAX_JOBS = 4                # concurrent jobs per connection
+OUTBOX_SIZE = 256           # queued events before producers wait
+IDLE_TIMEOUT = 15 * 60      # seconds without a client message
+
+# Each job type is admitted against the limits of its HTTP twin
+JOB_ROUTES = {
+    "chat": "/chat",
+    "analyze": "/analyze-data",
+    "speak": "/export-audio",
+    "radio": "/generate-radio"
+}
+
+# --------------------------------------------------
+# PROTOCOL
+# --------------------------------------------------
+# Client -> server (JSON text frames):
+#   {"type": "hello", "chat_id"?, "history"?, "model"?}
+#     binding a chat_id needs a Firebase ID token (?token= on connect)
+#   {"type": "chat", "id", "message", "use_search"?, "deep_dive"?, "model"?}
+#   {"type": "analyze", "id", "filename", "data" (base64), "sheet"?, "columns"?}
+#   {"type": "speak", "id", "text"}
+#   {"type": "radio", "id", "message"}
+#   {"type": "cancel", "id"}
+#   {"type": "ping"}
+#
+# Server -> client: {"event", "id"?, ...} where event is one of
+#   ready, accepted, progress, token, artifact, done, cancelled, error, pong
+
+
+class JobError(Exception):
+    """
+    Expected job failure; the message is sent to the client as-is.
+    """
+
+
+async def _iterate(chunks):
+    """
+    Drives a blocking iterator in a worker thread and yields its
+    items on the event loop. Cancelling the consumer stops the
+    thread at the next chunk and closes the iterator.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+    end = object()
+
+    def pump():
+        try:
+            for chunk in chunks:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, chunk)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+            loop.call_soon_threadsafe(queue.put_nowait, end)
+
+    worker = asyncio.ensure_future(asyncio.to_thread(pump))
+
+    try:
+        while True:
+            item = await queue.get()
+            if item is end:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        if worker.done():
+            worker.result()
+
+
+def _audio_artifact(data):
+    return {
+        "kind": "audio",
+        "mime": "audio/mpeg",
+        "data": "data:audio/mpeg;base64," + base64.b64encode(data).decode()
+    }
+
+# --------------------------------------------------
+# SESSION
+# --------------------------------------------------
+
+class Session:
+    def __init__(self, websocket: WebSocket, user):
+        self.websocket = websocket
+        self.id = uuid.uuid4().hex
+        self.user = user            # admission.user_key: verified uid or IP
+        self.chat_id = None
+        self.model = "gemini-2.0-flash"
+        self.memory = memory.ChatMemory()
+        self.jobs = {}
+        self.closed = False
+        self.outbox = asyncio.Queue(maxsize=OUTBOX_SIZE)
+
+    # -------------------------
+    # OUTPUT
+    # -------------------------
+
+    async def emit(self, event, job_id=None, **fields):
+        if self.closed:
+            return
+
+        message = {"event": event}
+        if job_id is not None:
+            message["id"] = job_id
+        message.update(fields)
+        await self.outbox.put(message)
+
+    async def _writer(self):
+        # Single writer: concurrent jobs never interleave a frame
+        while True:
+            message = await self.outbox.get()
+            text = json.dumps(message, default=str)
+            telemetry.record_payload("/ws", "response", len(text))
+            await self.websocket.send_text(text)
+
+    # -------------------------
+    # INPUT
+    # -------------------------
+
+    async def run(self):
+        writer = asyncio.create_task(self._writer())
+        await self.emit("ready", session_id=self.id)
+
+        try:
+            while True:
+                try:
+                    raw = await asyncio.wait_for(
+                        self.websocket.receive_text(), timeout=IDLE_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    await self.websocket.close(code=1000, reason="idle")
+                    break
+
+                telemetry.record_payload("/ws", "request", len(raw))
+
+                try:
+                    msg = json.loads(raw)
+                except ValueError:
+                    await self.emit("error", error="Invalid JSON")
+                    continue
+
+                if not isinstance(msg, dict):
+                    await self.emit("error", error="Expected a JSON object")
+                    continue
+
+                await self.dispatch(msg)
+
+        except WebSocketDisconnect:
+            pass
+
+        finally:
+            # Jobs unwinding after disconnect must not wait on the outbox
+            self.closed = True
+            for task in list(self.jobs.values()):
+                task.cancel()
+            writer.cancel()
+
+    async def dispatch(self, msg):
+        kind = msg.get("type")
+        job_id = msg.get("id")
+
+        if kind == "ping":
+            await self.emit("pong")
+            return
+
+        if kind == "hello":
+            await self.hello(msg)
+            return
+
+        if kind == "cancel":
+            task = self.jobs.get(job_id)
+            if task:
+                task.cancel()
+            return
+
+        if kind not in JOB_ROUTES:
+            await self.emit("error", job_id, error=f"Unknown message type: {kind}")
+            return
+
+        if not isinstance(job_id, str) or not job_id:
+            await self.emit("error", error="Jobs need a string 'id'")
+            return
+
+        if job_id in self.jobs:
+            await self.emit("error", job_id, error="A job with this id is running")
+            return
+
+        if len(self.jobs) >= MAX_JOBS:
+            await self.emit("error", job_id, error="Too many jobs in flight", reason="session_busy")
+            return
+
+        telemetry.record_event("ws_message", kind)
+        self.jobs[job_id] = asyncio.create_task(self._job(kind, job_id, msg))
+
+    async def hello(self, msg):
+        """
+        Binds the session to a persisted chat the caller owns, or
+        seeds the in-session memory from client history (once, on
+        connect).
+        """
+        if isinstance(msg.get("model"), str):
+            self.model = msg["model"]
+
+        chat_id = msg.get("chat_id")
+
+        if isinstance(chat_id, str) and chat_id:
+            try:
+                user_id = await auth.current_user(self.websocket)
+            except HTTPException as e:
+                await self.emit("error", error=e.detail)
+                return
+
+            if not await auth.owns_chat(user_id, chat_id):
+                await self.emit("error", error="Chat not found")
+                return
+
+            self.chat_id = chat_id
+            self.memory = await asyncio.to_thread(memory.load, chat_id)
+        elif isinstance(msg.get("history"), list):
+            for m in model.normalize_history(msg["history"]):
+                self.memory.add(m["role"], m["content"])
+
+        await self.emit("ready", session_id=self.id, chat_id=self.chat_id)
+
+    # -------------------------
+    # JOBS
+    # -------------------------
+
+    async def _job(self, kind, job_id, msg):
+        prefix = JOB_ROUTES[kind]
+        admitted = False
+
+        try:
+            denied = await admission.admit(self.user, prefix)
+            if denied:
+                status, reason, retry_after = denied
+                await self.emit(
+                    "error", job_id,
+                    error="Rate limit exceeded" if status == 429 else "Server busy, please retry",
+                    reason=reason,
+                    retry_after=round(retry_after, 1)
+                )
+                return
+
+            admitted = True
+            # Same budget as the HTTP route; this task's context only
+            resilience.start(resilience.deadline_for(prefix))
+            await self.emit("accepted", job_id, type=kind)
+
+            with telemetry.span("ws:" + kind):
+                await getattr(self, "_" + kind)(job_id, msg)
+
+        except asyncio.CancelledError:
+            await self.emit("cancelled", job_id)
+        except JobError as e:
+            await self.emit("error", job_id, error=str(e))
+        except resilience.DeadlineExceeded:
+            await self.emit("error", job_id, error="Deadline exceeded", reason="deadline")
+        except resilience.CircuitOpen as e:
+            await self.emit("error", job_id, error="Dependency unavailable", reason=str(e))
+        except Exception as e:
+            print(f"Session job {kind} failed:", e)
+            await self.emit("error", job_id, error=f"{kind} failed")
+        finally:
+            if admitted:
+                admission.release(prefix)
+            self.jobs.pop(job_id, None)
+
+    async def _chat(self, job_id, msg):
+        text = msg.get("message")
+        if not isinstance(text, str) or not text.strip():
+            raise JobError("No message provided")
+
+        routed = intent.classify(text)
+
+        if routed["intent"] == "identity":
+            await self.emit("done", job_id, type="text", content=config.DYNAMO_IDENTITY)
+            return
+
+        if routed["intent"] == "image":
+            await self.emit("progress", job_id, stage="image")
+            result = await image.generate_image_base64(text)
+            await self.emit("artifact", job_id, kind="image", **result)
+            await self.emit("done", job_id, type="image")
+            return
+
+        deep_dive = bool(msg.get("deep_dive"))
+
+        if self.chat_id:
+            # Other sessions / workers may have added turns since
+            self.memory = await asyncio.to_thread(memory.load, self.chat_id)
+
+        context = ""
+        if msg.get("use_search", True):
+            await self.emit("progress", job_id, stage="context")
+            # Session id keys follow-up reuse when no chat is bound
+            context = await asyncio.to_thread(
+                search.gated_context, text, self.chat_id or self.id, routed, deep_dive
+            )
+
+        chunks, usage = await asyncio.to_thread(
+            model.stream_response,
+            prompt=text,
+            history=self.memory.history(),
+            model_name=msg.get("model") or self.model,
+            context=context,
+            deep_dive=deep_dive,
+            summary=self.memory.summary()
+        )
+
+        parts = []
+        async for chunk in _iterate(chunks):
+            parts.append(chunk)
+            await self.emit("token", job_id, text=chunk)
+
+        answer = "".join(parts)
+        fallback = usage.get("fallback", False)
+
+        # Only completed turns enter the conversation, never the fallback
+        if fallback:
+            telemetry.record_event("ws_chat", "fallback")
+        elif self.chat_id:
+            self.memory = await asyncio.to_thread(
+                memory.remember_turn, self.chat_id, text, answer
+            )
+        else:
+            self.memory.add("user", text)
+            self.memory.add("assistant", answer)
+
+        await self.emit("done", job_id, type="text", content=answer, prompt_tokens=usage)
+
+        # Speculative read-aloud (opt-in); skipped for the outage fallback
+        if config.SPECULATIVE_TTS and not fallback:
+            voice.prefetch(answer, owner=self.chat_id or self.id)
+
+    async def _analyze(self, job_id, msg):
+        filename = msg.get("filename")
+        if not isinstance(filename, str) or not isinstance(msg.get("data"), str):
+            raise JobError("Expected 'filename' and base64 'data'")
+
+        try:
+            data = base64.b64decode(msg["data"], validate=True)
+        except ValueError:
+            raise JobError("'data' is not valid base64")
+
+        columns = msg.get("columns")
+        if isinstance(columns, str):
+            columns = columns.split(",")
+
+        await self.emit("progress", job_id, stage="parsing", bytes=len(data))
+
+        result = await asyncio.to_thread(
+            analysis.process_file_universally,
+            data,
+            filename,
+            sheet=msg.get("sheet"),
+            columns=columns if isinstance(columns, list) else None
+        )
+
+        await self.emit("artifact", job_id, kind="analysis", **result)
+        await self.emit("done", job_id, type="analysis", upload_id=result.get("upload_id"))
+
+    async def _speak(self, job_id, msg):
+        text = msg.get("text")
+        if not isinstance(text, str) or not text.strip():
+            raise JobError("No text provided for audio export")
+
+        await self.emit("progress", job_id, stage="synthesizing")
+
+        segment = voice.segment(text)
+        audio = None
+
+        if config.SPECULATIVE_TTS:
+            audio = await voice.take_prefetched(segment)
+
+        try:
+            audio = audio or await voice.render(segment)
+        except Exception:
+            telemetry.record_upstream_error("edge_tts")
+            raise JobError("Audio generation failed")
+
+        await self.emit("artifact", job_id, **_audio_artifact(audio))
+        await self.emit("done", job_id, type="audio")
+
+    async def _radio(self, job_id, msg):
+        topic = msg.get("message")
+        if not isinstance(topic, str) or not topic.strip():
+            raise JobError("No text provided for radio mode")
+
+        await self.emit("progress", job_id, stage="scripting")
+
+        try:
+            script = await asyncio.to_thread(voice.radio_script, topic)
+        except Exception:
+            raise JobError("Failed to generate radio dialogue")
+
+        await self.emit("progress", job_id, stage="synthesizing", script=script)
+
+        try:
+            audio = await voice.render(script)
+        except Exception:
+            telemetry.record_upstream_error("edge_tts")
+            raise JobError("Radio audio generation failed")
+
+        await self.emit("artifact", job_id, **_audio_artifact(audio))
+        await self.emit("done", job_id, type="audio")
+
+# --------------------------------------------------
+# ENDPOINT
+# --------------------------------------------------
+
+async def serve(websocket: WebSocket):
+    user = await admission.user_key(websocket)
+    denied = await admission.admit(user, "/ws")
+    if denied:
+        # 1013: try again later
+        await websocket.close(code=1013, reason=denied[1])
+        return
+
+    try:
+        await websocket.accept()
+        telemetry.record_event("ws_session", "opened")
+        await Session(websocket, user).run()
+    finally:
+        admission.release("/ws")
+        telemetry.record_event("ws_session", "closed")
@@ -0,0 +1,174 @@
+# spreadsheet.py — Dynamo AI (STREAMING EXCEL INGESTION)
+# Read-only, row-limited reads of one sheet; metadata for the rest
+
+import io
+import itertools
+
+import pandas as pd
+
+# --------------------------------------------------
+# LIMITS
+# --------------------------------------------------
+
+# Rows materialized for preview, charts and stats. The rest of the
+# workbook is never loaded.
+SAMPLE_ROWS = 5000
+
+
+def _header_names(raw):
+    names = []
+    seen = {}
+
+    for i, value in enumerate(raw):
+        name = str(value).strip() if value not in (None, "") else f"Unnamed: {i}"
+
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+
+        names.append(name)
+
+    return names
+
+
+def _select(names, columns):
+    """
+    Column indices to keep. Unknown names are ignored; no
+    (valid) selection means all columns.
+    """
+
+    if not columns:
+        return list(range(len(names)))
+
+    wanted = {c.strip() for c in columns if c and c.strip()}
+    picked = [i for i, n in enumerate(names) if n in wanted]
+    return picked or list(range(len(names)))
+
+
+def _pick_sheet(available, sheet):
+    if sheet is not None:
+        if isinstance(sheet, int) and 0 <= sheet < len(available):
+            return available[sheet]
+        if str(sheet) in available:
+            return str(sheet)
+    return available[0]
+
+
+def _frame(header, rows, columns):
+    names = _header_names(header)
+    keep = _select(names, columns)
+
+    data = [
+        [row[i] if i < len(row) else None for i in keep]
+        for row in rows
+        if any(v not in (None, "") for v in row)
+    ]
+
+    return pd.DataFrame(data, columns=[names[i] for i in keep])
+
+# --------------------------------------------------
+# .XLSX (OPENPYXL READ-ONLY STREAMING)
+# --------------------------------------------------
+
+def read_xlsx(data, sheet=None, columns=None, max_rows=SAMPLE_ROWS):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+
+    try:
+        # Dimensions come from each sheet's <dimension> tag: no row parsing
+        sheets = [
+            {"name": ws.title, "rows": ws.max_row, "columns": ws.max_column}
+            for ws in wb.worksheets
+        ]
+
+        name = _pick_sheet(wb.sheetnames, sheet)
+        ws = wb[name]
+
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, ())
+        # One extra row tells us whether the sheet continues
+        body = list(itertools.islice(rows, max_rows + 1))
+    finally:
+        wb.close()
+
+    truncated = len(body) > max_rows
+    df = _frame(header, body[:max_rows], columns)
+
+    total = next(s["rows"] for s in sheets if s["name"] == name)
+
+    return df, {
+        "sheet": name,
+        "sheets": sheets,
+        "rows_read": len(df),
+        # Some writers emit a stale <dimension>; never report fewer than read
+        "total_rows": max(total - 1, len(body)) if total else None,
+        "truncated": truncated
+    }
+
+# --------------------------------------------------
+# .XLS (XLRD ON-DEMAND)
+# --------------------------------------------------
+
+def _xls_row(ws, i, datemode):
+    """
+    One row's values. Date cells are stored as serial numbers; they
+    come back as datetimes (left as numbers if xlrd can't map them).
+    """
+    import xlrd
+
+    values = ws.row_values(i)
+
+    for col, kind in enumerate(ws.row_types(i)):
+        if kind == xlrd.XL_CELL_DATE:
+            try:
+                values[col] = xlrd.xldate_as_datetime(values[col], datemode)
+            except (xlrd.xldate.XLDateError, ValueError, OverflowError):
+                pass
+
+    return values
+
+
+def read_xls(data, sheet=None, columns=None, max_rows=SAMPLE_ROWS):
+    try:
+        import xlrd
+    except ImportError:
+        # Slower fallback: still bounded to max_rows
+        df = pd.read_excel(io.BytesIO(data), sheet_name=sheet or 0, nrows=max_rows)
+        return df, {"sheet": sheet or 0, "sheets": [], "rows_read": len(df),
+                    "total_rows": None, "truncated": len(df) >= max_rows}
+
+    # on_demand: only the selected sheet is parsed
+    book = xlrd.open_workbook(file_contents=data, on_demand=True)
+
+    try:
+        names = book.sheet_names()
+        name = _pick_sheet(names, sheet)
+        ws = book.sheet_by_name(name)
+
+        header = _xls_row(ws, 0, book.datemode) if ws.nrows else []
+        last = min(ws.nrows, max_rows + 1)
+        body = [_xls_row(ws, i, book.datemode) for i in range(1, last)]
+
+        sheets = [{"name": name, "rows": ws.nrows, "columns": ws.ncols}]
+        sheets += [{"name": n, "rows": None, "columns": None} for n in names if n != name]
+    finally:
+        book.release_resources()
+
+    df = _frame(header, body, columns)
+
+    return df, {
+        "sheet": name,
+        "sheets": sheets,
+        "rows_read": len(df),
+        "total_rows": max(0, ws.nrows - 1),
+        "truncated": ws.nrows - 1 > max_rows
+    }
+
+
+def read_excel(data, filename, sheet=None, columns=None, max_rows=SAMPLE_ROWS):
+    if filename.lower().endswith(".xls"):
+        return read_xls(data, sheet, columns, max_rows)
+    return read_xlsx(data, sheet, columns, max_rows)
@@ -1,26 +1,187 @@
 # supabase_client.py — Dynamo AI (PRODUCTION SAFE)
 
-from supabase import create_client
+import re
+import json
+import atexit
+import base64
+import threading
+from collections import defaultdict
 import config
 from datetime import datetime
+import cache
+import resilience
+import telemetry
 
 # --------------------------------------------------
 # INIT SUPABASE CLIENT
 # --------------------------------------------------
 
 supabase = None
+_initialized = False
+
+# PostgREST HTTP timeout. Calls are synchronous, so the per-request
+# deadline is enforced by _execute refusing to start, not mid-call.
+REQUEST_TIMEOUT = 10
+
+
+def init_client(url=None, key=None):
+    """
+    (Re)creates the client. Pass url/key to point at a local
+    stand-in for the Supabase REST API.
+    """
+    global supabase, _initialized
+
+    from supabase import create_client
+
+    _initialized = True
+
+    url = url or config.SUPABASE_URL
+    key = key or config.SUPABASE_SERVICE_KEY
+
+    if not (url and key):
+        print("Supabase keys missing")
+        supabase = None
+        return None
 
-if config.SUPABASE_URL and config.SUPABASE_SERVICE_KEY:
     try:
+        from supabase.lib.client_options import ClientOptions
+
         supabase = create_client(
-            config.SUPABASE_URL,
-            config.SUPABASE_SERVICE_KEY
+            url, key,
+            options=ClientOptions(postgrest_client_timeout=REQUEST_TIMEOUT)
         )
         print("Supabase client initialized")
     except Exception as e:
         print("Supabase Init Error:", e)
-else:
-    print("Supabase keys missing")
+        supabase = None
+
+    return supabase
+
+
+def get_client():
+    """
+    Lazily creates the client on first use so importing this
+    module never touches the network.
+    """
+    if not _initialized:
+        init_client()
+    return supabase
+
+
+def _execute(query):
+    """
+    Runs a built query behind the Supabase circuit breaker: raises
+    CircuitOpen / DeadlineExceeded at once instead of waiting on a
+    database that is already failing.
+    """
+    with resilience.guard("supabase"):
+        return query.execute()
+
+
+# --------------------------------------------------
+# KEYSET PAGINATION + READ CACHE
+# --------------------------------------------------
+# Pages are ordered (created_at DESC, id DESC) and the cursor is the
+# last row's (created_at, id), so every page costs the same however
+# deep the user scrolls. Backed by indexes:
+#   create index on chats (user_id, created_at desc, id desc);
+#   create index on messages (chat_id, created_at desc, id desc);
+
+CHAT_PAGE_SIZE = 30
+MESSAGE_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+PAGE_CACHE_TTL = 30
+
+CHAT_COLUMNS = "id, title, created_at"
+MESSAGE_COLUMNS = "id, role, content, content_type, created_at"
+
+_chat_pages = cache.shared(maxsize=2048, ttl=PAGE_CACHE_TTL, name="chat_pages")
+_message_pages = cache.shared(maxsize=4096, ttl=PAGE_CACHE_TTL, name="message_pages")
+_message_chat = cache.shared(maxsize=20000, ttl=3600, name="message_chat")
+_chat_owner = cache.shared(maxsize=20000, ttl=3600, name="chat_owner")
+
+
+_CURSOR_ID = re.compile(r"^[0-9A-Za-z-]{1,64}$")   # bigint or uuid
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(row):
+    raw = json.dumps([row.get("created_at"), row.get("id")])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    (created_at, id) from a cursor, or None for the first page.
+    Both parts end up inside a PostgREST filter, so anything that
+    is not an ISO timestamp and a plain id raises InvalidCursor.
+    """
+    if not cursor:
+        return None
+
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        created_at = datetime.fromisoformat(str(created_at)).isoformat()
+    except Exception:
+        raise InvalidCursor("malformed cursor")
+
+    if isinstance(row_id, bool) or not isinstance(row_id, (int, str)) \
+            or not _CURSOR_ID.match(str(row_id)):
+        raise InvalidCursor("malformed cursor")
+
+    return created_at, str(row_id)
+
+
+def _page_limit(limit, default):
+    try:
+        return max(1, min(int(limit or default), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return default
+
+
+def _keyset_page(table, columns, owner_field, owner_id, limit, cursor, extra=None):
+    """
+    One page of rows newer-first. Fetches limit + 1 rows to
+    know whether another page exists.
+    """
+
+    query = supabase.table(table) \
+        .select(columns) \
+        .eq(owner_field, owner_id)
+
+    for field, value in (extra or {}).items():
+        query = query.eq(field, value)
+
+    after = decode_cursor(cursor)
+    if after:
+        created_at, row_id = after
+        query = query.or_(
+            f'created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.lt."{row_id}")'
+        )
+
+    res = _execute(
+        query
+        .order("created_at", desc=True)
+        .order("id", desc=True)
+        .limit(limit + 1)
+    )
+
+    rows = res.data or []
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+
+    return rows[:limit], next_cursor
+
+
+def invalidate_chat_list(user_id):
+    _chat_pages.delete_where(lambda k: k[0] == user_id)
+
+
+def invalidate_messages(chat_id):
+    _message_pages.delete_where(lambda k: k[0] == chat_id)
 
 
 # --------------------------------------------------
@@ -28,31 +189,33 @@ else:
 # --------------------------------------------------
 
 def get_or_create_user(firebase_uid, email=None, full_name=None, phone=None):
-    if not supabase:
+    """
+    Single round-trip upsert on firebase_uid (unique).
+    Only provided profile fields are written, so an existing
+    user's data is never blanked; created_at is left to the DB default.
+    """
+    if not get_client():
         return None
 
     try:
-        res = supabase.table("users") \
-            .select("*") \
-            .eq("firebase_uid", firebase_uid) \
-            .execute()
-
-        if res.data:
-            return res.data[0]
-
-        insert = {
-            "firebase_uid": firebase_uid,
-            "email": email,
-            "full_name": full_name,
-            "phone": phone,
-            "created_at": datetime.utcnow().isoformat()
-        }
+        row = {"firebase_uid": firebase_uid}
+        for field, value in (
+            ("email", email),
+            ("full_name", full_name),
+            ("phone", phone)
+        ):
+            if value is not None:
+                row[field] = value
+
+        res = _execute(
+            supabase.table("users").upsert(row, on_conflict="firebase_uid")
+        )
 
-        res = supabase.table("users").insert(insert).execute()
         return res.data[0] if res.data else None
 
     except Exception as e:
         print("User fetch/create error:", e)
+        telemetry.record_upstream_error("supabase")
         return None
 
 
@@ -61,38 +224,94 @@ def get_or_create_user(firebase_uid, email=None, full_name=None, phone=None):
 # --------------------------------------------------
 
 def create_chat(user_id, title="New Chat"):
-    if not supabase:
+    if not get_client():
         return None
 
     try:
-        res = supabase.table("chats").insert({
+        res = _execute(supabase.table("chats").insert({
             "user_id": user_id,
             "title": title
-        }).execute()
+        }))
 
-        return res.data[0] if res.data else None
+        invalidate_chat_list(user_id)
+
+        chat = res.data[0] if res.data else None
+        if chat:
+            _chat_owner.set(chat["id"], user_id)
+        return chat
 
     except Exception as e:
         print("Create chat error:", e)
+        telemetry.record_upstream_error("supabase")
         return None
 
 
-def list_user_chats(user_id):
-    if not supabase:
-        return []
+def chat_owner(chat_id):
+    """
+    users.id that owns the chat, or None when it does not exist
+    (or the store is unreachable). Ownership never changes, so
+    it is cached for an hour.
+    """
+    owner = _chat_owner.get(chat_id)
+    if owner is not None:
+        return owner
+
+    if not get_client():
+        return None
 
     try:
-        res = supabase.table("chats") \
-            .select("*") \
-            .eq("user_id", user_id) \
-            .order("created_at", desc=True) \
-            .execute()
+        res = _execute(
+            supabase.table("chats")
+            .select("user_id")
+            .eq("id", chat_id)
+            .limit(1)
+        )
+    except Exception as e:
+        print("Chat owner error:", e)
+        telemetry.record_upstream_error("supabase")
+        return None
 
-        return res.data or []
+    if not res.data:
+        return None
 
+    owner = res.data[0]["user_id"]
+    _chat_owner.set(chat_id, owner)
+    return owner
+
+
+def list_user_chats(user_id, limit=CHAT_PAGE_SIZE, cursor=None):
+    """
+    Newest chats first, one keyset page at a time:
+    {"items": [...], "next_cursor": "..." | None}
+    Raises InvalidCursor for a cursor this API did not issue.
+    """
+    empty = {"items": [], "next_cursor": None}
+
+    if not get_client():
+        return empty
+
+    limit = _page_limit(limit, CHAT_PAGE_SIZE)
+    key = (user_id, limit, cursor)
+
+    cached = _chat_pages.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        items, next_cursor = _keyset_page(
+            "chats", CHAT_COLUMNS, "user_id", user_id, limit, cursor
+        )
+
+        page = {"items": items, "next_cursor": next_cursor}
+        _chat_pages.set(key, page)
+        return page
+
+    except InvalidCursor:
+        raise
     except Exception as e:
         print("List chats error:", e)
-        return []
+        telemetry.record_upstream_error("supabase")
+        return empty
 
 
 # --------------------------------------------------
@@ -100,43 +319,255 @@ def list_user_chats(user_id):
 # --------------------------------------------------
 
 def save_message(chat_id, role, content, content_type="text"):
-    if not supabase:
+    if not get_client():
         return None
 
     try:
-        res = supabase.table("messages").insert({
+        res = _execute(supabase.table("messages").insert({
             "chat_id": chat_id,
             "role": role,
             "content": content,          # JSONB (string / dict / list)
             "content_type": content_type,
             "created_at": datetime.utcnow().isoformat()
-        }).execute()
+        }))
 
+        invalidate_messages(chat_id)
         return res.data[0] if res.data else None
 
     except Exception as e:
         print("Save message error:", e)
+        telemetry.record_upstream_error("supabase")
         return None
 
 
-def fetch_chat_messages(chat_id, limit=50):
-    if not supabase:
-        return []
+# --------------------------------------------------
+# WRITE-BEHIND MESSAGE BUFFER
+# --------------------------------------------------
+
+FLUSH_BATCH_SIZE = 20          # flush as soon as this many rows are pending
+FLUSH_INTERVAL_SECONDS = 1.0   # ...or at least this often
+MAX_PENDING = 5000             # hard cap so an outage can't eat memory
+MAX_ATTEMPTS = 3
+
+
+def _insert_rows(rows, final=False):
+    query = supabase.table("messages").insert(rows)
+
+    if final:
+        # Shutdown drain: one try even with the breaker open, since
+        # rows left in the buffer are lost when the process exits
+        query.execute()
+    else:
+        _execute(query)
+
+
+class MessageWriter:
+    """
+    Buffers message rows per chat and inserts them in batches
+    from a background thread. Callers never wait on the database.
+    """
+
+    def __init__(self, insert_rows=_insert_rows,
+                 batch_size=FLUSH_BATCH_SIZE,
+                 interval=FLUSH_INTERVAL_SECONDS,
+                 on_written=invalidate_messages):
+        self.insert_rows = insert_rows
+        self.on_written = on_written
+        self.batch_size = batch_size
+        self.interval = interval
+
+        self._pending = defaultdict(list)   # chat_id -> [(row, attempts)]
+        self._count = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="supabase-writer",
+            daemon=True
+        )
+        self._thread.start()
+
+    def enqueue(self, row, attempts=0):
+        with self._lock:
+            accepted = self._count < MAX_PENDING
+            if accepted:
+                self._pending[row.get("chat_id")].append((row, attempts))
+                self._count += 1
+            full = self._count >= self.batch_size
+
+        if not accepted:
+            self._drop(1, f"buffer full, chat {row.get('chat_id')}")
+            return False
+
+        if full:
+            self._wake.set()
+        return True
+
+    def pending(self):
+        with self._lock:
+            return self._count
+
+    def _drop(self, count, reason):
+        with self._lock:
+            self.dropped += count
+
+        print(f"Message writer dropped {count} row(s): {reason}")
+        telemetry.record_event("message_writer", "dropped", count)
+
+    def flush(self, final=False):
+        """
+        Writes everything pending, one batched insert per chat.
+        Failed batches are re-queued up to MAX_ATTEMPTS. The final
+        flush (shutdown) tries each batch once, breaker or not, and
+        counts whatever it could not write as dropped.
+        """
+        # Keep rows buffered (attempts untouched) while Supabase is down
+        if not final and resilience.is_open("supabase"):
+            return
+
+        with self._flush_lock:
+            with self._lock:
+                batches = self._pending
+                self._pending = defaultdict(list)
+                self._count = 0
+
+            for chat_id, items in batches.items():
+                rows = [row for row, _ in items]
+
+                try:
+                    self.insert_rows(rows, final=final)
+                    if self.on_written:
+                        self.on_written(chat_id)
+                except resilience.CircuitOpen:
+                    if final:
+                        self._drop(len(items), f"circuit open at shutdown, chat {chat_id}")
+                        continue
+
+                    # Not an attempt: the insert never left the process
+                    for row, attempts in items:
+                        self.enqueue(row, attempts)
+                except Exception as e:
+                    print("Batch insert error:", chat_id, e)
+                    telemetry.record_upstream_error("supabase")
+
+                    if final:
+                        self._drop(len(items), f"final flush failed for chat {chat_id}")
+                        continue
+
+                    retry = [(row, attempts + 1) for row, attempts in items
+                             if attempts + 1 < MAX_ATTEMPTS]
+                    for row, attempts in retry:
+                        self.enqueue(row, attempts)
+
+                    if len(retry) < len(items):
+                        self._drop(len(items) - len(retry), f"out of attempts for chat {chat_id}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+            if self.pending():
+                self.flush()
+
+    def stop(self, timeout=5.0):
+        """
+        Graceful shutdown: stop the loop, then drain what is left.
+        """
+        self._stop.set()
+        self._wake.set()
+
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+        self.flush(final=True)
+
+        if self.dropped:
+            print(f"Message writer stopped; {self.dropped} row(s) were never written")
+
+
+writer = MessageWriter()
+
+
+def start_writer():
+    writer.start()
+
+
+def shutdown():
+    writer.stop()
+
+
+atexit.register(shutdown)
+
+
+def queue_message(chat_id, role, content, content_type="text"):
+    """
+    Non-blocking save for hot paths. The row is timestamped now
+    and written by the background writer.
+    """
+    if not get_client():
+        return False
+
+    writer.start()
+
+    return writer.enqueue({
+        "chat_id": chat_id,
+        "role": role,
+        "content": content,
+        "content_type": content_type,
+        "created_at": datetime.utcnow().isoformat()
+    })
+
+
+def fetch_chat_messages(chat_id, limit=MESSAGE_PAGE_SIZE, cursor=None):
+    """
+    The newest `limit` messages (returned oldest -> newest for display).
+    next_cursor pages further back in time:
+    {"items": [...], "next_cursor": "..." | None}
+    """
+    empty = {"items": [], "next_cursor": None}
+
+    if not get_client():
+        return empty
+
+    limit = _page_limit(limit, MESSAGE_PAGE_SIZE)
+    key = (chat_id, limit, cursor)
+
+    cached = _message_pages.get(key)
+    if cached is not None:
+        return cached
 
     try:
-        res = supabase.table("messages") \
-            .select("role, content, content_type, created_at") \
-            .eq("chat_id", chat_id) \
-            .eq("is_deleted", False) \
-            .order("created_at") \
-            .limit(limit) \
-            .execute()
+        items, next_cursor = _keyset_page(
+            "messages", MESSAGE_COLUMNS, "chat_id", chat_id, limit, cursor,
+            extra={"is_deleted": False}
+        )
 
-        return res.data or []
+        for row in items:
+            if row.get("id") is not None:
+                _message_chat.set(row["id"], chat_id)
 
+        page = {"items": items[::-1], "next_cursor": next_cursor}
+        _message_pages.set(key, page)
+        return page
+
+    except InvalidCursor:
+        raise
     except Exception as e:
         print("Fetch messages error:", e)
-        return []
+        telemetry.record_upstream_error("supabase")
+        return empty
 
 
 # --------------------------------------------------
@@ -144,15 +575,23 @@ def fetch_chat_messages(chat_id, limit=50):
 # --------------------------------------------------
 
 def soft_delete_message(message_id):
-    if not supabase:
+    if not get_client():
         return False
 
     try:
-        supabase.table("messages") \
-            .update({"is_deleted": True}) \
-            .eq("id", message_id) \
-            .execute()
+        _execute(
+            supabase.table("messages")
+            .update({"is_deleted": True})
+            .eq("id", message_id)
+        )
+
+        chat_id = _message_chat.pop(message_id)
+        if chat_id is not None:
+            invalidate_messages(chat_id)
+        else:
+            _message_pages.clear()
         return True
     except Exception as e:
         print("Delete message error:", e)
+        telemetry.record_upstream_error("supabase")
         return False
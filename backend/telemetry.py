@@ -0,0 +1,231 @@
+# telemetry.py — Dynamo AI (LATENCY TRACING + PROMETHEUS METRICS)
+# Request middleware, per-stage spans, cache / upstream counters
+
+import os
+import sys
+import time
+import functools
+import inspect
+from contextlib import contextmanager
+
+from fastapi import Request, Response
+
+import config
+
+# --------------------------------------------------
+# PROMETHEUS (OPTIONAL DEPENDENCY)
+# --------------------------------------------------
+
+try:
+    from prometheus_client import (
+        Counter, Histogram, CONTENT_TYPE_LATEST, generate_latest
+    )
+    PROMETHEUS = True
+except Exception as e:
+    print("Prometheus disabled:", e)
+    PROMETHEUS = False
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1, 2.5, 5, 10, 20, 30, 60
+)
+SIZE_BUCKETS = (
+    256, 1024, 4096, 16384, 65536, 262144,
+    1048576, 4194304, 16777216
+)
+
+if PROMETHEUS:
+    REQUEST_SECONDS = Histogram(
+        "dynamo_request_seconds", "HTTP request latency",
+        ["method", "route", "status"], buckets=LATENCY_BUCKETS
+    )
+    STAGE_SECONDS = Histogram(
+        "dynamo_stage_seconds", "Latency of internal stages",
+        ["stage"], buckets=LATENCY_BUCKETS
+    )
+    STAGE_ERRORS = Counter(
+        "dynamo_stage_errors_total", "Stages that raised",
+        ["stage"]
+    )
+    PAYLOAD_BYTES = Histogram(
+        "dynamo_payload_bytes", "Request / response body sizes",
+        ["route", "direction"], buckets=SIZE_BUCKETS
+    )
+    CACHE_REQUESTS = Counter(
+        "dynamo_cache_requests_total", "Cache lookups",
+        ["cache", "result"]
+    )
+    UPSTREAM_ERRORS = Counter(
+        "dynamo_upstream_errors_total", "Failed calls to upstream services",
+        ["dependency"]
+    )
+    EVENTS = Counter(
+        "dynamo_events_total", "Named events (gate decisions, prefetch hits, ...)",
+        ["event", "outcome"]
+    )
+
+# --------------------------------------------------
+# OPENTELEMETRY (OPTIONAL)
+# --------------------------------------------------
+
+_tracer = None
+
+
+def _init_tracing():
+    global _tracer
+
+    if not config.OTEL_ENABLED:
+        return
+
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            exporter = OTLPSpanExporter()
+        except Exception:
+            from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+            exporter = ConsoleSpanExporter()
+
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": "dynamo-ai"})
+        )
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        trace.set_tracer_provider(provider)
+        _tracer = trace.get_tracer("dynamo")
+    except Exception as e:
+        print("OpenTelemetry disabled:", e)
+
+
+_init_tracing()
+
+# --------------------------------------------------
+# RECORDERS
+# --------------------------------------------------
+
+def observe_stage(stage, seconds, ok=True):
+    if PROMETHEUS:
+        STAGE_SECONDS.labels(stage).observe(seconds)
+        if not ok:
+            STAGE_ERRORS.labels(stage).inc()
+
+
+def record_cache(cache, hit):
+    if PROMETHEUS:
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_upstream_error(dependency):
+    if PROMETHEUS:
+        UPSTREAM_ERRORS.labels(dependency).inc()
+
+
+def record_event(event, outcome, count=1):
+    if PROMETHEUS:
+        EVENTS.labels(event, outcome).inc(count)
+
+
+def record_payload(route, direction, size):
+    if PROMETHEUS and size is not None:
+        PAYLOAD_BYTES.labels(route, direction).observe(size)
+
+# --------------------------------------------------
+# SPANS
+# --------------------------------------------------
+
+@contextmanager
+def span(stage, **attributes):
+    """
+    Times a block as one stage; also an OTel span when tracing is on.
+    """
+
+    otel = _tracer.start_as_current_span(stage, attributes=attributes) if _tracer else None
+    if otel:
+        otel.__enter__()
+
+    started = time.perf_counter()
+    exc_info = (None, None, None)
+
+    try:
+        yield
+    except BaseException:
+        exc_info = sys.exc_info()
+        raise
+    finally:
+        observe_stage(stage, time.perf_counter() - started, exc_info[0] is None)
+        if otel:
+            # The span records the exception and sets an ERROR status
+            otel.__exit__(*exc_info)
+
+
+def traced(stage):
+    """
+    Decorator form of span() for sync and async functions.
+    """
+
+    def wrap(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return wrap
+
+# --------------------------------------------------
+# HTTP MIDDLEWARE + /metrics
+# --------------------------------------------------
+
+def _content_length(headers):
+    try:
+        return int(headers.get("content-length"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def middleware(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+
+        # Route template keeps label cardinality bounded
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+
+        if PROMETHEUS:
+            REQUEST_SECONDS.labels(request.method, path, str(status)).observe(elapsed)
+
+        record_payload(path, "request", _content_length(request.headers))
+        if status != 500:
+            record_payload(path, "response", _content_length(response.headers))
+
+
+def metrics_response():
+    if not PROMETHEUS:
+        return Response("prometheus_client not installed\n", status_code=503)
+
+    # Multi-worker: aggregate every worker's samples (see serve.py)
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import CollectorRegistry, multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+import admission
+import auth
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setitem(admission.ROUTE_LIMITS, "/chat", {
+        "concurrency": 1, "queue": 0, "max_wait": 0.0, "rate": 0.001, "burst": 2
+    })
+    monkeypatch.setitem(admission._gates, "/chat", admission.RouteGate(1, 0, 0.0))
+    monkeypatch.setattr(admission, "_buckets", admission.cache.TTLCache(name="test_buckets"))
+    monkeypatch.setattr(auth, "verify_token", {"good-token": ("uid-1", 3600)}.get)
+    monkeypatch.setattr(auth, "_tokens", auth.cache.TTLCache(name="test_tokens"))
+
+    app = FastAPI()
+    app.middleware("http")(admission.middleware)
+
+    @app.post("/chat")
+    async def chat():
+        return {"ok": True}
+
+    @app.post("/chat/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                await asyncio.sleep(0)
+                yield f"{i}\n"
+        return StreamingResponse(chunks())
+
+    return app
+
+
+def test_client_supplied_ids_do_not_reset_the_limit(app):
+    client = TestClient(app)
+
+    codes = [
+        client.post("/chat", headers={"X-User-Id": f"u{i}"}, params={"user_id": f"u{i}"}).status_code
+        for i in range(3)
+    ]
+
+    assert codes == [200, 200, 429]
+
+
+def test_verified_users_get_their_own_bucket(app):
+    client = TestClient(app)
+
+    for _ in range(2):
+        assert client.post("/chat").status_code == 200
+    assert client.post("/chat").status_code == 429
+
+    signed_in = {"Authorization": "Bearer good-token"}
+    assert client.post("/chat", headers=signed_in).status_code == 200
+
+
+def test_streamed_response_releases_its_slot(app):
+    client = TestClient(app)
+    gate = admission._gates["/chat"]
+
+    res = client.post("/chat/stream")
+
+    assert res.text == "0\n1\n2\n"
+    assert gate.in_flight == 0
+    assert not gate._sem.locked()
+
+
+def test_slot_release_is_idempotent():
+    gate = admission.RouteGate(1, 0, 0.0)
+    asyncio.run(gate.acquire())
+    slot = admission._Slot(gate)
+
+    slot.release()
+    slot.release()
+
+    assert gate.in_flight == 0
+    assert gate._sem._value == 1
+
+
+def test_disabled_admission_passes_everything(app, monkeypatch):
+    monkeypatch.setattr(admission.config, "ADMISSION", False)
+    client = TestClient(app)
+
+    assert all(client.post("/chat").status_code == 200 for _ in range(5))
@@ -0,0 +1,82 @@
+import io
+
+from pptx import Presentation
+
+import analysis
+import presentation_engine
+
+CSV = b"month,revenue,cost\nJan,100,60\nFeb,120,70\nMar,90,65\nApr,140,80\n"
+
+
+def test_csv_upload_is_parsed_and_stored():
+    result = analysis.process_file_universally(CSV, "sales.csv")
+
+    assert result["type"] == "chart"
+    assert result["columns"] == ["month", "revenue", "cost"]
+    assert result["rows"][0] == ["Jan", "100", "60"]
+
+    upload = analysis.get_upload(result["upload_id"])
+    assert upload["kind"] == "table"
+    assert upload["summary"]["rows"] == 4
+    assert set(upload["summary"]["numeric"]) == {"revenue", "cost"}
+
+
+def test_csv_tolerates_invalid_utf8():
+    data = b"name,score\n\xffAda,3\nBob,4\n"
+    result = analysis.process_file_universally(data, "scores.csv")
+
+    assert result["type"] == "chart"
+    assert result["columns"] == ["name", "score"]
+
+
+def test_deck_from_csv_upload():
+    result = analysis.process_file_universally(CSV, "sales.csv")
+    upload = analysis.get_upload(result["upload_id"])
+
+    deck = analysis.deck_from_upload(upload, {
+        "slides": [{
+            "type": "chart",
+            "heading": "Revenue vs Cost",
+            "chart": {
+                "kind": "bar",
+                "label_column": "month",
+                "columns": ["revenue", "cost"]
+            }
+        }]
+    })
+
+    chart = deck["slides"][0]["chart"]
+    assert chart["labels"] == ["Jan", "Feb", "Mar", "Apr"]
+    assert [s["name"] for s in chart["series"]] == ["revenue", "cost"]
+
+    prs = Presentation(io.BytesIO(presentation_engine.render_presentation(deck)))
+    slides = list(prs.slides)
+    assert len(slides) == 2
+    assert any(shape.has_chart for shape in slides[1].shapes)
+
+
+def test_overview_deck_from_csv_upload():
+    result = analysis.process_file_universally(CSV, "sales.csv")
+    upload = analysis.get_upload(result["upload_id"])
+
+    deck = analysis.deck_from_upload(upload, {})
+
+    assert deck["title"] == "Dynamo Analysis: sales.csv"
+    assert [s["type"] for s in deck["slides"]] == ["content", "chart"]
+    assert deck["slides"][0]["bullets"][0] == "4 rows × 3 columns"
+
+
+def test_chart_columns_match_non_string_headers():
+    import pandas as pd
+
+    df = pd.DataFrame({"region": ["N", "S"], 2023: [1.0, 2.0], 2024: [3.0, 4.0]})
+    upload = {"df": df, "numeric": df[[2023, 2024]]}
+
+    chart = analysis._resolve_chart(
+        {"kind": "line", "label_column": "region", "columns": ["2023", "2024"]},
+        upload
+    )
+
+    assert [s["name"] for s in chart["series"]] == ["2023", "2024"]
+    assert list(chart["series"][1]["values"]) == [3.0, 4.0]
+    assert chart["labels"] == ["N", "S"]
@@ -0,0 +1,109 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import auth
+import main
+import supabase_client
+
+OWNER = "user-1"
+CHAT = "0b6f0c39-2a2b-4c8e-9f55-3c4f5c1f8a10"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    tokens = {"good-token": ("firebase-uid-1", 3600)}
+    monkeypatch.setattr(auth, "verify_token", tokens.get)
+    monkeypatch.setattr(auth, "_tokens", auth.cache.TTLCache(name="test_tokens"))
+    monkeypatch.setattr(auth, "_users", auth.cache.TTLCache(name="test_users"))
+
+    monkeypatch.setattr(
+        supabase_client, "get_or_create_user",
+        lambda uid: {"id": OWNER} if uid == "firebase-uid-1" else None
+    )
+    monkeypatch.setattr(
+        supabase_client, "chat_owner",
+        lambda chat_id: OWNER if chat_id == CHAT else "someone-else"
+    )
+
+    calls = []
+
+    def fetch(chat_id, limit, cursor):
+        calls.append((chat_id, limit, cursor))
+        supabase_client.decode_cursor(cursor)
+        return {"items": [], "next_cursor": None}
+
+    monkeypatch.setattr(supabase_client, "fetch_chat_messages", fetch)
+    monkeypatch.setattr(supabase_client, "list_user_chats", fetch)
+
+    test_client = TestClient(main.app)
+    test_client.calls = calls
+    return test_client
+
+
+def _auth(token="good-token"):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_history_requires_a_verified_token(client):
+    assert client.get("/chats").status_code == 401
+    assert client.get("/chats", headers=_auth("forged")).status_code == 401
+    assert client.get(f"/chats/{CHAT}/messages").status_code == 401
+    assert client.calls == []
+
+
+def test_chat_list_is_scoped_to_the_caller(client):
+    res = client.get("/chats", params={"user_id": "someone-else"}, headers=_auth())
+
+    assert res.status_code == 200
+    assert client.calls == [(OWNER, 30, None)]
+
+
+def test_messages_of_another_users_chat_are_hidden(client):
+    res = client.get("/chats/other-chat/messages", headers=_auth())
+
+    assert res.status_code == 404
+    assert client.calls == []
+
+
+def test_owner_pages_messages(client):
+    res = client.get(f"/chats/{CHAT}/messages", headers=_auth())
+
+    assert res.status_code == 200
+    assert res.json() == {"items": [], "next_cursor": None}
+
+
+def test_forged_cursor_is_a_bad_request(client):
+    res = client.get(
+        f"/chats/{CHAT}/messages",
+        params={"cursor": "not-a-cursor"},
+        headers=_auth()
+    )
+
+    assert res.status_code == 400
+
+
+def test_chat_turn_needs_the_chat_owner(client, monkeypatch):
+    import memory
+
+    loaded = []
+    monkeypatch.setattr(memory, "load", loaded.append)
+
+    body = {"message": "what did we decide", "chat_id": "other-chat", "use_search": False}
+
+    assert client.post("/chat", json=body).status_code == 401
+    assert client.post("/chat", json=body, headers=_auth()).status_code == 404
+    assert loaded == []
+
+
+def test_rejected_token_is_not_reverified(client, monkeypatch):
+    checked = []
+
+    def verify(token):
+        checked.append(token)
+        return None
+
+    monkeypatch.setattr(auth, "verify_token", verify)
+
+    for _ in range(3):
+        assert client.get("/chats", headers=_auth("forged")).status_code == 401
+    assert checked == ["forged"]
@@ -0,0 +1,88 @@
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import batch
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=8)
+    monkeypatch.setattr(batch, "get_pool", lambda: executor)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def _collect(files):
+    async def run():
+        return [json.loads(line) async for line in batch.stream(files)]
+    return asyncio.run(run())
+
+
+def test_unreadable_table_counts_as_failed(pool):
+    rows = _collect([
+        ("good.csv", b"a,b\n1,2\n3,4\n"),
+        ("bad.xlsx", b"not a workbook")
+    ])
+
+    status = {r["filename"]: r["status"] for r in rows if r["type"] == "result"}
+    assert status == {"good.csv": "ok", "bad.xlsx": "failed"}
+    assert rows[-1]["ok"] == 1 and rows[-1]["failed"] == 1
+
+
+def test_submissions_are_bounded_by_pool_size(pool, monkeypatch):
+    monkeypatch.setattr(batch, "WORKERS", 2)
+    monkeypatch.setattr(batch, "FILE_TIMEOUT", 0.5)
+
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def analyze(name, data):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.2)
+        with lock:
+            running -= 1
+        return {"type": "text", "content": name}
+
+    monkeypatch.setattr(batch, "_analyze", analyze)
+
+    rows = _collect([(f"f{i}.txt", b"x") for i in range(6)])
+
+    assert peak == 2
+    # Queued files did not burn their timeout while waiting
+    assert rows[-1]["ok"] == 6
+
+
+def test_timed_out_file_keeps_its_slot_until_done(pool, monkeypatch):
+    monkeypatch.setattr(batch, "WORKERS", 1)
+    monkeypatch.setattr(batch, "FILE_TIMEOUT", 0.1)
+
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def analyze(name, data):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.4 if name == "slow.txt" else 0.01)
+        with lock:
+            running -= 1
+        return {"type": "text", "content": name}
+
+    monkeypatch.setattr(batch, "_analyze", analyze)
+
+    rows = _collect([("slow.txt", b"x"), ("fast.txt", b"x")])
+
+    status = {r["filename"]: r["status"] for r in rows if r["type"] == "result"}
+    assert status == {"slow.txt": "timeout", "fast.txt": "ok"}
+    assert peak == 1
@@ -0,0 +1,31 @@
+import io
+import asyncio
+
+from PIL import Image
+from fastapi.testclient import TestClient
+
+import image
+import main
+
+
+def _png():
+    buf = io.BytesIO()
+    Image.new("RGB", (1200, 800), "teal").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_full_image_is_served_by_url_with_inline_thumbnail():
+    result = asyncio.run(image._image_response(_png(), "image/png", "lake", "test"))
+
+    assert result["content"].startswith("/images/")
+    assert result["thumbnail"].startswith("data:image/")
+    assert "base64" not in result["content"]
+
+    res = TestClient(main.app).get(result["content"])
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("image/")
+    assert Image.open(io.BytesIO(res.content)).size == (result["width"], result["height"])
+
+
+def test_unknown_image_is_a_404():
+    assert TestClient(main.app).get("/images/missing").status_code == 404
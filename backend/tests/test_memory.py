@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+import cache
+import memory
+import supabase_client
+
+
+@pytest.fixture
+def chats(monkeypatch, tmp_path):
+    store = cache.SharedCache(str(tmp_path / "state.db"), name="chat_memory")
+    monkeypatch.setattr(memory, "_CHATS", store)
+    monkeypatch.setattr(supabase_client, "fetch_chat_messages", lambda chat_id, limit: {
+        "items": [{"role": "user", "content": "earlier question"}],
+        "next_cursor": None
+    })
+    return store
+
+
+def test_first_turn_hydrates_from_supabase(chats):
+    mem = memory.remember_turn("chat-1", "hi", "hello", persist=False)
+
+    assert [m["content"] for m in mem.history()] == ["earlier question", "hi", "hello"]
+
+
+def test_concurrent_turns_are_not_lost(chats):
+    memory.load("chat-1")
+
+    def turn(i):
+        memory.remember_turn("chat-1", f"q{i}", f"a{i}", persist=False)
+
+    threads = [threading.Thread(target=turn, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    mem = memory.load("chat-1")
+    # Older turns fold into the summary; every turn is in one or the other
+    seen = " ".join([m["content"] for m in mem.history()] + [mem.summary()])
+    for i in range(8):
+        assert f"q{i}" in seen and f"a{i}" in seen
+
+
+def test_hydrate_runs_outside_the_write_transaction(chats, monkeypatch):
+    hydrate = memory._hydrate
+
+    def hydrate_and_write(chat_id):
+        # Another worker's write: blocks (and times out) if the SQLite
+        # write lock were held around this call
+        done = threading.Thread(target=chats.set, args=("other-chat", "x"))
+        done.start()
+        done.join(timeout=2)
+        assert not done.is_alive()
+        return hydrate(chat_id)
+
+    monkeypatch.setattr(memory, "_hydrate", hydrate_and_write)
+
+    mem = memory.remember_turn("chat-1", "hi", "hello", persist=False)
+
+    assert [m["content"] for m in mem.history()] == ["earlier question", "hi", "hello"]
+    assert chats.get("other-chat") == "x"
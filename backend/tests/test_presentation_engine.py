@@ -0,0 +1,52 @@
+import io
+
+from pptx import Presentation
+from pptx.util import Pt
+
+import presentation_engine
+
+
+def _render(payload):
+    return Presentation(io.BytesIO(presentation_engine.render_presentation(payload)))
+
+
+def test_many_charts_get_distinct_parts():
+    chart = {"kind": "bar", "labels": ["a", "b"], "values": [1, 2]}
+    prs = _render({"slides": [{"type": "chart", "chart": chart}] * 12})
+
+    parts = {
+        shape.chart.part.partname
+        for slide in prs.slides for shape in slide.shapes if shape.has_chart
+    }
+    assert len(parts) == 12
+
+
+def test_theme_fonts_reach_titles_and_bullets():
+    style = presentation_engine.THEMES["executive"]
+    prs = _render({
+        "theme": "executive",
+        "slides": [{"type": "content", "heading": "H", "bullets": ["one", "two"]}]
+    })
+
+    slide = list(prs.slides)[1]
+    title = slide.shapes.title.text_frame.paragraphs[0].font
+    assert title.size == Pt(style["title_size"])
+    assert str(title.color.rgb) == style["title_color"]
+
+    bullets = [p for p in slide.placeholders[1].text_frame.paragraphs if p.text]
+    assert [p.text for p in bullets] == ["one", "two"]
+    for p in bullets:
+        assert p.font.size == Pt(style["body_size"])
+        assert str(p.font.color.rgb) == style["body_color"]
+
+
+def test_chart_without_usable_series_is_labelled():
+    prs = _render({"slides": [
+        {"type": "chart", "chart": {"kind": "pie", "series": [1, 2]}},
+        {"type": "chart", "chart": {"kind": "bar"}},
+    ]})
+
+    for slide in list(prs.slides)[1:]:
+        assert not any(shape.has_chart for shape in slide.shapes)
+        assert any(shape.has_text_frame and shape.text_frame.text == "No chart data"
+                   for shape in slide.shapes)
@@ -0,0 +1,109 @@
+import time
+
+import pytest
+
+import providers
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(providers, "PROVIDERS", {})
+    monkeypatch.setattr(providers, "STREAMERS", {})
+    monkeypatch.setattr(providers, "STATS", {})
+    monkeypatch.setattr(providers, "DEFAULT_MODELS", dict(providers.DEFAULT_MODELS))
+
+
+def _answer(text, delay=0.0, calls=None):
+    def complete(model, system, prompt, timeout):
+        if calls is not None:
+            calls.append(model)
+        time.sleep(delay)
+        return text
+    return complete
+
+
+def _fail(calls=None):
+    def complete(model, system, prompt, timeout):
+        if calls is not None:
+            calls.append(model)
+        raise RuntimeError("upstream down")
+    return complete
+
+
+def test_fails_over_to_the_next_provider():
+    calls = []
+    providers.register_provider("gemini", _fail(calls))
+    providers.register_provider("groq", _answer("from groq"))
+
+    text, provider, model = providers.complete("gemini-2.0-flash", "hi", hedge=False)
+
+    assert (text, provider, model) == ("from groq", "groq", "llama-3.3-70b-versatile")
+    assert calls == ["gemini-2.0-flash"]
+    assert providers.STATS["gemini"].errors == 1
+
+
+def test_raises_when_every_provider_fails():
+    providers.register_provider("gemini", _fail())
+    providers.register_provider("groq", _fail())
+
+    with pytest.raises(providers.ProviderError):
+        providers.complete("gemini-2.0-flash", "hi", hedge=False)
+
+
+def test_slow_primary_is_hedged(monkeypatch):
+    monkeypatch.setattr(providers, "HEDGE_MIN_DELAY", 0.05)
+    providers.register_provider("gemini", _answer("slow", delay=1.0))
+    providers.register_provider("groq", _answer("fast"))
+    providers.STATS["gemini"].latency = 0.01
+
+    started = time.monotonic()
+    text, provider, _ = providers.complete("gemini-2.0-flash", "hi", hedge=True)
+
+    assert (text, provider) == ("fast", "groq")
+    assert time.monotonic() - started < 1.0
+
+
+def test_no_hedge_waits_for_the_primary():
+    providers.register_provider("gemini", _answer("slow", delay=0.2))
+    providers.register_provider("groq", _answer("fast"))
+    providers.STATS["gemini"].latency = 0.01
+
+    text, provider, _ = providers.complete("gemini-2.0-flash", "hi", hedge=False)
+
+    assert (text, provider) == ("slow", "gemini")
+
+
+def test_unknown_model_names_use_the_provider_default():
+    calls = []
+    providers.register_provider("groq", _answer("ok", calls=calls))
+
+    _, provider, model = providers.complete("llama-made-up", "hi", hedge=False)
+
+    assert (provider, model) == ("groq", "llama-3.3-70b-versatile")
+    assert calls == ["llama-3.3-70b-versatile"]
+
+
+def test_unhealthy_provider_gets_a_single_probe():
+    gemini_calls = []
+    providers.register_provider("gemini", _answer("from gemini", calls=gemini_calls))
+    providers.register_provider("groq", _answer("from groq"))
+
+    stats = providers.STATS["gemini"]
+    stats.error_rate = 1.0
+    stats.last_error_at = time.monotonic() - providers.ERROR_COOLDOWN - 1
+
+    # Planning alone never takes the slot
+    assert providers.plan("gemini-2.0-flash")[0][0] == "gemini"
+    assert providers.plan("gemini-2.0-flash")[0][0] == "gemini"
+
+    # Probe out elsewhere: this request routes around it
+    assert stats.probe()
+    text, provider, _ = providers.complete("gemini-2.0-flash", "hi", hedge=False)
+    assert (text, provider) == ("from groq", "groq")
+    assert gemini_calls == []
+
+    # Freed again: the probe is claimed by the call and settled by its outcome
+    stats.release_probe()
+    text, provider, _ = providers.complete("gemini-2.0-flash", "hi", hedge=False)
+    assert provider == "gemini"
+    assert stats.probe_open()
@@ -0,0 +1,25 @@
+import pytest
+
+import search_gate
+
+LONG = (
+    "And how does the quantum computing industry compare with "
+    "classical HPC on energy efficiency this year?"
+)
+
+
+@pytest.mark.parametrize("message", ["what about them?", "and why?", "so how does it work"])
+def test_short_cued_messages_are_follow_ups(message):
+    assert search_gate.is_follow_up(message)
+
+
+@pytest.mark.parametrize("message", [LONG, "Tell me about them", "Who won the match today?"])
+def test_cue_alone_is_not_a_follow_up(message):
+    assert not search_gate.is_follow_up(message)
+
+
+def test_long_cued_message_does_not_reuse_previous_context():
+    search_gate.remember("chat-1", "Nvidia earnings report", "CONTEXT")
+
+    assert search_gate._reusable("chat-1", "and what about them?") == "CONTEXT"
+    assert search_gate._reusable("chat-1", LONG) is None
@@ -0,0 +1,61 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import auth
+import main
+import memory
+import supabase_client
+
+CHAT = "chat-1"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(auth, "verify_token", {"good-token": ("uid-1", 3600)}.get)
+    monkeypatch.setattr(auth, "_tokens", auth.cache.TTLCache(name="test_tokens"))
+    monkeypatch.setattr(auth, "_users", auth.cache.TTLCache(name="test_users"))
+    monkeypatch.setattr(supabase_client, "get_or_create_user", lambda uid: {"id": "user-1"})
+    monkeypatch.setattr(
+        supabase_client, "chat_owner",
+        lambda chat_id: "user-1" if chat_id == CHAT else "user-2"
+    )
+
+    loaded = []
+
+    def load(chat_id):
+        loaded.append(chat_id)
+        return memory.ChatMemory()
+
+    monkeypatch.setattr(memory, "load", load)
+
+    test_client = TestClient(main.app)
+    test_client.loaded = loaded
+    return test_client
+
+
+def _hello(client, chat_id, query=""):
+    with client.websocket_connect("/ws" + query) as ws:
+        assert ws.receive_json()["event"] == "ready"
+        ws.send_json({"type": "hello", "chat_id": chat_id})
+        return ws.receive_json()
+
+
+def test_hello_binds_an_owned_chat(client):
+    reply = _hello(client, CHAT, "?token=good-token")
+
+    assert reply == {"event": "ready", "session_id": reply["session_id"], "chat_id": CHAT}
+    assert client.loaded == [CHAT]
+
+
+def test_hello_rejects_another_users_chat(client):
+    reply = _hello(client, "chat-2", "?token=good-token")
+
+    assert reply == {"event": "error", "error": "Chat not found"}
+    assert client.loaded == []
+
+
+def test_hello_with_a_chat_needs_sign_in(client):
+    reply = _hello(client, CHAT)
+
+    assert reply == {"event": "error", "error": "Sign-in required"}
+    assert client.loaded == []
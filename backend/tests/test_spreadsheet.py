@@ -0,0 +1,29 @@
+import datetime
+
+import xlrd
+
+import spreadsheet
+
+
+class _Sheet:
+    # Just the two xlrd.Sheet calls _xls_row makes
+    def __init__(self, rows):
+        self.rows = rows
+
+    def row_values(self, i):
+        return [value for value, _ in self.rows[i]]
+
+    def row_types(self, i):
+        return [kind for _, kind in self.rows[i]]
+
+
+def test_xls_date_cells_become_datetimes():
+    ws = _Sheet([[
+        ("Jan", xlrd.XL_CELL_TEXT),
+        (45292.0, xlrd.XL_CELL_DATE),
+        (12.5, xlrd.XL_CELL_NUMBER),
+    ]])
+
+    assert spreadsheet._xls_row(ws, 0, datemode=0) == [
+        "Jan", datetime.datetime(2024, 1, 1), 12.5
+    ]
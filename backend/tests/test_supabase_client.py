@@ -0,0 +1,236 @@
+import pytest
+
+import resilience
+import supabase_client
+from supabase_client import MessageWriter
+
+
+@pytest.fixture(autouse=True)
+def fresh_breaker():
+    resilience.BREAKERS.pop("supabase", None)
+    yield
+    resilience.BREAKERS.pop("supabase", None)
+
+
+def _row(chat_id, n):
+    return {"chat_id": chat_id, "role": "user", "content": f"m{n}"}
+
+
+class Recorder:
+    def __init__(self, fail=0, error=RuntimeError("insert failed")):
+        self.calls = []
+        self.fail = fail
+        self.error = error
+
+    def __call__(self, rows, final=False):
+        self.calls.append((list(rows), final))
+        if self.fail:
+            self.fail -= 1
+            raise self.error
+
+
+# --------------------------------------------------
+# WRITE-BEHIND BUFFER
+# --------------------------------------------------
+
+def test_flush_batches_rows_per_chat():
+    insert = Recorder()
+    written = []
+    writer = MessageWriter(insert_rows=insert, on_written=written.append)
+
+    for n in range(3):
+        writer.enqueue(_row("a", n))
+    writer.enqueue(_row("b", 0))
+
+    writer.flush()
+
+    assert sorted(len(rows) for rows, _ in insert.calls) == [1, 3]
+    assert sorted(written) == ["a", "b"]
+    assert writer.pending() == 0
+
+
+def test_full_batch_wakes_background_thread():
+    insert = Recorder()
+    writer = MessageWriter(insert_rows=insert, batch_size=2, interval=60)
+    writer.start()
+
+    try:
+        writer.enqueue(_row("a", 0))
+        writer.enqueue(_row("a", 1))
+
+        for _ in range(100):
+            if insert.calls:
+                break
+            writer._stop.wait(0.01)
+    finally:
+        writer.stop()
+
+    assert insert.calls[0][0] == [_row("a", 0), _row("a", 1)]
+
+
+def test_failed_batch_is_retried_then_dropped():
+    insert = Recorder(fail=supabase_client.MAX_ATTEMPTS)
+    writer = MessageWriter(insert_rows=insert, on_written=None)
+    writer.enqueue(_row("a", 0))
+
+    for _ in range(supabase_client.MAX_ATTEMPTS):
+        writer.flush()
+
+    assert len(insert.calls) == supabase_client.MAX_ATTEMPTS
+    assert writer.pending() == 0
+    assert writer.dropped == 1
+
+
+def test_open_circuit_keeps_rows_without_spending_attempts():
+    insert = Recorder(fail=1, error=resilience.CircuitOpen("supabase circuit open"))
+    writer = MessageWriter(insert_rows=insert, on_written=None)
+    writer.enqueue(_row("a", 0))
+
+    writer.flush()
+    assert writer.pending() == 1
+
+    writer.flush()
+    assert writer.pending() == 0
+    assert writer.dropped == 0
+
+
+def test_stop_drains_pending_rows():
+    insert = Recorder()
+    writer = MessageWriter(insert_rows=insert, on_written=None, interval=60)
+    writer.start()
+    writer.enqueue(_row("a", 0))
+
+    writer.stop()
+
+    assert [rows for rows, _ in insert.calls] == [[_row("a", 0)]]
+    assert writer.pending() == 0
+
+
+def test_stop_tries_once_with_breaker_open_and_counts_drops():
+    b = resilience.breaker("supabase")
+    for _ in range(b.threshold):
+        b.failure()
+    assert resilience.is_open("supabase")
+
+    insert = Recorder(fail=1)
+    writer = MessageWriter(insert_rows=insert, on_written=None)
+    writer.enqueue(_row("a", 0))
+    writer.enqueue(_row("a", 1))
+
+    writer.flush()
+    assert insert.calls == []
+
+    writer.stop()
+
+    assert len(insert.calls) == 1
+    assert writer.dropped == 2
+    assert writer.pending() == 0
+
+# --------------------------------------------------
+# KEYSET CURSORS
+# --------------------------------------------------
+
+def test_cursor_round_trip():
+    row = {"created_at": "2025-01-02T03:04:05.123456+00:00", "id": "42"}
+    cursor = supabase_client.encode_cursor(row)
+
+    assert supabase_client.decode_cursor(cursor) == (row["created_at"], row["id"])
+
+
+def test_missing_cursor_starts_from_the_top():
+    assert supabase_client.decode_cursor(None) is None
+    assert supabase_client.decode_cursor("") is None
+
+
+@pytest.mark.parametrize("row", [
+    {"created_at": "not-a-date", "id": "1"},
+    {"created_at": '2025-01-01",id.gt."0', "id": "1"},
+    {"created_at": "2025-01-01T00:00:00+00:00", "id": '1"),or(id.gt.0'},
+    {"created_at": "2025-01-01T00:00:00+00:00", "id": None},
+])
+def test_forged_cursor_is_rejected(row):
+    with pytest.raises(supabase_client.InvalidCursor):
+        supabase_client.decode_cursor(supabase_client.encode_cursor(row))
+
+
+def test_garbled_cursor_is_rejected():
+    with pytest.raises(supabase_client.InvalidCursor):
+        supabase_client.decode_cursor("not-a-cursor")
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+        self.limit_n = None
+
+    def select(self, columns):
+        return self
+
+    def eq(self, field, value):
+        self.filters.append(("eq", field, value))
+        return self
+
+    def or_(self, expression):
+        self.filters.append(("or", expression))
+        return self
+
+    def order(self, field, desc=False):
+        return self
+
+    def limit(self, n):
+        self.limit_n = n
+        return self
+
+    def execute(self):
+        class Result:
+            data = self.rows[:self.limit_n]
+        return Result()
+
+
+class FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def table(self, name):
+        query = FakeQuery(self.rows)
+        self.queries.append(query)
+        return query
+
+
+def test_keyset_page_cursor_feeds_next_page(monkeypatch):
+    rows = [
+        {"id": str(10 - i), "created_at": f"2025-01-01T00:00:{59 - i:02d}+00:00"}
+        for i in range(5)
+    ]
+    client = FakeClient(rows)
+    monkeypatch.setattr(supabase_client, "supabase", client)
+
+    items, cursor = supabase_client._keyset_page(
+        "chats", "id, created_at", "user_id", "u1", 2, None
+    )
+
+    assert items == rows[:2]
+    assert client.queries[0].limit_n == 3
+    assert supabase_client.decode_cursor(cursor) == (rows[1]["created_at"], rows[1]["id"])
+
+    supabase_client._keyset_page(
+        "chats", "id, created_at", "user_id", "u1", 2, cursor
+    )
+
+    or_filter = [f for f in client.queries[1].filters if f[0] == "or"][0][1]
+    assert f'created_at.lt."{rows[1]["created_at"]}"' in or_filter
+    assert f'id.lt."{rows[1]["id"]}"' in or_filter
+
+
+def test_last_page_has_no_cursor(monkeypatch):
+    rows = [{"id": "1", "created_at": "2025-01-01T00:00:00+00:00"}]
+    monkeypatch.setattr(supabase_client, "supabase", FakeClient(rows))
+
+    items, cursor = supabase_client._keyset_page(
+        "chats", "id, created_at", "user_id", "u1", 2, None
+    )
+
+    assert items == rows
+    assert cursor is None
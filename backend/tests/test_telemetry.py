@@ -0,0 +1,51 @@
+import pytest
+
+import telemetry
+
+
+class FakeSpan:
+    def __init__(self, spans):
+        self.spans = spans
+        self.exit_args = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.exit_args = exc_info
+        return False
+
+
+class FakeTracer:
+    def __init__(self):
+        self.spans = []
+
+    def start_as_current_span(self, name, attributes=None):
+        span = FakeSpan(self.spans)
+        self.spans.append(span)
+        return span
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    fake = FakeTracer()
+    monkeypatch.setattr(telemetry, "_tracer", fake)
+    return fake
+
+
+def test_span_forwards_exceptions_to_otel(tracer):
+    with pytest.raises(ValueError):
+        with telemetry.span("stage"):
+            raise ValueError("boom")
+
+    exc_type, exc, tb = tracer.spans[0].exit_args
+    assert exc_type is ValueError
+    assert str(exc) == "boom"
+    assert tb is not None
+
+
+def test_span_closes_cleanly_on_success(tracer):
+    with telemetry.span("stage"):
+        pass
+
+    assert tracer.spans[0].exit_args == (None, None, None)
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+import voice
+
+
+@pytest.fixture
+def prefetching(monkeypatch):
+    monkeypatch.setattr(voice.config, "SPECULATIVE_TTS", True)
+    monkeypatch.setattr(voice, "PREFETCH_CONCURRENCY", 1)
+    monkeypatch.setattr(voice, "_inflight", {})
+    monkeypatch.setattr(voice, "_owners", voice.cache.TTLCache(name="test_owners"))
+    monkeypatch.setattr(voice, "_prefetched", voice.cache.TTLCache(name="test_prefetched"))
+
+    async def slow(key, seg, v):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(voice, "_prefetch", slow)
+
+
+def test_newer_answer_takes_over_the_owners_slot(prefetching):
+    async def run():
+        voice.prefetch("First answer.", owner="chat-1")
+        (first,) = voice._inflight.values()
+
+        # Concurrency is 1: the superseded task must free its slot now
+        voice.prefetch("Second answer.", owner="chat-1")
+        (second,) = voice._inflight.values()
+
+        await asyncio.sleep(0)
+        assert first.cancelled()
+        assert second is not first and not second.done()
+        # The cancelled task's callback must not drop the new entry
+        assert list(voice._inflight.values()) == [second]
+
+        second.cancel()
+
+    asyncio.run(run())
@@ -3,9 +3,192 @@
 import uuid
 import os
 import json
+import asyncio
+import hashlib
 import edge_tts
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
+from starlette.background import BackgroundTask
+import config
+import cache
 import model
+import resilience
+import telemetry
+
+VOICE = "en-IN-PrabhatNeural"
+TTS_TIMEOUT = 60   # cap per synthesis; the request deadline may shorten it
+SEGMENT_CHARS = 2000   # safe limit for Edge TTS; what read-aloud plays
+
+# --------------------------------------------------
+# 🗣 TTS ENGINE
+# --------------------------------------------------
+
+async def synthesize(text: str, filename: str, voice: str = VOICE):
+    """
+    Writes an MP3 for text via Edge TTS. Single seam for all
+    synthesis (benchmarks swap it for a local fake).
+    """
+    communicate = edge_tts.Communicate(text, voice=voice)
+
+    # Fails fast (CircuitOpen / DeadlineExceeded) instead of queueing
+    # behind a dead Edge TTS
+    with resilience.guard("edge_tts"), telemetry.span("tts"):
+        await asyncio.wait_for(
+            communicate.save(filename),
+            resilience.timeout_for(TTS_TIMEOUT)
+        )
+
+
+async def render(text: str, voice: str = VOICE):
+    """
+    MP3 bytes for text, for callers that push audio themselves
+    (WebSocket sessions) instead of returning a FileResponse.
+    """
+    filename = f"audio_{uuid.uuid4()}.mp3"
+
+    try:
+        await synthesize(text, filename, voice)
+        with open(filename, "rb") as f:
+            return f.read()
+    finally:
+        safe_delete(filename)
+
+
+def segment(text: str):
+    return text.strip()[:SEGMENT_CHARS]
+
+# --------------------------------------------------
+# ⚡ SPECULATIVE READ-ALOUD (OPT-IN, DYNAMO_SPECULATIVE_TTS)
+# --------------------------------------------------
+# After a chat answer is sent, its first segment is synthesized in
+# the background so a following read-aloud is served at once. Kept
+# cheap: few concurrent jobs (skip, never queue), a short start
+# delay, a hard time budget, and a newer answer for the same chat
+# cancels the older one.
+
+PREFETCH_CONCURRENCY = 2
+PREFETCH_DELAY = 0.25       # let the chat response flush first
+PREFETCH_BUDGET = 20.0      # seconds before a prefetch is abandoned
+PREFETCH_TTL = 10 * 60
+
+_prefetched = cache.shared(maxsize=64, ttl=PREFETCH_TTL, name="tts_prefetch")
+_inflight = {}      # key -> task (this process)
+_owners = cache.TTLCache(maxsize=4096, ttl=PREFETCH_TTL, name="tts_prefetch_owners")
+
+PREFETCH_COUNTS = {}
+
+
+def _count(outcome):
+    PREFETCH_COUNTS[outcome] = PREFETCH_COUNTS.get(outcome, 0) + 1
+    telemetry.record_event("tts_prefetch", outcome)
+
+
+def _key(text, voice):
+    return hashlib.sha256(f"{voice}\n{text}".encode()).hexdigest()
+
+
+async def _prefetch(key, text, voice):
+    # Own budget: not bounded by (or charged to) the chat request
+    resilience.start(PREFETCH_BUDGET)
+
+    try:
+        await asyncio.sleep(PREFETCH_DELAY)
+        audio = await render(text, voice)
+    except asyncio.CancelledError:
+        _count("cancelled")
+        raise
+    except (asyncio.TimeoutError, resilience.DeadlineExceeded):
+        _count("timed_out")
+        return None
+    except Exception as e:
+        print("TTS prefetch failed:", e)
+        _count("failed")
+        return None
+
+    _prefetched.set(key, audio)
+    _count("stored")
+    return audio
+
+
+def prefetch(text, owner=None, voice: str = VOICE):
+    """
+    Starts background synthesis of text's first segment. Call from
+    the event loop right after an answer is produced; never blocks.
+    """
+    if not config.SPECULATIVE_TTS or not isinstance(text, str) or not text.strip():
+        return
+
+    seg = segment(text)
+    key = _key(seg, voice)
+
+    if key in _inflight or key in _prefetched:
+        return
+
+    if resilience.is_open("edge_tts"):
+        _count("skipped_circuit")
+        return
+
+    # A newer answer supersedes the previous one's prefetch
+    if owner is not None:
+        previous = _inflight.pop(_owners.get(owner), None)
+        if previous is not None:
+            # Popped now, not in its done callback: the slot it held
+            # is free for this answer's prefetch
+            previous.cancel()
+        _owners.set(owner, key)
+
+    if len(_inflight) >= PREFETCH_CONCURRENCY:
+        _count("skipped_busy")
+        return
+
+    task = asyncio.create_task(_prefetch(key, seg, voice))
+    _inflight[key] = task
+    task.add_done_callback(lambda t: _inflight.get(key) is t and _inflight.pop(key))
+    _count("started")
+
+
+async def take_prefetched(text, voice: str = VOICE):
+    """
+    Audio for an already segmented text if a prefetch has it (or
+    finishes it within this request's deadline), else None.
+    """
+    key = _key(text, voice)
+
+    audio = _prefetched.get(key)
+    if audio is not None:
+        _count("hit")
+        return audio
+
+    task = _inflight.get(key)
+    if task is not None:
+        try:
+            audio = await asyncio.wait_for(
+                asyncio.shield(task), resilience.timeout_for(TTS_TIMEOUT)
+            )
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            audio = None
+        except Exception:
+            audio = None
+
+        if audio:
+            _count("hit_inflight")
+            return audio
+
+    _count("miss")
+    return None
+
+
+def prefetch_stats():
+    counts = dict(PREFETCH_COUNTS)
+    hits = counts.get("hit", 0) + counts.get("hit_inflight", 0)
+    lookups = hits + counts.get("miss", 0)
+
+    return {
+        "counts": counts,
+        "in_flight": len(_inflight),
+        "hit_rate": round(hits / lookups, 3) if lookups else None
+    }
 
 # --------------------------------------------------
 # 🔊 READ-ALOUD / DOWNLOAD (SINGLE VOICE)
@@ -25,26 +208,37 @@ async def generate_simple_voice(text: str):
             content={"error": "No text provided for audio export"}
         )
 
-    safe_text = text.strip()[:2000]  # safe limit for Edge TTS
+    safe_text = segment(text)
+
+    # Speculative mode: usually already synthesized (or in progress)
+    if config.SPECULATIVE_TTS:
+        audio = await take_prefetched(safe_text)
+        if audio:
+            return Response(
+                content=audio,
+                media_type="audio/mpeg",
+                headers={"Content-Disposition": 'attachment; filename="dynamo_ai_audio.mp3"'}
+            )
+
     filename = f"audio_{uuid.uuid4()}.mp3"
 
     try:
-        communicate = edge_tts.Communicate(
-            safe_text,
-            voice="en-IN-PrabhatNeural"
-        )
-
-        await communicate.save(filename)
+        await synthesize(safe_text, filename)
 
         return FileResponse(
             path=filename,
             media_type="audio/mpeg",
             filename="dynamo_ai_audio.mp3",
-            background=lambda: safe_delete(filename)
+            background=BackgroundTask(safe_delete, filename)
         )
 
+    except (resilience.CircuitOpen, resilience.DeadlineExceeded):
+        # Answered as 503 / 504 by the resilience middleware
+        raise
+
     except Exception as e:
         print("Read-aloud TTS Error:", e)
+        telemetry.record_upstream_error("edge_tts")
         return JSONResponse(
             status_code=500,
             content={"error": "Audio generation failed"}
@@ -55,18 +249,12 @@ async def generate_simple_voice(text: str):
 # 🎧 RADIO MODE (TWO-PERSON DIALOGUE)
 # --------------------------------------------------
 
-async def generate_voice_stream(prompt: str):
+def radio_script(prompt: str):
     """
-    Converts text into a two-person radio dialogue
-    and generates ONE continuous MP3.
+    Writes the two-person dialogue for a topic and flattens it into
+    one TTS-ready script. Blocking (model call); raises on bad output.
     """
 
-    if not isinstance(prompt, str) or not prompt.strip():
-        return JSONResponse(
-            status_code=400,
-            content={"error": "No text provided for radio mode"}
-        )
-
     system_prompt = f"""
 Convert the topic below into a short, engaging
 two-person radio conversation.
@@ -90,21 +278,13 @@ Topic:
     # -------------------------
     # STEP 1: GENERATE DIALOGUE
     # -------------------------
-    try:
-        response = model.get_ai_response(
-            prompt=system_prompt,
-            history=[],
-            model_name="gemini-2.0-flash"
-        )
+    response = model.get_ai_response(
+        prompt=system_prompt,
+        history=[],
+        model_name="gemini-2.0-flash"
+    )
 
-        data = json.loads(response)
-
-    except Exception as e:
-        print("Dialogue generation error:", e)
-        return JSONResponse(
-            status_code=500,
-            content={"error": "Failed to generate radio dialogue"}
-        )
+    data = json.loads(response)
 
     # -------------------------
     # STEP 2: BUILD SCRIPT
@@ -116,7 +296,29 @@ Topic:
         script_parts.append(f"{speaker}: {text}")
 
     full_script = " ".join(script_parts)
-    safe_script = full_script[:1500]
+    return full_script[:1500]
+
+
+async def generate_voice_stream(prompt: str):
+    """
+    Converts text into a two-person radio dialogue
+    and generates ONE continuous MP3.
+    """
+
+    if not isinstance(prompt, str) or not prompt.strip():
+        return JSONResponse(
+            status_code=400,
+            content={"error": "No text provided for radio mode"}
+        )
+
+    try:
+        safe_script = await asyncio.to_thread(radio_script, prompt)
+    except Exception as e:
+        print("Dialogue generation error:", e)
+        return JSONResponse(
+            status_code=500,
+            content={"error": "Failed to generate radio dialogue"}
+        )
 
     filename = f"radio_{uuid.uuid4()}.mp3"
 
@@ -124,22 +326,22 @@ Topic:
     # STEP 3: TTS
     # -------------------------
     try:
-        communicate = edge_tts.Communicate(
-            safe_script,
-            voice="en-IN-PrabhatNeural"
-        )
-
-        await communicate.save(filename)
+        await synthesize(safe_script, filename)
 
         return FileResponse(
             path=filename,
             media_type="audio/mpeg",
             filename="dynamo_radio.mp3",
-            background=lambda: safe_delete(filename)
+            background=BackgroundTask(safe_delete, filename)
         )
 
+    except (resilience.CircuitOpen, resilience.DeadlineExceeded):
+        # Answered as 503 / 504 by the resilience middleware
+        raise
+
     except Exception as e:
         print("Radio TTS Error:", e)
+        telemetry.record_upstream_error("edge_tts")
         return JSONResponse(
             status_code=500,
             content={"error": "Radio audio generation failed"}